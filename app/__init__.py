@@ -51,21 +51,85 @@ def create_app(config_name=None):
         CORS(app)
         logger.info("CORS habilitado")
         
+        # Métricas de latencia por ruta y por servicio externo (GET /metrics)
+        from .services.metrics import init_metrics
+        init_metrics(app)
+        
         # Ruta de verificación de estado
         @app.route('/health')
         def health_check():
-            return jsonify({
+            from .services.cat_service import CatService
+            from .services.dog_service import DogService
+            from .services.http_client import get_http_client
+            from .services.circuit_breaker import breaker_stats
+            from .routes.caching import response_cache
+            from .services.cache_backend import get_shared_cache
+            status = {
                 "status": "ok",
                 "message": "Servicio en funcionamiento",
                 "environment": config_name,
-                "debug": app.debug
-            })
+                "debug": app.debug,
+                "cache": {
+                    "cat_breeds": CatService.get_cache_stats(),
+                    "dog_breeds": DogService.get_cache_stats()
+                },
+                "shared_cache": get_shared_cache().stats(),
+                "upstream": get_http_client().stats(),
+                "circuits": breaker_stats(),
+                "responses": response_cache.stats(),
+                "image_pool": DogService.get_image_pool_stats(),
+                "image_cache": {
+                    "cat_images": CatService.get_image_cache_stats(),
+                    "dog_images": DogService.get_image_cache_stats()
+                }
+            }
+            from .services.catalog_refresher import get_refresher
+            refresher = get_refresher()
+            if refresher is not None:
+                status["catalog_refresh"] = refresher.stats()
+            from .services import image_proxy
+            if image_proxy.is_enabled():
+                status["image_proxy"] = image_proxy.get_image_store().stats()
+            if app.config.get('USERS_ENABLED', True):
+                from .services.user_cache import user_cache
+                status["users"] = user_cache.stats()
+            return jsonify(status)
         
         # Registrar rutas
         from .routes import register_routes
         register_routes(app)
         logger.info("Rutas registradas")
         
+        # Catálogos de razas: copia en disco al instante y recarga en segundo plano
+        from .services.cat_service import CatService
+        from .services.dog_service import DogService
+        from .routes.caching import warm_responses
+        caches = [DogService._breeds_cache, CatService._breeds_cache]
+        paths = ['/api/dogs/breeds', '/api/cats/breeds', '/api/dogs/breeds/filter', '/api/cats/breeds/filter']
+        # La primera búsqueda construye el índice de texto de ambos catálogos
+        search_path = '/api/breeds/search?q=retriever'
+        
+        # Con cada versión nueva de un catálogo (restaurada, recargada al
+        # expirar o por la recarga programada) se regeneran en segundo plano
+        # las respuestas cacheadas y, si ya están los dos catálogos, el índice de búsqueda
+        def warm_catalog(version):
+            ready = all(cache.current is not None for cache in caches)
+            warm_responses(app, paths + [search_path] if ready else paths)
+        for cache in caches:
+            cache.register_listener('warm_responses', warm_catalog)
+        
+        with app.app_context():
+            for service in (DogService, CatService):
+                service.restore_catalog()
+        
+        # Recarga programada de los catálogos antes de que expiren
+        from .services import catalog_refresher
+        if catalog_refresher.is_enabled():
+            def run_in_app(func):
+                with app.app_context():
+                    return func()
+            catalog_refresher.start_refresher(caches, run=run_in_app)
+        
         logger.info(f"Aplicación configurada en modo {config_name}")
         
         return app
@@ -12,6 +12,16 @@ class Config:
     # Configuración de Firebase
     FIREBASE_CREDENTIALS = os.getenv('FIREBASE_CREDENTIALS', 'pet-plataform-back-firebase-adminsdk-fbsvc-bb8c26602e.json')
     
+    # Registrar las rutas de usuarios (requieren Firestore); False en instancias que solo sirven catálogos
+    USERS_ENABLED = os.getenv('USERS_ENABLED', 'True') == 'True'
+    
+    # Cabeceras de caché HTTP para las respuestas del catálogo de razas
+    CATALOG_CACHE_CONTROL = os.getenv('CATALOG_CACHE_CONTROL', 'public, max-age=300, stale-while-revalidate=3600')
+    CATALOG_VARY = os.getenv('CATALOG_VARY', 'Accept-Encoding')
+    # Cache-Control por endpoint, e.g. {"dog.get_breed": "public, max-age=3600"}
+    # (se puede definir como JSON en FLASK_CACHE_CONTROL_OVERRIDES)
+    CACHE_CONTROL_OVERRIDES = {}
+    
     # Otros ajustes de configuración pueden ir aquí
 
 class DevelopmentConfig(Config):
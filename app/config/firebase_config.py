@@ -1,8 +1,4 @@
-import os
-import json
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
-from flask import current_app
+# firebase_admin se importa de forma diferida en app.services.firebase_service
 
 def init_firebase():
     """
@@ -10,7 +6,7 @@ def init_firebase():
     
     Esta función es mantenida por compatibilidad, pero se recomienda usar firebase_service.get_db()
     """
-    from . import firebase_service
+    from app.services import firebase_service
     return firebase_service.get_db() is not None
 
 # Esta función se mantiene por compatibilidad, pero el nuevo código debería usar firebase_service.get_db()
@@ -1,25 +1,146 @@
-from app.services.firebase_service import db
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.services import firebase_service
+from app.services.metrics import track_upstream, upstream_span
+from app.services.user_cache import user_cache
 from flask import current_app
 
-def get_users():
+# Número máximo de usuarios por página
+MAX_PAGE_SIZE = 500
+
+
+def _users_query(fields: Optional[List[str]] = None,
+                 limit: Optional[int] = None,
+                 start_after: Optional[str] = None):
     """
-    Obtiene todos los usuarios de Firestore.
-    
+    Construye la consulta de usuarios ordenada por ID de documento.
+
+    Args:
+        fields (List[str]): Campos a leer (máscara de campos); None para todos
+        limit (int): Número máximo de documentos
+        start_after (str): ID del último usuario de la página anterior
+    """
+    db = firebase_service.get_db()
+    query = db.collection('users').order_by('__name__')
+    if fields:
+        query = query.select(fields)
+    if start_after:
+        query = query.start_after({'__name__': start_after})
+    if limit:
+        query = query.limit(limit)
+    return query
+
+
+def _to_dict(user) -> Dict[str, Any]:
+    return {"id": user.id, **(user.to_dict() or {})}
+
+
+def get_users(limit: Optional[int] = None,
+              start_after: Optional[str] = None,
+              fields: Optional[List[str]] = None):
+    """
+    Obtiene usuarios de Firestore, opcionalmente paginados por cursor.
+
+    Args:
+        limit (int): Tamaño de página (1-500); sin él se devuelven todos los usuarios
+        start_after (str): ID del último usuario de la página anterior
+        fields (List[str]): Campos a leer de cada documento; None para todos
+
     Returns:
-        tuple: (lista_de_usuarios, código_de_estado)
+        tuple: (lista_de_usuarios, cursor_siguiente_página, código_de_estado)
     """
-    if db is None:
-        current_app.logger.error("Firebase no está inicializado")
-        return [], 500
-        
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
     try:
-        users_ref = db.collection('users')
-        users = users_ref.stream()
-        
-        # Convertir los documentos a diccionarios
-        users_list = [{"id": user.id, **user.to_dict()} for user in users]
-        
-        return users_list, 200
+        # Se pide un documento de más para saber si existe otra página
+        query = _users_query(fields, limit + 1 if limit else None, start_after)
+        with upstream_span(), track_upstream('firestore', 'users.query') as call:
+            users_list = [_to_dict(user) for user in query.stream()]
+            call.status = 'ok'
+
+        next_cursor = None
+        if limit and len(users_list) > limit:
+            users_list = users_list[:limit]
+            next_cursor = users_list[-1]['id']
+
+        return users_list, next_cursor, 200
     except Exception as e:
         current_app.logger.error(f"Error al obtener usuarios: {str(e)}")
-        return [], 500
+        return [], None, 500
+
+
+def stream_users(fields: Optional[List[str]] = None,
+                 limit: Optional[int] = None,
+                 start_after: Optional[str] = None) -> Iterator[str]:
+    """
+    Genera los usuarios como líneas NDJSON a medida que llegan de Firestore.
+
+    La memoria usada no depende del tamaño de la colección. La conexión con
+    Firestore se establece al crear el generador, de modo que un error de
+    inicialización se detecta antes de empezar a responder.
+
+    Args:
+        fields (List[str]): Campos a leer de cada documento; None para todos
+        limit (int): Número máximo de usuarios (1-500); sin él se transmiten todos.
+            La página siguiente empieza después del ID de la última línea
+        start_after (str): ID del usuario a partir del cual continuar
+
+    Raises:
+        RuntimeError: Si Firestore no está disponible
+    """
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = _users_query(fields, limit, start_after)
+
+    def generate():
+        try:
+            with track_upstream('firestore', 'users.stream') as call:
+                for user in query.stream():
+                    yield json.dumps(_to_dict(user), default=str, ensure_ascii=False) + '\n'
+                call.status = 'ok'
+        except Exception as e:
+            # La respuesta ya comenzó: solo se puede registrar el error y cortar el flujo
+            current_app.logger.error(f"Error al transmitir usuarios: {str(e)}")
+
+    return generate()
+
+
+def get_user(user_id: str):
+    """
+    Obtiene un usuario por su ID.
+
+    La lectura pasa por user_cache: los perfiles frecuentes se sirven desde
+    memoria y se mantienen al día con listeners de Firestore.
+
+    Returns:
+        tuple: (usuario_o_None, código_de_estado)
+    """
+    try:
+        user = user_cache.get(user_id)
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener el usuario {user_id}: {str(e)}")
+        return None, 500
+
+    if user is None:
+        return None, 404
+    return user, 200
+
+
+def get_users_by_ids(user_ids: List[str]):
+    """
+    Obtiene varios usuarios por sus IDs con una sola lectura por lote para los no cacheados.
+
+    Returns:
+        tuple: (lista_de_usuarios, ids_no_encontrados, código_de_estado)
+    """
+    try:
+        users = user_cache.get_many(user_ids)
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener usuarios por ID: {str(e)}")
+        return [], [], 500
+
+    found = [user for user in users.values() if user is not None]
+    missing = [user_id for user_id, user in users.items() if user is None]
+    return found, missing, 200
@@ -1,14 +1,50 @@
 from flask import Blueprint, jsonify
 from .cat_route import cat_bp
-from .user_route import user_bp
 from .dog_route import dog_bp
+from .search_route import search_bp
 
 def register_routes(app):
     """Register all routes with the Flask app."""
     # Register blueprints
     app.register_blueprint(cat_bp, url_prefix='')
-    app.register_blueprint(user_bp, url_prefix='/api')
     app.register_blueprint(dog_bp, url_prefix='')
+    app.register_blueprint(search_bp, url_prefix='')
+    
+    # Las rutas de usuarios cargan Firestore; las instancias que solo sirven
+    # catálogos pueden omitirlas con USERS_ENABLED=False
+    users_enabled = app.config.get('USERS_ENABLED', True)
+    if users_enabled:
+        from .user_route import user_bp
+        app.register_blueprint(user_bp, url_prefix='/api')
+    
+    # Proxy de imágenes con caché en disco (IMAGE_PROXY_ENABLED)
+    from app.services.image_proxy import is_enabled as image_proxy_enabled
+    proxy_enabled = image_proxy_enabled()
+    if proxy_enabled:
+        from .image_route import image_bp
+        app.register_blueprint(image_bp, url_prefix='')
+    
+    endpoints = {
+        'cat_breeds': '/api/cats/breeds',
+        'cat_breed_by_id': '/api/cats/breeds/<breed_id>',
+        'cat_filter_breeds': '/api/cats/breeds/filter',
+        'cat_breeds_batch': '/api/cats/breeds/batch?ids=<id,id,...>',
+        'dog_breeds': '/api/dogs/breeds',
+        'dog_breed_by_id': '/api/dogs/breeds/<breed_id>',
+        'dog_breeds_batch': '/api/dogs/breeds/batch?ids=<id,id,...>',
+        'dog_breeds_with_images': '/api/dogs/breeds-with-images',
+        'dog_filter_breeds': '/api/dogs/breeds/filter',
+        'dog_breed_images': '/api/dogs/breeds/<breed_id>/images',
+        'dog_random_image': '/api/dogs/random-image',
+        'breed_search': '/api/breeds/search?q=<texto>'
+    }
+    if proxy_enabled:
+        endpoints['image_proxy'] = '/api/images/<image_id>'
+    if users_enabled:
+        endpoints.update({
+            'users': '/api/users',
+            'user_by_id': '/api/users/<user_id>'
+        })
     
     @app.route('/')
     def index():
@@ -16,16 +52,5 @@ def register_routes(app):
             'status': 'success',
             'message': 'Bienvenido a la API de Pet Platform',
             'version': '1.0.0',
-            'endpoints': {
-                'cat_breeds': '/api/cats/breeds',
-                'cat_breed_by_id': '/api/cats/breeds/<breed_id>',
-                'dog_breeds': '/api/dogs/breeds',
-                'dog_breed_by_id': '/api/dogs/breeds/<breed_id>',
-                'dog_breeds_with_images': '/api/dogs/breeds-with-images',
-                'dog_filter_breeds': '/api/dogs/breeds/filter',
-                'dog_breed_images': '/api/dogs/breeds/<breed_id>/images',
-                'dog_random_image': '/api/dogs/random-image',
-                'users': '/api/users',
-                'user_by_id': '/api/users/<user_id>'
-            }
+            'endpoints': endpoints
         })
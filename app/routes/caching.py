@@ -0,0 +1,304 @@
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from flask import Response, current_app, make_response, request
+
+from app.services.metrics import INTERNAL_REQUEST
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional; sin él solo se sirve gzip
+    brotli = None
+
+
+# Niveles de compresión de ResponseCache: se comprime en la petición, así que se
+# prefieren niveles rápidos a los máximos (gzip 9 / brotli 11)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def make_etag(catalog_version: str, params: Optional[Sequence[str]] = None) -> str:
+    """
+    Genera un ETag fuerte para la petición actual.
+
+    Combina la huella del catálogo con la ruta y los parámetros de consulta,
+    ya que cada combinación (página, campos, filtros) es una representación distinta.
+
+    Args:
+        catalog_version (str): Huella del catálogo
+        params (Sequence[str]): Parámetros que usa la vista; el resto no cambia la
+            respuesta y se ignora (None para tenerlos todos en cuenta)
+    """
+    args = request.args.items(multi=True)
+    if params is not None:
+        args = ((key, value) for key, value in args if key in params)
+    query = '&'.join(f"{key}={value}" for key, value in sorted(args))
+    raw = f"{catalog_version}|{request.path}|{query}"
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag de una variante comprimida: cada codificación es una representación distinta."""
+    return etag if encoding == 'identity' else f"{etag}-{encoding}"
+
+
+def _matching_etag(etag: str) -> Optional[str]:
+    """
+    Devuelve la variante del ETag enviada en If-None-Match, o None si ninguna coincide.
+
+    Solo se aceptan las variantes comprimidas que el cliente admite según Accept-Encoding.
+    """
+    candidates = [etag] + [
+        encoded_etag(etag, encoding) for encoding in ('br', 'gzip') if request.accept_encodings[encoding]
+    ]
+    for candidate in candidates:
+        if request.if_none_match.contains_weak(candidate):
+            return candidate
+    return None
+
+
+def _apply_cache_headers(response) -> None:
+    """Añade Cache-Control y Vary según la configuración del endpoint actual."""
+    overrides = current_app.config.get('CACHE_CONTROL_OVERRIDES') or {}
+    cache_control = overrides.get(request.endpoint, current_app.config.get('CATALOG_CACHE_CONTROL'))
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+
+    vary = current_app.config.get('CATALOG_VARY')
+    if vary:
+        for header in vary.split(','):
+            response.vary.add(header.strip())
+
+
+def catalog_etag(version_getter: Callable[[], Optional[str]], params: Optional[Sequence[str]] = None):
+    """
+    Decorador para rutas que solo dependen del catálogo de razas.
+
+    Si el cliente envía If-None-Match con el ETag vigente se responde 304 sin
+    llamar al servicio ni serializar nada. Las respuestas 200 llevan ETag,
+    Cache-Control y Vary (configurables con CATALOG_CACHE_CONTROL,
+    CACHE_CONTROL_OVERRIDES y CATALOG_VARY).
+
+    Args:
+        version_getter (Callable): Devuelve la huella del catálogo, o None si aún no está cargado
+        params (Sequence[str]): Parámetros de consulta que reconoce la vista (ver make_etag)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_getter()
+            if version:
+                etag = _matching_etag(make_etag(version, params))
+                if etag:
+                    response = make_response('', 304)
+                    response.set_etag(etag)
+                    _apply_cache_headers(response)
+                    return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            # Solo se etiqueta si el catálogo no cambió mientras se generaba la respuesta
+            # (cached_body ya pone el ETag de la variante comprimida que sirve)
+            current_version = version_getter()
+            if current_version and version in (None, current_version) and not response.get_etag()[0]:
+                response.set_etag(make_etag(current_version, params))
+            _apply_cache_headers(response)
+            return response
+        return wrapper
+    return decorator
+
+
+class ResponseCache:
+    """
+    Caché LRU de cuerpos de respuesta ya serializados y comprimidos.
+
+    Para cada versión del catálogo y forma de consulta guarda los bytes JSON
+    y, a medida que se piden, sus variantes gzip y brotli, de modo que una
+    petición repetida no vuelve a ejecutar jsonify ni a comprimir.
+    """
+
+    DEFAULT_MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        try:
+            return int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', self.DEFAULT_MAX_ENTRIES))
+        except ValueError:
+            return self.DEFAULT_MAX_ENTRIES
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def put(self, key: str, body: bytes, mimetype: str) -> Dict[str, Any]:
+        """Guarda un cuerpo; las variantes comprimidas se generan al pedirlas (ver encode)."""
+        entry = {'etag': key, 'mimetype': mimetype, 'identity': body}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return entry
+
+    def encode(self, entry: Dict[str, Any], encoding: str) -> Optional[bytes]:
+        """
+        Variante comprimida de una entrada, calculada la primera vez que se pide.
+
+        Returns:
+            Optional[bytes]: Los bytes comprimidos, o None si no reducen el tamaño
+        """
+        with self._lock:
+            if encoding in entry:
+                return entry[encoding]
+
+        body = entry['identity']
+        if encoding == 'br':
+            compressed = brotli.compress(body, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY)
+        else:
+            compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        compressed = compressed if len(compressed) < len(body) else None
+        with self._lock:
+            entry[encoding] = compressed
+        return compressed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(sum(len(v) for k, v in e.items() if k not in ('etag', 'mimetype') and v)
+                             for e in self._entries.values()),
+                'brotli': brotli is not None,
+                **self._stats
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _encoded_response(entry: Dict[str, Any]) -> Response:
+    """Construye la respuesta con la variante que mejor encaja con Accept-Encoding."""
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    encoding = request.accept_encodings.best_match(encodings, default='identity')
+    body = response_cache.encode(entry, encoding) if encoding != 'identity' else None
+    if body is None:
+        encoding, body = 'identity', entry['identity']
+
+    response = Response(body, status=200, mimetype=entry['mimetype'])
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(encoded_etag(entry['etag'], encoding))
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_body(version_getter: Callable[[], Optional[str]], params: Optional[Sequence[str]] = None):
+    """
+    Decorador que sirve respuestas de catálogo desde ResponseCache.
+
+    Se coloca debajo de catalog_etag. La clave es el mismo ETag (versión del
+    catálogo + ruta + parámetros), así que una nueva versión del catálogo
+    invalida automáticamente las entradas anteriores. Cada variante comprimida
+    se sirve con su propio ETag (sufijo -gzip o -br).
+
+    Args:
+        version_getter (Callable): Devuelve la huella del catálogo, o None si aún no está cargado
+        params (Sequence[str]): Parámetros de consulta que reconoce la vista; los
+            desconocidos (p. ej. para saltarse cachés) no crean entradas nuevas
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_getter()
+            if version:
+                entry = response_cache.get(make_etag(version, params))
+                if entry is not None:
+                    return _encoded_response(entry)
+
+            response = make_response(view(*args, **kwargs))
+            current_version = version_getter()
+            if (response.status_code != 200 or not response.is_json or
+                    not current_version or version not in (None, current_version)):
+                return response
+
+            entry = response_cache.put(make_etag(current_version, params), response.get_data(), response.mimetype)
+            return _encoded_response(entry)
+        return wrapper
+    return decorator
+
+
+class _Warmup:
+    """Estado del precalentamiento de una aplicación: un solo hilo y las rutas pendientes."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending: Dict[str, None] = {}
+        self.thread: Optional[threading.Thread] = None
+
+
+def warm_responses(app, paths) -> threading.Thread:
+    """
+    Genera en segundo plano las respuestas cacheadas de las rutas indicadas.
+
+    Se usa al arrancar, tras restaurar los catálogos desde disco, y con cada
+    versión nueva de un catálogo, para que la primera petición real no pague
+    la serialización y la compresión. Las peticiones son internas: no cuentan
+    en las métricas de /metrics. Si ya hay un precalentamiento en curso, las
+    rutas se añaden a una siguiente ronda del mismo hilo en lugar de lanzar otro.
+
+    Args:
+        app (Flask): Aplicación
+        paths (Iterable[str]): Rutas a pedir
+
+    Returns:
+        threading.Thread: Hilo que realiza el precalentamiento
+    """
+    state = app.extensions.setdefault('response_warmup', _Warmup())
+
+    def warm():
+        client = app.test_client()
+        while True:
+            with state.lock:
+                batch = list(state.pending)
+                state.pending.clear()
+                if not batch:
+                    state.thread = None
+                    return
+            for path in batch:
+                try:
+                    client.get(path, headers={'Accept-Encoding': 'br, gzip'},
+                               environ_overrides={INTERNAL_REQUEST: True})
+                except Exception as e:
+                    app.logger.warning(f"No se pudo precalentar {path}: {str(e)}")
+
+    with state.lock:
+        state.pending.update(dict.fromkeys(paths))
+        if state.thread is None:
+            state.thread = threading.Thread(target=warm, name='response-warmup', daemon=True)
+            state.thread.start()
+        return state.thread
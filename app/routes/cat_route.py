@@ -1,22 +1,146 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from app.services.cat_service import CatService
+from app.services.image_proxy import rewrite_breed, rewrite_breeds
+from app.routes.caching import catalog_etag, cached_body
+from app.routes.listing import (
+    parse_list_params, paginate, list_body, wants_field, invalid_params, parse_batch_ids, batch_body,
+    parse_ranges, applied_ranges, range_params, LIST_PARAMS
+)
 
 cat_bp = Blueprint('cat', __name__)
 
+# Columnas con filtros numéricos min_<columna> / max_<columna> en /breeds/filter
+RANGE_COLUMNS = ('weight', 'life_span')
+
+# Parámetros de consulta que distinguen las respuestas de /breeds/filter
+FILTER_PARAMS = ('energy_level', 'intelligence', 'temperament', 'sort_by') + range_params(RANGE_COLUMNS)
+
 @cat_bp.route('/api/cats/breeds', methods=['GET'])
+@catalog_etag(CatService.get_catalog_version, LIST_PARAMS)
+@cached_body(CatService.get_catalog_version, LIST_PARAMS)
 def get_all_breeds():
     """
     Obtiene todas las razas de gatos
+    
+    Parámetros de consulta:
+    - limit: Número de razas por página (1-100); sin él se devuelven todas
+    - cursor: Valor de next_cursor de la página anterior
+    - fields: Campos a incluir separados por comas (e.g., 'id,name,image_url')
+    """
+    try:
+        params = parse_list_params()
+    except ValueError as e:
+        return invalid_params(e)
+    
+    breeds = CatService.get_all_breeds()
+    page, next_cursor = paginate(breeds, params)
+    return jsonify(list_body(
+        page, len(breeds), next_cursor, params,
+        'Razas de gatos obtenidas correctamente'
+    )), 200
+
+@cat_bp.route('/api/cats/breeds-with-images', methods=['GET'])
+def get_all_breeds_with_images():
+    """
+    Obtiene todas las razas de gatos con sus imágenes
+    
+    Admite los mismos parámetros limit, cursor y fields que /api/cats/breeds.
+    Las imágenes solo se resuelven para la página solicitada, y no se
+    resuelven si fields no incluye image_url.
+    
+    La respuesta no lleva ETag ni se guarda en la caché de respuestas:
+    depende de las imágenes resueltas en cada petición, que pueden faltar si
+    la API falla, y no solo del catálogo.
     """
+    try:
+        params = parse_list_params()
+    except ValueError as e:
+        return invalid_params(e)
+    
     breeds = CatService.get_all_breeds()
+    page, next_cursor = paginate(breeds, params)
+    if wants_field(params, 'image_url'):
+        page = CatService.add_images(page)
+    return jsonify(list_body(
+        page, len(breeds), next_cursor, params,
+        'Razas de gatos con imágenes obtenidas correctamente'
+    )), 200
+
+@cat_bp.route('/api/cats/breeds/filter', methods=['GET'])
+@catalog_etag(CatService.get_catalog_version, FILTER_PARAMS)
+@cached_body(CatService.get_catalog_version, FILTER_PARAMS)
+def filter_breeds():
+    """
+    Filtra las razas de gatos según los criterios especificados.
+    
+    Parámetros de consulta:
+    - energy_level: Nivel de energía (1-5)
+    - intelligence: Nivel de inteligencia (1-5)
+    - temperament: Temperamento específico a buscar
+    - min_weight / max_weight: Peso en kg
+    - min_life_span / max_life_span: Esperanza de vida en años
+    - sort_by: 'name', 'weight' o 'life_span' ('-weight' para orden descendente)
+    """
+    energy_level = request.args.get('energy_level', type=int)
+    intelligence = request.args.get('intelligence', type=int)
+    temperament = request.args.get('temperament')
+    sort_by = request.args.get('sort_by')
+    
+    try:
+        ranges = parse_ranges(RANGE_COLUMNS)
+        breeds = CatService.filter_breeds(
+            energy_level=energy_level,
+            intelligence=intelligence,
+            temperament=temperament,
+            ranges=ranges,
+            sort_by=sort_by
+        )
+    except ValueError as e:
+        return invalid_params(e)
+    
     return jsonify({
         'success': True,
-        'message': 'Razas de gatos obtenidas correctamente',
-        'data': breeds,
-        'count': len(breeds)
+        'message': 'Razas filtradas correctamente',
+        'data': rewrite_breeds(breeds),
+        'count': len(breeds),
+        'filters_applied': {
+            'energy_level': energy_level,
+            'intelligence': intelligence,
+            'temperament': temperament,
+            **applied_ranges(ranges),
+            'sort_by': sort_by
+        }
     }), 200
 
+@cat_bp.route('/api/cats/breeds/batch', methods=['GET', 'POST'])
+def get_breeds_batch():
+    """
+    Obtiene varias razas de gatos en una sola petición.
+    
+    Los IDs se indican con el parámetro ids (separados por comas) o en un
+    cuerpo JSON {"ids": [...]} con POST, hasta 100 por petición.
+    
+    Respuesta (200):
+        {
+            "success": true,
+            "data": [...],              # Razas encontradas, en el orden pedido
+            "count": 2,
+            "errors": {"xyz": "not_found"}  # 'not_found' o 'unavailable' por ID
+        }
+    """
+    try:
+        breed_ids = parse_batch_ids()
+    except ValueError as e:
+        return invalid_params(e)
+    
+    breeds, errors = CatService.get_breeds_by_ids(breed_ids)
+    return jsonify(batch_body(
+        breeds, errors, breed_ids,
+        'Razas de gatos obtenidas correctamente'
+    )), 200
+
 @cat_bp.route('/api/cats/breeds/<string:breed_id>', methods=['GET'])
+@catalog_etag(CatService.get_catalog_version, ())
 def get_breed(breed_id):
     """
     Obtiene una raza de gato específica por su ID
@@ -32,5 +156,5 @@ def get_breed(breed_id):
     return jsonify({
         'success': True,
         'message': 'Raza obtenida correctamente',
-        'data': breed
+        'data': rewrite_breed(breed)
     }), 200
@@ -1,35 +1,77 @@
 from flask import Blueprint, jsonify, request
 from app.services.dog_service import DogService
+from app.services.image_proxy import rewrite_breed, rewrite_breeds
+from app.routes.caching import catalog_etag, cached_body
+from app.routes.listing import (
+    parse_list_params, paginate, list_body, wants_field, invalid_params, parse_batch_ids, batch_body,
+    parse_ranges, applied_ranges, range_params, LIST_PARAMS
+)
 
 dog_bp = Blueprint('dog', __name__)
 
+# Columnas con filtros numéricos min_<columna> / max_<columna> en /breeds/filter
+RANGE_COLUMNS = ('weight', 'height', 'life_span')
+
+# Parámetros de consulta que distinguen las respuestas de /breeds/filter
+FILTER_PARAMS = (
+    ('size', 'energy_level', 'intelligence', 'breed_group', 'temperament', 'sort_by')
+    + range_params(RANGE_COLUMNS)
+)
+
 @dog_bp.route('/api/dogs/breeds', methods=['GET'])
+@catalog_etag(DogService.get_catalog_version, LIST_PARAMS)
+@cached_body(DogService.get_catalog_version, LIST_PARAMS)
 def get_all_breeds():
     """
     Obtiene todas las razas de perros
+    
+    Parámetros de consulta:
+    - limit: Número de razas por página (1-100); sin él se devuelven todas
+    - cursor: Valor de next_cursor de la página anterior
+    - fields: Campos a incluir separados por comas (e.g., 'id,name,image_url')
     """
+    try:
+        params = parse_list_params()
+    except ValueError as e:
+        return invalid_params(e)
+    
     breeds = DogService.get_all_breeds()
-    return jsonify({
-        'success': True,
-        'message': 'Razas de perros obtenidas correctamente',
-        'data': breeds,
-        'count': len(breeds)
-    }), 200
+    page, next_cursor = paginate(breeds, params)
+    return jsonify(list_body(
+        page, len(breeds), next_cursor, params,
+        'Razas de perros obtenidas correctamente'
+    )), 200
 
 @dog_bp.route('/api/dogs/breeds-with-images', methods=['GET'])
 def get_all_breeds_with_images():
     """
     Obtiene todas las razas de perros con sus imágenes
+    
+    Admite los mismos parámetros limit, cursor y fields que /api/dogs/breeds.
+    Las imágenes solo se resuelven para la página solicitada, y no se
+    resuelven si fields no incluye image_url.
+    
+    La respuesta no lleva ETag ni se guarda en la caché de respuestas:
+    depende de las imágenes resueltas en cada petición, que pueden faltar si
+    la API falla, y no solo del catálogo.
     """
-    breeds = DogService.get_all_breeds_with_images()
-    return jsonify({
-        'success': True,
-        'message': 'Razas de perros con imágenes obtenidas correctamente',
-        'data': breeds,
-        'count': len(breeds)
-    }), 200
+    try:
+        params = parse_list_params()
+    except ValueError as e:
+        return invalid_params(e)
+    
+    breeds = DogService.get_all_breeds()
+    page, next_cursor = paginate(breeds, params)
+    if wants_field(params, 'image_url'):
+        page = DogService.add_images(page)
+    return jsonify(list_body(
+        page, len(breeds), next_cursor, params,
+        'Razas de perros con imágenes obtenidas correctamente'
+    )), 200
 
 @dog_bp.route('/api/dogs/breeds/filter', methods=['GET'])
+@catalog_etag(DogService.get_catalog_version, FILTER_PARAMS)
+@cached_body(DogService.get_catalog_version, FILTER_PARAMS)
 def filter_breeds():
     """
     Filtra las razas de perros según los criterios especificados.
@@ -40,6 +82,13 @@ def filter_breeds():
     - intelligence: Nivel de inteligencia (1-5)
     - breed_group: Grupo de la raza (e.g., 'Working', 'Sporting', etc.)
     - temperament: Temperamento específico a buscar
+    - min_weight / max_weight: Peso en kg
+    - min_height / max_height: Altura en cm
+    - min_life_span / max_life_span: Esperanza de vida en años
+    - sort_by: 'name', 'weight', 'height' o 'life_span' ('-weight' para orden descendente)
+    
+    Los rangos seleccionan las razas cuyo intervalo se solapa con el pedido
+    (una raza de 20 - 30 kg cumple min_weight=25).
     """
     # Obtener parámetros de la consulta
     size = request.args.get('size')
@@ -47,31 +96,68 @@ def filter_breeds():
     intelligence = request.args.get('intelligence', type=int)
     breed_group = request.args.get('breed_group')
     temperament = request.args.get('temperament')
+    sort_by = request.args.get('sort_by')
     
     # Aplicar filtros
-    breeds = DogService.filter_breeds(
-        size=size,
-        energy_level=energy_level,
-        intelligence=intelligence,
-        breed_group=breed_group,
-        temperament=temperament
-    )
+    try:
+        ranges = parse_ranges(RANGE_COLUMNS)
+        breeds = DogService.filter_breeds(
+            size=size,
+            energy_level=energy_level,
+            intelligence=intelligence,
+            breed_group=breed_group,
+            temperament=temperament,
+            ranges=ranges,
+            sort_by=sort_by
+        )
+    except ValueError as e:
+        return invalid_params(e)
     
     return jsonify({
         'success': True,
         'message': 'Razas filtradas correctamente',
-        'data': breeds,
+        'data': rewrite_breeds(breeds),
         'count': len(breeds),
         'filters_applied': {
             'size': size,
             'energy_level': energy_level,
             'intelligence': intelligence,
             'breed_group': breed_group,
-            'temperament': temperament
+            'temperament': temperament,
+            **applied_ranges(ranges),
+            'sort_by': sort_by
         }
     }), 200
 
+@dog_bp.route('/api/dogs/breeds/batch', methods=['GET', 'POST'])
+def get_breeds_batch():
+    """
+    Obtiene varias razas de perros en una sola petición.
+    
+    Los IDs se indican con el parámetro ids (separados por comas) o en un
+    cuerpo JSON {"ids": [...]} con POST, hasta 100 por petición.
+    
+    Respuesta (200):
+        {
+            "success": true,
+            "data": [...],              # Razas encontradas, en el orden pedido
+            "count": 2,
+            "errors": {"xyz": "not_found"}  # 'not_found' o 'unavailable' por ID
+        }
+    """
+    try:
+        breed_ids = parse_batch_ids()
+    except ValueError as e:
+        return invalid_params(e)
+    
+    breeds, errors = DogService.get_breeds_by_ids(breed_ids)
+    return jsonify(batch_body(
+        breeds, errors, breed_ids,
+        'Razas de perros obtenidas correctamente'
+    )), 200
+
 @dog_bp.route('/api/dogs/breeds/<string:breed_id>', methods=['GET'])
+@catalog_etag(DogService.get_catalog_version, ())
 def get_breed(breed_id):
     """
     Obtiene una raza de perro específica por su ID
@@ -87,7 +173,7 @@ def get_breed(breed_id):
     return jsonify({
         'success': True,
         'message': 'Raza obtenida correctamente',
-        'data': breed
+        'data': rewrite_breed(breed)
     }), 200
 
 @dog_bp.route('/api/dogs/breeds/<string:breed_id>/images', methods=['GET'])
@@ -137,7 +223,7 @@ def get_breed_images(breed_id):
             "data": null
         }
     """
-    # Verificar que la raza existe antes de buscar imágenes
+    # Verificar que la raza existe antes de buscar imágenes (se resuelve en memoria)
     breed = DogService.get_breed_by_id(breed_id)
     if not breed or 'id' not in breed:
         return jsonify({
@@ -151,15 +237,15 @@ def get_breed_images(breed_id):
     if limit < 1 or limit > 10:
         limit = 5  # Limitar a un máximo de 10 imágenes por petición
     
-    # Obtener las imágenes aleatorias de la raza
-    images = DogService.get_random_images_by_breed(breed_id, limit)
+    # Obtener las imágenes aleatorias de la raza (por su ID, aunque se haya buscado por nombre)
+    images = DogService.get_random_images_by_breed(breed['id'], limit)
     
     # Devolver la respuesta con la información de la raza y sus imágenes
     return jsonify({
         'success': True,
         'message': f'Imágenes de la raza {breed["name"]} obtenidas correctamente',
         'data': {
-            'breed': breed,  # Información completa de la raza
+            'breed': rewrite_breed(breed),  # Información completa de la raza
             'images': images  # Lista de imágenes aleatorias
         },
         'count': len(images)  # Número de imágenes obtenidas
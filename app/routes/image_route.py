@@ -0,0 +1,66 @@
+import os
+import requests
+from flask import Blueprint, current_app, jsonify, send_file
+from app.services.dog_service import DogService
+from app.services.cat_service import CatService
+from app.services.image_proxy import get_image_store, valid_image_id
+
+image_bp = Blueprint('image', __name__)
+
+# Extensiones que se aceptan (y se ignoran) al final del ID: /api/images/abc.jpg
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+def _not_found():
+    return jsonify({
+        'success': False,
+        'message': 'Imagen no encontrada',
+        'data': None
+    }), 404
+
+def _max_age() -> int:
+    try:
+        return int(os.getenv('IMAGE_PROXY_MAX_AGE', 86400))
+    except ValueError:
+        return 86400
+
+@image_bp.route('/api/images/<string:image_id>', methods=['GET'])
+def get_image(image_id):
+    """
+    Sirve una imagen de raza desde la caché en disco del proxy.
+
+    Solo se sirven imágenes conocidas (imágenes de referencia del catálogo o
+    con metadatos en caché); la primera petición descarga la imagen de la CDN
+    y las siguientes se sirven desde disco, aunque el catálogo no esté
+    disponible. Admite peticiones parciales
+    (Range) y condicionales (If-None-Match, If-Modified-Since).
+    """
+    base, extension = os.path.splitext(image_id)
+    if extension.lower() in IMAGE_EXTENSIONS:
+        image_id = base
+    if not valid_image_id(image_id):
+        return _not_found()
+
+    # El origen solo se resuelve (con el catálogo) si la imagen no está en disco
+    def source():
+        return DogService.get_image_source(image_id) or CatService.get_image_source(image_id)
+
+    store = get_image_store()
+    # Un segundo intento por si la imagen se expulsó del disco justo antes de enviarla
+    for _ in range(2):
+        try:
+            stored = store.get(image_id, source)
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Error al descargar la imagen {image_id}: {str(e)}")
+            return jsonify({
+                'success': False,
+                'message': 'No se pudo obtener la imagen',
+                'data': None
+            }), 502
+        if stored is None:
+            return _not_found()
+
+        try:
+            return send_file(stored.path, mimetype=stored.mimetype, conditional=True, etag=True, max_age=_max_age())
+        except FileNotFoundError:
+            store.forget(image_id)
+    return _not_found()
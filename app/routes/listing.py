@@ -0,0 +1,224 @@
+import base64
+import json
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from flask import jsonify, request
+
+from app.services.image_proxy import rewrite_breeds
+
+# Tamaño máximo de página para los listados de razas
+MAX_LIMIT = 100
+
+# Máximo de IDs por petición en las consultas por lote
+MAX_BATCH_IDS = 100
+
+# Parámetros de consulta de los listados (ver parse_list_params)
+LIST_PARAMS = ('limit', 'cursor', 'fields')
+
+
+class ListParams(NamedTuple):
+    """Parámetros de paginación y proyección de un listado."""
+    limit: Optional[int]
+    offset: int
+    fields: Optional[List[str]]
+
+    @property
+    def paginated(self) -> bool:
+        return self.limit is not None or self.offset > 0
+
+
+def encode_cursor(offset: int) -> str:
+    """Codifica la posición de la siguiente página como un cursor opaco."""
+    raw = json.dumps({'offset': offset}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        offset = int(json.loads(raw)['offset'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError('Cursor inválido')
+    if offset < 0:
+        raise ValueError('Cursor inválido')
+    return offset
+
+
+def parse_limit(default: Optional[int] = None) -> Optional[int]:
+    """
+    Lee el parámetro limit de la petición actual.
+
+    Returns:
+        Optional[int]: El límite, o `default` si no se indica
+
+    Raises:
+        ValueError: Si limit no es un número entre 1 y 100
+    """
+    limit = request.args.get('limit')
+    if limit is None:
+        return default
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = None
+    if limit is None or limit < 1 or limit > MAX_LIMIT:
+        raise ValueError(f'El parámetro limit debe estar entre 1 y {MAX_LIMIT}')
+    return limit
+
+
+def parse_list_params() -> ListParams:
+    """
+    Lee los parámetros de listado de la petición actual.
+
+    Parámetros de consulta:
+    - limit: Número de elementos por página (1-100); sin él se devuelve el listado completo
+    - cursor: Cursor devuelto como next_cursor en la página anterior
+    - fields: Campos a incluir separados por comas (e.g., 'id,name,image_url')
+
+    Raises:
+        ValueError: Si limit no es un número entre 1 y 100 o el cursor no es válido
+    """
+    limit = parse_limit()
+
+    cursor = request.args.get('cursor')
+    offset = decode_cursor(cursor) if cursor else 0
+
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+    return ListParams(limit=limit, offset=offset, fields=fields)
+
+
+def paginate(items: List[Any], params: ListParams) -> Tuple[List[Any], Optional[str]]:
+    """
+    Recorta el listado a la página solicitada.
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (página, cursor de la siguiente página o None)
+    """
+    if params.limit is None:
+        return items[params.offset:], None
+
+    end = params.offset + params.limit
+    next_cursor = encode_cursor(end) if end < len(items) else None
+    return items[params.offset:end], next_cursor
+
+
+def project(items: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Deja en cada elemento solo los campos solicitados (todos si fields es None)."""
+    if not fields:
+        return items
+    return [{field: item[field] for field in fields if field in item} for item in items]
+
+
+def wants_field(params: ListParams, field: str) -> bool:
+    """Indica si un campo forma parte de la respuesta."""
+    return not params.fields or field in params.fields
+
+
+def list_body(page: List[Dict[str, Any]], total: int, next_cursor: Optional[str],
+              params: ListParams, message: str) -> Dict[str, Any]:
+    """Construye el cuerpo JSON estándar de un listado paginado."""
+    body = {
+        'success': True,
+        'message': message,
+        'data': project(rewrite_breeds(page), params.fields),
+        'count': len(page)
+    }
+    if params.paginated:
+        body['total'] = total
+        body['next_cursor'] = next_cursor
+    return body
+
+
+def parse_ranges(columns: Tuple[str, ...]) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """
+    Lee los filtros numéricos min_<columna> y max_<columna> de la petición actual.
+
+    Los valores que no son números se ignoran, igual que en el resto de filtros.
+
+    Returns:
+        Dict[str, Tuple[Optional[float], Optional[float]]]: (mínimo, máximo) por columna
+
+    Raises:
+        ValueError: Si un valor no es finito (nan, inf) o el mínimo supera al máximo
+    """
+    ranges = {}
+    for column in columns:
+        minimum = request.args.get(f'min_{column}', type=float)
+        maximum = request.args.get(f'max_{column}', type=float)
+        for name, value in ((f'min_{column}', minimum), (f'max_{column}', maximum)):
+            if value is not None and not math.isfinite(value):
+                raise ValueError(f'El parámetro {name} debe ser un número finito')
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValueError(f'El parámetro min_{column} no puede ser mayor que max_{column}')
+        ranges[column] = (minimum, maximum)
+    return ranges
+
+
+def range_params(columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Nombres de los parámetros min_<columna> y max_<columna> que lee parse_ranges."""
+    return tuple(f'{bound}_{column}' for column in columns for bound in ('min', 'max'))
+
+
+def applied_ranges(ranges: Dict[str, Tuple[Optional[float], Optional[float]]]) -> Dict[str, Optional[float]]:
+    """Filtros numéricos en el formato de filters_applied (min_<columna>, max_<columna>)."""
+    applied: Dict[str, Optional[float]] = {}
+    for column, (minimum, maximum) in ranges.items():
+        applied[f'min_{column}'] = minimum
+        applied[f'max_{column}'] = maximum
+    return applied
+
+
+def parse_batch_ids() -> List[str]:
+    """
+    Lee los IDs de una consulta por lote, sin duplicados y en el orden recibido.
+
+    Admite el parámetro de consulta ids (separados por comas) o, en peticiones
+    POST, un cuerpo JSON {"ids": [...]}.
+
+    Raises:
+        ValueError: Si no hay IDs, son demasiados o el cuerpo no es válido
+    """
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        ids = body.get('ids') if isinstance(body, dict) else None
+        if not isinstance(ids, list):
+            raise ValueError('El cuerpo debe ser un JSON con una lista "ids"')
+        ids = [str(breed_id).strip() for breed_id in ids if breed_id is not None]
+    else:
+        ids = [breed_id.strip() for breed_id in request.args.get('ids', '').split(',')]
+
+    ids = list(dict.fromkeys(breed_id for breed_id in ids if breed_id))
+    if not ids or len(ids) > MAX_BATCH_IDS:
+        raise ValueError(f'Debe indicar entre 1 y {MAX_BATCH_IDS} IDs')
+    return ids
+
+
+def batch_body(breeds: Dict[str, Dict[str, Any]], errors: Dict[str, str],
+               ids: List[str], message: str) -> Dict[str, Any]:
+    """Construye el cuerpo JSON de una consulta por lote, con las razas en el orden pedido."""
+    data = rewrite_breeds([breeds[breed_id] for breed_id in ids if breed_id in breeds])
+    return {
+        'success': True,
+        'message': message,
+        'data': data,
+        'count': len(data),
+        'errors': errors
+    }
+
+
+def invalid_params(error: ValueError):
+    """Respuesta 400 para parámetros de listado inválidos."""
+    return jsonify({
+        'success': False,
+        'message': str(error),
+        'data': None
+    }), 400
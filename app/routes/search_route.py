@@ -0,0 +1,59 @@
+from flask import Blueprint, jsonify, request
+from app.services.breed_search import BreedSearch
+from app.services.image_proxy import rewrite_breeds
+from app.routes.caching import catalog_etag
+from app.routes.listing import parse_limit, project, invalid_params
+
+search_bp = Blueprint('search', __name__)
+
+# Resultados por defecto de una búsqueda
+DEFAULT_SEARCH_LIMIT = 10
+
+SPECIES = ('dog', 'cat')
+
+# Parámetros de consulta que distinguen una búsqueda
+SEARCH_PARAMS = ('q', 'species', 'limit', 'fields')
+
+@search_bp.route('/api/breeds/search', methods=['GET'])
+@catalog_etag(BreedSearch.get_catalog_version, SEARCH_PARAMS)
+def search_breeds():
+    """
+    Busca razas de perros y gatos por texto libre, ordenadas por relevancia.
+
+    Parámetros de consulta:
+    - q: Texto a buscar en nombre, temperamento, descripción, origen y función (bred_for)
+    - species: 'dog' o 'cat' para buscar solo en una especie
+    - limit: Número máximo de resultados (1-100, por defecto 10)
+    - fields: Campos a incluir separados por comas (e.g., 'id,name,species,score')
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'message': 'El parámetro q es obligatorio',
+            'data': None
+        }), 400
+
+    species = request.args.get('species')
+    if species and species not in SPECIES:
+        return jsonify({
+            'success': False,
+            'message': "El parámetro species debe ser 'dog' o 'cat'",
+            'data': None
+        }), 400
+
+    try:
+        limit = parse_limit(DEFAULT_SEARCH_LIMIT)
+    except ValueError as e:
+        return invalid_params(e)
+
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+    results = BreedSearch.search(query, limit, species)
+    return jsonify({
+        'success': True,
+        'message': 'Búsqueda de razas realizada correctamente',
+        'data': project(rewrite_breeds(results), fields),
+        'count': len(results)
+    }), 200
@@ -1,21 +1,90 @@
-from flask import Blueprint, jsonify
-from app.controllers.user_controller import get_users
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from app.controllers.user_controller import get_users, stream_users, get_user as get_user_by_id, get_users_by_ids
 
 user_bp = Blueprint('user', __name__)
 
+# Máximo de IDs por petición en /users?ids=
+MAX_IDS = 100
+
 @user_bp.route('/users', methods=['GET'])
 def get_all_users():
-    users, status_code = get_users()
-    return jsonify({
-        'status': 'success',
-        'message': 'Lista de usuarios obtenida correctamente',
+    """
+    Obtiene los usuarios registrados.
+
+    Parámetros de consulta:
+    - limit: Número de usuarios por página (1-500); sin él se devuelven todos
+    - start_after: Valor de next_start_after de la página anterior
+    - fields: Campos a incluir separados por comas (e.g., 'name,email')
+    - format: 'ndjson' para recibir un usuario por línea a medida que se leen
+      (también con la cabecera Accept: application/x-ndjson)
+    - ids: IDs separados por comas para obtener varios usuarios concretos
+      (máximo 100; se sirven desde la caché de usuarios)
+    """
+    ids = request.args.get('ids')
+    if ids is not None:
+        user_ids = [user_id.strip() for user_id in ids.split(',') if user_id.strip()]
+        if not user_ids or len(user_ids) > MAX_IDS:
+            return jsonify({
+                'status': 'error',
+                'message': f'Debe indicar entre 1 y {MAX_IDS} IDs',
+                'data': []
+            }), 400
+        users, missing, status_code = get_users_by_ids(user_ids)
+        return jsonify({
+            'status': 'success' if status_code == 200 else 'error',
+            'message': 'Usuarios obtenidos correctamente' if status_code == 200 else 'No se pudieron obtener los usuarios',
+            'data': users,
+            'missing': missing
+        }), status_code
+
+    limit = request.args.get('limit', type=int)
+    start_after = request.args.get('start_after')
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+
+    wants_ndjson = (request.args.get('format') == 'ndjson' or
+                    request.accept_mimetypes.best == 'application/x-ndjson')
+    if wants_ndjson:
+        try:
+            lines = stream_users(fields=fields, limit=limit, start_after=start_after)
+        except Exception as e:
+            current_app.logger.error(f"Error al obtener usuarios: {str(e)}")
+            return jsonify({
+                'status': 'error',
+                'message': 'No se pudieron obtener los usuarios',
+                'data': []
+            }), 500
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+    users, next_cursor, status_code = get_users(limit=limit, start_after=start_after, fields=fields)
+    body = {
+        'status': 'success' if status_code == 200 else 'error',
+        'message': 'Lista de usuarios obtenida correctamente' if status_code == 200 else 'No se pudieron obtener los usuarios',
         'data': users
-    }), status_code
+    }
+    if limit is not None:
+        body['count'] = len(users)
+        body['next_start_after'] = next_cursor
+    return jsonify(body), status_code
 
 @user_bp.route('/users/<user_id>', methods=['GET'])
 def get_user(user_id):
+    user, status_code = get_user_by_id(user_id)
+    if status_code == 404:
+        return jsonify({
+            'status': 'error',
+            'message': 'Usuario no encontrado',
+            'data': None
+        }), 404
+    if status_code != 200:
+        return jsonify({
+            'status': 'error',
+            'message': 'No se pudo obtener el usuario',
+            'data': None
+        }), status_code
+
     return jsonify({
         'status': 'success',
         'message': f'Detalles del usuario {user_id}',
-        'data': {'id': user_id}
-    })
+        'data': user
+    }), 200
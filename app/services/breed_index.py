@@ -0,0 +1,251 @@
+import re
+import math
+from array import array
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Columnas numéricas: factor para pasar el valor imperial a unidades métricas
+# (kg, cm); None para los campos que son un texto simple ('10 - 12 years')
+NUMERIC_COLUMNS = {
+    'weight': 0.453592,
+    'height': 2.54,
+    'life_span': None
+}
+
+# Criterios de ordenación admitidos por filter(sort_by=...), con '-' delante para orden descendente
+SORT_KEYS = ('name',) + tuple(NUMERIC_COLUMNS)
+
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_range(text: Any) -> Tuple[float, float]:
+    """
+    Extrae el intervalo numérico de un texto como '3 - 6' o '10 - 12 years'.
+
+    Returns:
+        Tuple[float, float]: (mínimo, máximo); (nan, nan) si el texto no contiene números
+    """
+    numbers = [float(number) for number in _NUMBER.findall(str(text or ''))]
+    if not numbers:
+        return math.nan, math.nan
+    return min(numbers), max(numbers)
+
+
+def measure_range(value: Any, imperial_factor: Optional[float]) -> Tuple[float, float]:
+    """
+    Intervalo de una medida de la API ({'imperial': ..., 'metric': ...}) en unidades métricas.
+
+    Se usa el valor métrico y, si no tiene números, el imperial convertido.
+    """
+    if not isinstance(value, dict):
+        return parse_range(value)
+    low, high = parse_range(value.get('metric'))
+    if math.isnan(low) and imperial_factor is not None:
+        low, high = parse_range(value.get('imperial'))
+        low, high = low * imperial_factor, high * imperial_factor
+    return low, high
+
+
+class NumericColumns:
+    """
+    Columnas numéricas (mínimo y máximo) de peso, altura y esperanza de vida.
+
+    Los textos del catálogo se interpretan una sola vez por versión y se
+    guardan en arrays compactos de dobles, alineados con las posiciones del
+    catálogo; los valores desconocidos son NaN y no cumplen ningún rango.
+    """
+
+    def __init__(self, breeds: List[Dict[str, Any]]):
+        self.low: Dict[str, array] = {}
+        self.high: Dict[str, array] = {}
+        for name, factor in NUMERIC_COLUMNS.items():
+            low, high = array('d'), array('d')
+            for breed in breeds:
+                breed_low, breed_high = measure_range(breed.get(name), factor)
+                low.append(breed_low)
+                high.append(breed_high)
+            self.low[name], self.high[name] = low, high
+
+    def overlapping(self, column: str, minimum: Optional[float], maximum: Optional[float]) -> Set[int]:
+        """
+        Posiciones cuyo intervalo se solapa con [minimum, maximum].
+
+        Una raza de 20 - 30 kg cumple min_weight=25 porque puede llegar a pesarlos.
+        """
+        minimum = -math.inf if minimum is None else minimum
+        maximum = math.inf if maximum is None else maximum
+        return {
+            position
+            for position, (low, high) in enumerate(zip(self.low[column], self.high[column]))
+            if high >= minimum and low <= maximum
+        }
+
+    def sort_key(self, column: str, descending: bool) -> Callable[[int], Tuple[bool, float]]:
+        """Clave de ordenación por el punto medio del intervalo; los valores desconocidos van al final."""
+        low, high = self.low[column], self.high[column]
+
+        def key(position: int) -> Tuple[bool, float]:
+            middle = (low[position] + high[position]) / 2
+            if math.isnan(middle):
+                return True, 0.0
+            return False, -middle if descending else middle
+        return key
+
+
+class BreedIndex:
+    """
+    Índice multiatributo sobre un catálogo de razas.
+
+    Se construye una vez por versión del catálogo y guarda, para cada valor de
+    atributo, la lista de posiciones de las razas que lo tienen (posting list).
+    Los filtros se resuelven como intersecciones de conjuntos en lugar de
+    recorrer el catálogo completo en cada petición.
+    """
+
+    def __init__(self, breeds: List[Dict[str, Any]],
+                 size_category: Optional[Callable[[Dict[str, str]], str]] = None):
+        """
+        Args:
+            breeds (List[Dict[str, Any]]): Catálogo de razas ya formateado
+            size_category (Callable): Función que clasifica el peso en 'small', 'medium' o 'large';
+                sin ella no se indexa el tamaño
+        """
+        self.breeds = breeds
+        self.size: Dict[str, Set[int]] = defaultdict(set)
+        self.energy_level: Dict[Any, Set[int]] = defaultdict(set)
+        self.intelligence: Dict[Any, Set[int]] = defaultdict(set)
+        self.breed_group: Dict[str, Set[int]] = defaultdict(set)
+        self.temperament: Dict[str, Set[int]] = defaultdict(set)
+        # Temperamento completo en minúsculas, para las consultas que no caben en un término
+        self.temperament_text: List[str] = [(breed.get('temperament') or '').lower() for breed in breeds]
+        self.columns = NumericColumns(breeds)
+
+        for position, breed in enumerate(breeds):
+            if size_category is not None:
+                self.size[size_category(breed.get('weight') or {})].add(position)
+            self.energy_level[breed.get('energy_level', 0)].add(position)
+            self.intelligence[breed.get('intelligence', 0)].add(position)
+            self.breed_group[(breed.get('breed_group') or '').lower()].add(position)
+            for term in self.tokenize(breed.get('temperament') or ''):
+                self.temperament[term].add(position)
+
+    @staticmethod
+    def tokenize(temperament: str) -> List[str]:
+        """Divide un temperamento ('Loyal, Friendly, Alert') en términos en minúsculas."""
+        return [term.strip() for term in temperament.lower().split(',') if term.strip()]
+
+    def match_temperament(self, temperament: str) -> Set[int]:
+        """
+        Posiciones de las razas cuyo temperamento contiene el texto buscado.
+
+        Es la misma comparación por subcadena (sin distinguir mayúsculas)
+        contra el temperamento completo que hacía el filtro original. Una
+        consulta sin comas ni espacios en los extremos solo puede caer dentro
+        de un término, así que se compara contra el vocabulario del índice
+        (decenas de términos, no cientos de razas); el resto se compara contra
+        el temperamento completo de cada raza.
+        """
+        query = temperament.lower()
+        if query and ',' not in query and query == query.strip():
+            result: Set[int] = set()
+            for term, positions in self.temperament.items():
+                if query in term:
+                    result |= positions
+            return result
+        return {position for position, text in enumerate(self.temperament_text) if query in text}
+
+    def filter(self,
+               size: str = None,
+               energy_level: int = None,
+               intelligence: int = None,
+               breed_group: str = None,
+               temperament: str = None,
+               ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+               sort_by: str = None) -> List[Dict[str, Any]]:
+        """
+        Devuelve las razas que cumplen todos los criterios indicados.
+
+        Args:
+            ranges (Dict[str, Tuple]): (mínimo, máximo) por columna de NUMERIC_COLUMNS;
+                None en un extremo lo deja abierto
+            sort_by (str): Uno de SORT_KEYS, con '-' delante para orden descendente;
+                sin él se respeta el orden del catálogo
+
+        Raises:
+            ValueError: Si sort_by o alguna columna de ranges no son válidos
+        """
+        postings: List[Set[int]] = []
+
+        if size:
+            postings.append(self.size.get(size.lower(), set()))
+        if energy_level is not None:
+            postings.append(self.energy_level.get(energy_level, set()))
+        if intelligence is not None:
+            postings.append(self.intelligence.get(intelligence, set()))
+        if breed_group:
+            postings.append(self.breed_group.get(breed_group.lower(), set()))
+        if temperament:
+            postings.append(self.match_temperament(temperament))
+        for column, (minimum, maximum) in (ranges or {}).items():
+            if column not in NUMERIC_COLUMNS:
+                raise ValueError(f"Columna numérica desconocida: {column}")
+            if minimum is not None or maximum is not None:
+                postings.append(self.columns.overlapping(column, minimum, maximum))
+
+        if postings:
+            # Intersecar empezando por el conjunto más pequeño
+            postings.sort(key=len)
+            positions: Iterable[int] = set(postings[0])
+            for posting in postings[1:]:
+                positions &= posting
+                if not positions:
+                    return []
+        else:
+            positions = range(len(self.breeds))
+
+        return [self.breeds[position] for position in self._order(positions, sort_by)]
+
+    def _order(self, positions: Iterable[int], sort_by: Optional[str]) -> List[int]:
+        """Ordena las posiciones según sort_by (orden del catálogo si no se indica)."""
+        if not sort_by:
+            return sorted(positions)
+
+        descending = sort_by.startswith('-')
+        column = sort_by.lstrip('-')
+        if column not in SORT_KEYS:
+            raise ValueError(f"sort_by debe ser uno de: {', '.join(SORT_KEYS)} (con '-' para orden descendente)")
+
+        if column == 'name':
+            return sorted(positions, key=lambda position: str(self.breeds[position].get('name') or '').casefold(),
+                          reverse=descending)
+        key = self.columns.sort_key(column, descending)
+        return sorted(positions, key=lambda position: (key(position), position))
+
+
+def build_lookup(breeds: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Construye un índice hash de razas por ID y por nombre (sin distinguir mayúsculas).
+
+    Los IDs tienen prioridad sobre los nombres si ambos coinciden.
+
+    Args:
+        breeds (List[Dict[str, Any]]): Catálogo de razas ya formateado
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Razas indexadas por lookup_key(id) y lookup_key(nombre)
+    """
+    lookup: Dict[str, Dict[str, Any]] = {}
+    for breed in breeds:
+        name = lookup_key(breed.get('name'))
+        if name:
+            lookup.setdefault(name, breed)
+    for breed in breeds:
+        breed_id = lookup_key(breed.get('id'))
+        if breed_id:
+            lookup[breed_id] = breed
+    return lookup
+
+
+def lookup_key(value: Any) -> str:
+    """Normaliza un ID o nombre de raza para buscarlo en el índice de build_lookup."""
+    return str(value).strip().casefold() if value not in (None, '') else ''
@@ -0,0 +1,262 @@
+import re
+import math
+import heapq
+import bisect
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.dog_service import DogService
+from app.services.cat_service import CatService
+
+# Campos indexados y su peso en la puntuación (una coincidencia en el nombre vale más que en la descripción)
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'temperament': 1.5,
+    'bred_for': 1.2,
+    'origin': 1.0,
+    'description': 0.6
+}
+
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+
+# Factor aplicado a los términos que coinciden por prefijo o con una errata
+PREFIX_FACTOR = 0.7
+TYPO_FACTOR = 0.5
+
+# Longitud mínima del término buscado para admitir prefijos y erratas
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+
+# Términos del vocabulario que puede abarcar un prefijo como máximo
+MAX_PREFIX_EXPANSIONS = 30
+
+# Palabras vacías de las descripciones (en inglés, como las APIs de origen)
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is',
+    'it', 'its', 'of', 'on', 'or', 'that', 'the', 'their', 'they', 'this', 'to', 'was', 'were',
+    'with'
+))
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: Any) -> List[str]:
+    """Divide un texto en términos en minúsculas y sin acentos, descartando palabras vacías."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).casefold())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [token for token in _TOKEN.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def _deletes(term: str) -> Set[str]:
+    """Variantes del término con una letra menos (más el propio término)."""
+    return {term} | {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Indica si dos términos están a una edición como máximo (inserción, borrado, sustitución o transposición)."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return (len(diff) == 2 and diff[1] == diff[0] + 1 and
+                a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """
+    Índice invertido con ranking BM25 sobre razas de perros y gatos.
+
+    Todo el trabajo caro se hace al construirlo: para cada término se guarda
+    la lista de documentos que lo contienen con su puntuación BM25 ya
+    calculada (los campos se ponderan según FIELD_WEIGHTS). Responder una
+    consulta consiste en expandir cada término buscado (exacto, por prefijo
+    sobre el vocabulario ordenado y con una errata mediante un diccionario de
+    borrados) y sumar puntuaciones.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[str, Dict[str, Any]]]):
+        """
+        Args:
+            documents (Iterable[Tuple[str, Dict[str, Any]]]): Pares (especie, raza formateada)
+        """
+        self.documents: List[Tuple[str, Dict[str, Any]]] = list(documents)
+
+        frequencies: List[Dict[str, float]] = []
+        lengths: List[float] = []
+        for _, breed in self.documents:
+            weighted: Dict[str, float] = defaultdict(float)
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for token in tokenize(breed.get(field)):
+                    weighted[token] += weight
+                    length += weight
+            frequencies.append(weighted)
+            lengths.append(length)
+
+        total = len(self.documents)
+        average = (sum(lengths) / total) if total else 0.0
+        document_frequency: Dict[str, int] = defaultdict(int)
+        for weighted in frequencies:
+            for term in weighted:
+                document_frequency[term] += 1
+
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for position, weighted in enumerate(frequencies):
+            norm = K1 * (1 - B + B * lengths[position] / average) if average else K1
+            for term, frequency in weighted.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                self.postings[term].append((position, idf * frequency * (K1 + 1) / (frequency + norm)))
+        self.postings = dict(self.postings)
+
+        self.vocabulary: List[str] = sorted(self.postings)
+        self.deletes: Dict[str, List[str]] = defaultdict(list)
+        for term in self.vocabulary:
+            if len(term) >= MIN_TYPO_LENGTH - 1:
+                for variant in _deletes(term):
+                    self.deletes[variant].append(term)
+        self.deletes = dict(self.deletes)
+
+    def expand(self, token: str) -> Dict[str, float]:
+        """
+        Términos del vocabulario que corresponden a un término buscado.
+
+        Returns:
+            Dict[str, float]: Factor de cada término (1 exacto, PREFIX_FACTOR o TYPO_FACTOR)
+        """
+        matches: Dict[str, float] = {}
+        if token in self.postings:
+            matches[token] = 1.0
+
+        if len(token) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]:
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_FACTOR)
+
+        if len(token) >= MIN_TYPO_LENGTH:
+            for variant in _deletes(token):
+                for term in self.deletes.get(variant, ()):
+                    if term not in matches and _within_one_edit(token, term):
+                        matches[term] = TYPO_FACTOR
+        return matches
+
+    def search(self, query: str, limit: int = 10, species: Optional[str] = None) -> List[Tuple[float, str, Dict[str, Any]]]:
+        """
+        Busca razas por texto libre.
+
+        Cada término de la consulta aporta la mejor puntuación de sus
+        expansiones, de modo que un prefijo que abarca varios términos no
+        cuenta varias veces en la misma raza.
+
+        Args:
+            query (str): Texto de búsqueda
+            limit (int): Número máximo de resultados
+            species (str): 'dog' o 'cat' para limitar la búsqueda a una especie
+
+        Returns:
+            List[Tuple[float, str, Dict[str, Any]]]: (puntuación, especie, raza) de mayor a menor puntuación
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for token in dict.fromkeys(tokenize(query)):
+            best: Dict[int, float] = {}
+            for term, factor in self.expand(token).items():
+                for position, score in self.postings[term]:
+                    score *= factor
+                    if score > best.get(position, 0.0):
+                        best[position] = score
+            for position, score in best.items():
+                scores[position] += score
+
+        if species:
+            scores = {position: score for position, score in scores.items()
+                      if self.documents[position][0] == species}
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(score, *self.documents[position]) for position, score in top]
+
+
+class BreedSearch:
+    """Búsqueda de texto libre sobre los catálogos de perros y gatos en caché."""
+
+    # (huellas de los catálogos, índice) de la última construcción
+    _index: Optional[Tuple[Tuple[str, str], SearchIndex]] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_catalog_version(cls) -> Optional[str]:
+        """
+        Huella combinada de ambos catálogos, sin cargarlos.
+
+        Returns:
+            Optional[str]: Huella, o None si alguno de los catálogos aún no se ha cargado
+        """
+        dogs, cats = DogService.get_catalog_version(), CatService.get_catalog_version()
+        if not dogs or not cats:
+            return None
+        return f"{dogs}.{cats}"
+
+    @classmethod
+    def get_index(cls) -> SearchIndex:
+        """
+        Devuelve el índice de la versión actual de los catálogos.
+
+        El índice se reconstruye solo cuando cambia alguno de los catálogos;
+        si alguno no está disponible se indexa lo que haya, sin guardarlo.
+        """
+        versions = (DogService.get_catalog_version(), CatService.get_catalog_version())
+        current = cls._index
+        if current is not None and current[0] == versions:
+            return current[1]
+
+        with cls._lock:
+            versions = (DogService.get_catalog_version(), CatService.get_catalog_version())
+            current = cls._index
+            if current is not None and current[0] == versions:
+                return current[1]
+
+            dogs = DogService.get_all_breeds()
+            cats = CatService.get_all_breeds()
+            index = SearchIndex([('dog', breed) for breed in dogs] + [('cat', breed) for breed in cats])
+
+            # Solo se reutiliza si ningún catálogo cambió mientras se construía
+            built = (DogService.get_catalog_version(), CatService.get_catalog_version())
+            if None not in built and (built == versions or None in versions):
+                cls._index = (built, index)
+            return index
+
+    @classmethod
+    def search(cls, query: str, limit: int = 10, species: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Busca razas de perros y gatos por nombre, temperamento, descripción, origen y función.
+
+        Args:
+            query (str): Texto de búsqueda; admite prefijos ('lab') y una errata por término ('labrdor')
+            limit (int): Número máximo de resultados
+            species (str): 'dog' o 'cat' para buscar solo en una especie
+
+        Returns:
+            List[Dict[str, Any]]: Copias de las razas con 'species' y 'score', de mayor a menor relevancia
+        """
+        results = cls.get_index().search(query, limit, species)
+        return [
+            {**breed, 'species': kind, 'score': round(score, 4)}
+            for score, kind, breed in results
+        ]
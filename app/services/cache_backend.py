@@ -0,0 +1,652 @@
+import os
+import time
+import uuid
+import socket
+import struct
+import fcntl
+import hashlib
+import tempfile
+import threading
+import logging
+import mmap
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+from urllib.parse import unquote, urlsplit
+
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.cache_backend')
+
+# Segundos que se guarda por defecto un valor inexistente (404) en la caché compartida
+NEGATIVE_TTL = 300
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class CacheBackendError(Exception):
+    """Error de comunicación con el almacén de la caché (p. ej. Redis no responde)."""
+
+
+class MemoryBackend:
+    """
+    Almacén en memoria del proceso.
+
+    No se comparte entre instancias: es el almacén por defecto y mantiene el
+    comportamiento de una sola instancia. Los bloqueos por clave coordinan
+    los hilos del proceso.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._locks: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._values[key]
+                return None
+            return entry[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl)
+            # Se purgan las expiradas de vez en cuando para que el diccionario no crezca sin límite
+            if len(self._values) % 256 == 0:
+                now = time.monotonic()
+                for expired in [k for k, (_, expires_at) in self._values.items() if expires_at <= now]:
+                    del self._values[expired]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            current = self._locks.get(key)
+            if current is not None and current[1] > now:
+                return None
+            self._locks[key] = (token, now + ttl)
+        return token
+
+    def release_lock(self, key: str, token: str) -> None:
+        with self._lock:
+            current = self._locks.get(key)
+            if current is not None and current[0] == token:
+                del self._locks[key]
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': 'memory', 'keys': len(self._values)}
+
+
+class FileBackend:
+    """
+    Almacén compartido por los procesos de una misma máquina, en archivos.
+
+    Cada clave es un archivo en CACHE_BACKEND_DIR (nombre derivado de la
+    clave) con la caducidad en la cabecera seguida del valor; se escribe de
+    forma atómica (archivo temporal + rename) y se lee mapeándolo en memoria,
+    de modo que varias instancias de waitress en el mismo host comparten los
+    valores sin servidor adicional. Los bloqueos por clave son flock()
+    exclusivos sobre un archivo .lock por clave: tomarlos es atómico y el
+    sistema los libera si el proceso que los tomó muere, así que no hay
+    bloqueos huérfanos que limpiar (ni caducan por ttl). Los archivos .lock
+    no se borran nunca: borrarlos permitiría que dos procesos bloquearan
+    archivos distintos para la misma clave.
+
+    Un archivo caducado se borra al leerlo; los que nadie vuelve a leer los
+    borra una limpieza en segundo plano que se lanza desde set() como mucho
+    cada CACHE_BACKEND_SWEEP_INTERVAL segundos.
+    """
+
+    shared = True
+
+    # Caducidad (epoch, float de 8 bytes) al principio de cada archivo
+    _HEADER = struct.Struct('>d')
+
+    DEFAULT_SWEEP_INTERVAL = 300
+
+    def __init__(self, directory: Optional[str] = None, sweep_interval: Optional[float] = None):
+        """
+        Args:
+            directory (str): Directorio de los archivos (CACHE_BACKEND_DIR)
+            sweep_interval (float): Segundos entre limpiezas de archivos caducados (CACHE_BACKEND_SWEEP_INTERVAL)
+        """
+        self.directory = directory or os.getenv('CACHE_BACKEND_DIR') or DEFAULT_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.sweep_interval = (sweep_interval if sweep_interval is not None
+                               else _env_float('CACHE_BACKEND_SWEEP_INTERVAL', self.DEFAULT_SWEEP_INTERVAL))
+        self._next_sweep = time.monotonic() + self.sweep_interval
+        self._sweep_lock = threading.Lock()
+        self._swept = 0
+        # Descriptores de los bloqueos tomados por este proceso, por token
+        self._held: Dict[str, int] = {}
+        self._held_lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str = '.bin') -> str:
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self._HEADER.size:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    (expires_at,) = self._HEADER.unpack_from(mapped)
+                    if expires_at <= time.time():
+                        expired = True
+                    else:
+                        return mapped[self._HEADER.size:]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            raise CacheBackendError(str(e)) from e
+
+        if expired:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        return None
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp.', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(self._HEADER.pack(time.time() + ttl))
+                    f.write(value)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            raise CacheBackendError(str(e)) from e
+        self._maybe_sweep()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            raise CacheBackendError(str(e)) from e
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        try:
+            fd = os.open(self._path(key, '.lock'), os.O_CREAT | os.O_RDWR, 0o644)
+        except OSError as e:
+            raise CacheBackendError(str(e)) from e
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        except OSError as e:
+            os.close(fd)
+            raise CacheBackendError(str(e)) from e
+
+        token = uuid.uuid4().hex
+        with self._held_lock:
+            self._held[token] = fd
+        return token
+
+    def release_lock(self, key: str, token: str) -> None:
+        with self._held_lock:
+            fd = self._held.pop(token, None)
+        if fd is None:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except OSError as e:
+            raise CacheBackendError(str(e)) from e
+        finally:
+            os.close(fd)
+
+    def sweep(self) -> int:
+        """
+        Borra los valores caducados y los temporales abandonados por escrituras interrumpidas.
+
+        Returns:
+            int: Número de archivos borrados
+        """
+        now = time.time()
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError as e:
+            logger.warning(f"No se pudo limpiar la caché en {self.directory}: {str(e)}")
+            return 0
+
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.bin'):
+                    with open(path, 'rb') as f:
+                        header = f.read(self._HEADER.size)
+                    if len(header) == self._HEADER.size and self._HEADER.unpack(header)[0] > now:
+                        continue
+                elif not name.startswith('.tmp.') or now - os.stat(path).st_mtime < self.sweep_interval:
+                    continue
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                # Otro proceso lo reescribió o lo borró mientras tanto
+                continue
+
+        with self._sweep_lock:
+            self._swept += removed
+        return removed
+
+    def _maybe_sweep(self) -> None:
+        """Lanza sweep() en un hilo de fondo si toca (nunca dos a la vez en el proceso)."""
+        if self.sweep_interval <= 0 or time.monotonic() < self._next_sweep:
+            return
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + self.sweep_interval
+        threading.Thread(target=self.sweep, name='cache-backend-sweep', daemon=True).start()
+
+    def describe(self) -> Dict[str, Any]:
+        try:
+            keys = sum(1 for name in os.listdir(self.directory) if name.endswith('.bin'))
+        except OSError:
+            keys = None
+        with self._sweep_lock:
+            swept = self._swept
+        return {'backend': 'file', 'directory': self.directory, 'keys': keys, 'swept': swept}
+
+
+class RedisBackend:
+    """
+    Almacén compartido por todas las instancias, en un servidor con protocolo Redis (RESP).
+
+    Habla el protocolo directamente sobre sockets (GET, MGET, SET ... PX,
+    SET ... NX PX y DEL), así que sirve con Redis, Valkey, KeyDB o un
+    sustituto local como bench.fake_redis. Las conexiones se reutilizan
+    entre peticiones. Los bloqueos por clave usan SET NX PX con un token y
+    se liberan solo si el token sigue siendo el propio.
+    """
+
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            url (str): redis://[:contraseña@]host[:puerto][/db] (CACHE_REDIS_URL)
+            timeout (float): Timeout de conexión y lectura en segundos (CACHE_REDIS_TIMEOUT)
+        """
+        self.url = url or os.getenv('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/0')
+        parts = urlsplit(self.url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip('/') or 0)
+        self.timeout = timeout if timeout is not None else _env_float('CACHE_REDIS_TIMEOUT', 0.5)
+        self._idle: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command(b'GET', key)
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return self._command(b'MGET', *keys)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._command(b'SET', key, value, b'PX', max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._command(b'DEL', key)
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        reply = self._command(b'SET', f"lock:{key}", token, b'NX', b'PX', max(1, int(ttl * 1000)))
+        return token if reply == b'OK' else None
+
+    def release_lock(self, key: str, token: str) -> None:
+        # GET + DEL en lugar de un script: si el bloqueo caduca justo entre ambos,
+        # en el peor caso otro nodo repite una carga
+        if self._command(b'GET', f"lock:{key}") == token.encode():
+            self._command(b'DEL', f"lock:{key}")
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = len(self._idle)
+        return {'backend': 'redis', 'host': self.host, 'port': self.port, 'db': self.db, 'idle_connections': idle}
+
+    def _connect(self) -> tuple:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile('rb'))
+        if self.password:
+            self._execute(connection, (b'AUTH', self.password))
+        if self.db:
+            self._execute(connection, (b'SELECT', self.db))
+        return connection
+
+    def _command(self, *args: Any) -> Any:
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = self._execute(connection, args)
+        except CacheBackendError:
+            if connection is not None:
+                connection[0].close()
+            raise
+        except OSError as e:
+            if connection is not None:
+                connection[0].close()
+            raise CacheBackendError(str(e)) from e
+
+        with self._lock:
+            self._idle.append(connection)
+        return reply
+
+    @staticmethod
+    def _encode(arg: Any) -> bytes:
+        if isinstance(arg, bytes):
+            return arg
+        return str(arg).encode()
+
+    def _execute(self, connection: tuple, args: Sequence[Any]) -> Any:
+        parts = [self._encode(arg) for arg in args]
+        payload = [b'*%d\r\n' % len(parts)]
+        for part in parts:
+            payload.append(b'$%d\r\n%s\r\n' % (len(part), part))
+        connection[0].sendall(b''.join(payload))
+        return self._read_reply(connection[1])
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise CacheBackendError('Conexión cerrada por el servidor')
+        kind, data = line[:1], line[1:-2]
+        if kind == b'+':
+            return data
+        if kind == b'-':
+            raise CacheBackendError(data.decode(errors='replace'))
+        if kind == b':':
+            return int(data)
+        if kind == b'$':
+            length = int(data)
+            if length < 0:
+                return None
+            value = reader.read(length + 2)
+            if len(value) != length + 2:
+                raise CacheBackendError('Conexión cerrada por el servidor')
+            return value[:-2]
+        if kind == b'*':
+            length = int(data)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise CacheBackendError(f"Respuesta desconocida: {line!r}")
+
+
+Backend = Union[MemoryBackend, FileBackend, RedisBackend]
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'file': FileBackend,
+    'redis': RedisBackend
+}
+
+
+class Entry(NamedTuple):
+    """Valor de la caché compartida, momento (epoch) en que se guardó y si lo cargó este proceso."""
+    value: Any
+    stored_at: float
+    loaded: bool = False
+
+
+class SharedCache:
+    """
+    Caché de valores serializados con msgpack sobre un almacén intercambiable.
+
+    Con un almacén compartido (file, redis) los catálogos, las razas y los
+    metadatos de imagen que carga una instancia los reutilizan las demás, de
+    modo que la API externa recibe una sola petición por valor y no una por
+    instancia. get_or_load() toma un bloqueo por clave antes de cargar: el
+    resto de instancias (y de hilos) espera a que el valor aparezca en lugar
+    de repetir la carga. Los errores del almacén nunca llegan al solicitante:
+    se registran y el valor se carga directamente.
+    """
+
+    def __init__(self, backend: Backend, prefix: Optional[str] = None,
+                 lock_ttl: Optional[float] = None, lock_wait: Optional[float] = None,
+                 request_lock_wait: Optional[float] = None):
+        """
+        Args:
+            backend: Almacén (MemoryBackend, FileBackend o RedisBackend)
+            prefix (str): Prefijo de todas las claves (CACHE_KEY_PREFIX)
+            lock_ttl (float): Segundos tras los que caduca un bloqueo de carga (CACHE_LOCK_TTL)
+            lock_wait (float): Segundos que se espera a la carga de otro nodo antes de cargar,
+                en las cargas de fondo (CACHE_LOCK_WAIT)
+            request_lock_wait (float): Igual, durante una petición (CACHE_REQUEST_LOCK_WAIT)
+        """
+        self.backend = backend
+        self.prefix = prefix if prefix is not None else os.getenv('CACHE_KEY_PREFIX', 'pet:')
+        self.lock_ttl = lock_ttl if lock_ttl is not None else _env_float('CACHE_LOCK_TTL', 30)
+        self.lock_wait = lock_wait if lock_wait is not None else _env_float('CACHE_LOCK_WAIT', 10)
+        self.request_lock_wait = (request_lock_wait if request_lock_wait is not None
+                                  else _env_float('CACHE_REQUEST_LOCK_WAIT', 0.25))
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'loads': 0,
+            'lock_waits': 0,
+            'stale_fallbacks': 0,
+            'errors': 0
+        }
+
+    @property
+    def shared(self) -> bool:
+        """Indica si el almacén se comparte con otros procesos."""
+        return self.backend.shared
+
+    def get(self, key: str) -> Optional[Entry]:
+        """
+        Lee un valor.
+
+        Returns:
+            Optional[Entry]: El valor y cuándo se guardó, o None si no está (o el almacén falla)
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[Entry]]:
+        """Lee varios valores en una sola operación; None para los que no están."""
+        if not keys:
+            return []
+        try:
+            raw = self.backend.get_many([self.prefix + key for key in keys])
+        except CacheBackendError as e:
+            self._error('leer', keys[0], e)
+            return [None] * len(keys)
+
+        entries = [self._unpack(key, value) for key, value in zip(keys, raw)]
+        found = sum(1 for entry in entries if entry is not None)
+        with self._lock:
+            self._stats['hits'] += found
+            self._stats['misses'] += len(keys) - found
+        return entries
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Guarda un valor durante ttl segundos (no hace nada si ttl <= 0)."""
+        if ttl <= 0:
+            return
+        payload = msgpack.packb([value, time.time()], use_bin_type=True)
+        try:
+            self.backend.set(self.prefix + key, payload, ttl)
+        except CacheBackendError as e:
+            self._error('guardar', key, e)
+
+    def delete(self, key: str) -> None:
+        try:
+            self.backend.delete(self.prefix + key)
+        except CacheBackendError as e:
+            self._error('borrar', key, e)
+
+    def get_or_load(self,
+                    key: str,
+                    loader: Callable[[], Any],
+                    ttl: Union[float, Callable[[Any], float]],
+                    max_age: Optional[float] = None,
+                    wait: Optional[float] = None) -> Entry:
+        """
+        Devuelve el valor de la caché o lo carga, una sola vez entre todos los nodos.
+
+        Si otro nodo está cargando la misma clave se espera (hasta `wait`) a
+        que la publique; pasado ese plazo se carga igualmente. Por defecto se
+        espera request_lock_wait, pensado para peticiones (y para los hilos
+        de fan_out), y al agotarlo se devuelve el valor guardado aunque
+        supere max_age si lo hay; las cargas de fondo pasan lock_wait.
+
+        Args:
+            key (str): Clave, sin prefijo
+            loader (Callable): Obtiene el valor; sus excepciones se propagan y no se guardan
+            ttl: Segundos de vigencia, o función que los calcula a partir del valor cargado
+            max_age (float): Antigüedad máxima (s) de un valor guardado para reutilizarlo
+            wait (float): Segundos de espera a la carga de otro nodo (request_lock_wait por defecto)
+
+        Returns:
+            Entry: El valor y cuándo se guardó
+        """
+        def usable(entry: Optional[Entry]) -> bool:
+            return entry is not None and (max_age is None or time.time() - entry.stored_at < max_age)
+
+        entry = self.get(key)
+        if usable(entry):
+            return entry
+
+        token = self._acquire(key)
+        if token is None:
+            deadline = time.monotonic() + (self.request_lock_wait if wait is None else wait)
+            with self._lock:
+                self._stats['lock_waits'] += 1
+            delay = 0.01
+            while time.monotonic() < deadline:
+                time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+                delay = min(delay * 2, 0.2)
+                entry = self.get(key) or entry
+                if usable(entry):
+                    return entry
+                token = self._acquire(key)
+                if token is not None:
+                    break
+            if token is None and entry is not None and wait is None:
+                # Plazo agotado en una petición: mejor un valor antiguo que repetir la carga del otro nodo
+                with self._lock:
+                    self._stats['stale_fallbacks'] += 1
+                return entry
+
+        try:
+            if token:
+                # Otro nodo pudo publicarlo entre la primera lectura y el bloqueo
+                entry = self.get(key)
+                if usable(entry):
+                    return entry
+            value = loader()
+            with self._lock:
+                self._stats['loads'] += 1
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            return Entry(value, time.time(), loaded=True)
+        finally:
+            if token:
+                self._release(key, token)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        try:
+            described = self.backend.describe()
+        except CacheBackendError:
+            described = {'backend': type(self.backend).__name__}
+        return {**described, 'shared': self.shared, **stats}
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """Toma el bloqueo de carga; si el almacén falla devuelve '' (se carga sin bloqueo)."""
+        try:
+            return self.backend.acquire_lock(self.prefix + key, self.lock_ttl)
+        except CacheBackendError as e:
+            self._error('bloquear', key, e)
+            return ''
+
+    def _release(self, key: str, token: str) -> None:
+        try:
+            self.backend.release_lock(self.prefix + key, token)
+        except CacheBackendError as e:
+            self._error('liberar el bloqueo de', key, e)
+
+    def _unpack(self, key: str, payload: Optional[bytes]) -> Optional[Entry]:
+        if payload is None:
+            return None
+        try:
+            value, stored_at = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as e:
+            self._error('deserializar', key, e)
+            return None
+        return Entry(value, stored_at)
+
+    def _error(self, action: str, key: str, error: Exception) -> None:
+        with self._lock:
+            self._stats['errors'] += 1
+        logger.warning(f"Caché compartida: no se pudo {action} {key}: {str(error)}")
+
+
+# Instancia compartida, creada en el primer uso
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def create_backend(name: Optional[str] = None) -> Backend:
+    """
+    Crea el almacén indicado por CACHE_BACKEND ('memory', 'file' o 'redis').
+
+    Raises:
+        ValueError: Si el nombre no corresponde a ningún almacén
+    """
+    name = (name or os.getenv('CACHE_BACKEND', 'memory')).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"CACHE_BACKEND desconocido: {name} (opciones: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def get_shared_cache() -> SharedCache:
+    """Obtiene la caché compartida del proceso, creándola si es necesario."""
+    global _shared_cache
+
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCache(create_backend())
+                logger.info(f"Caché compartida: almacén {type(_shared_cache.backend).__name__}")
+    return _shared_cache
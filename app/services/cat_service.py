@@ -1,12 +1,24 @@
 import os
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 from flask import current_app
+from app.services.catalog_cache import CatalogCache
+from app.services.http_client import get_http_client
+from app.services.fanout import fan_out
+from app.services.breed_index import BreedIndex, build_lookup, lookup_key
+from app.services.image_cache import ImageCache
+from app.services.cache_backend import NEGATIVE_TTL, get_shared_cache
 
 class CatService:
     # Usar variable de entorno para la URL base de la API
     BASE_URL = os.getenv('CAT_API_BASE_URL', 'https://api.thecatapi.com/v1/')
     
+    # Caché en memoria del catálogo completo de razas
+    _breeds_cache = CatalogCache('cat_breeds', lambda: CatService._fetch_all_breeds())
+    
+    # Metadatos de imagen por reference_image_id (LRU acotada por memoria, con TTL y caché negativa)
+    _image_cache = ImageCache('cat_images', lambda image_id: CatService._request_image(image_id))
+    
     @classmethod
     def _get_base_url(cls) -> str:
         """Obtiene la URL base de la API desde las variables de entorno."""
@@ -22,7 +34,7 @@ class CatService:
     def _format_breed_data(cls, breed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Formatea los datos de la raza según el formato deseado."""
         reference_image_id = breed_data.get('reference_image_id', '')
-        image_url = f"https://cdn2.thecatapi.com/images/{reference_image_id}.jpg" if reference_image_id else ''
+        image_url = cls._cdn_image_url(reference_image_id) if reference_image_id else ''
         
         return {
             'id': breed_data.get('id', ''),
@@ -39,11 +51,83 @@ class CatService:
             'image_url': image_url
         }
 
+    @classmethod
+    def _cdn_image_url(cls, reference_image_id: str) -> str:
+        """URL de una imagen de referencia en la CDN (CAT_IMAGE_CDN_URL)."""
+        return f"{os.getenv('CAT_IMAGE_CDN_URL', 'https://cdn2.thecatapi.com/images/')}{reference_image_id}.jpg"
+
+    @classmethod
+    def get_image_source(cls, image_id: str) -> Optional[str]:
+        """
+        URL original de una imagen conocida, para el proxy de imágenes.
+        
+        Se usa la URL de sus metadatos si están en caché y, si no, la de la CDN
+        cuando es la imagen de referencia de alguna raza del catálogo.
+        
+        Returns:
+            Optional[str]: La URL, o None si la imagen no es de este servicio
+        """
+        image = cls._image_cache.peek(image_id)
+        if image and image.get('url'):
+            return image['url']
+        breeds = cls._breeds_cache.peek()
+        if breeds is None:
+            return None
+        references = cls._breeds_cache.get_derived('reference_images', cls._build_reference_images)
+        return cls._cdn_image_url(image_id) if image_id in references else None
+    
+    @staticmethod
+    def _build_reference_images(breeds: List[Dict[str, Any]]) -> Set[str]:
+        """IDs de las imágenes de referencia de una versión del catálogo."""
+        return {breed['reference_image_id'] for breed in breeds if breed.get('reference_image_id')}
+
+    @classmethod
+    def filter_breeds(cls,
+                      energy_level: int = None,
+                      intelligence: int = None,
+                      temperament: str = None,
+                      ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                      sort_by: str = None) -> List[Dict[str, Any]]:
+        """
+        Filtra las razas de gatos según los criterios especificados.
+        
+        Usa el mismo índice que las razas de perros (BreedIndex), construido una
+        sola vez por versión del catálogo en caché.
+        
+        Args:
+            energy_level (int): Nivel de energía (1-5)
+            intelligence (int): Nivel de inteligencia (1-5)
+            temperament (str): Temperamento específico a buscar
+            ranges (Dict[str, Tuple]): (mínimo, máximo) para 'weight' (kg) o 'life_span' (años)
+            sort_by (str): 'name', 'weight' o 'life_span', con '-' para orden descendente
+            
+        Returns:
+            List[Dict[str, Any]]: Lista de razas que cumplen con los criterios
+            
+        Raises:
+            ValueError: Si sort_by no es válido
+        """
+        try:
+            index = cls._breeds_cache.get_derived('filter_index', BreedIndex)
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Error al obtener razas de gatos: {str(e)}")
+            return []
+        
+        return index.filter(
+            energy_level=energy_level,
+            intelligence=intelligence,
+            temperament=temperament,
+            ranges=ranges,
+            sort_by=sort_by
+        )
+
     @classmethod
     def get_cat_image(cls, reference_image_id: str) -> Dict[str, Any]:
         """
         Obtiene la URL de la imagen de un gato por su reference_image_id.
         
+        Se sirve desde ImageCache; solo se consulta la API si la imagen no está en caché.
+        
         Args:
             reference_image_id (str): El ID de referencia de la imagen
             
@@ -54,61 +138,144 @@ class CatService:
             return {}
             
         try:
-            base_url = cls._get_base_url()
-            response = requests.get(f"{base_url}images/{reference_image_id}")
-            response.raise_for_status()
-            return response.json()
+            return cls._image_cache.get(reference_image_id)
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f"Error al obtener la imagen del gato: {str(e)}")
             return {}
     
+    @classmethod
+    def _request_image(cls, reference_image_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Pide los metadatos de una imagen a la API.
+        
+        Returns:
+            Optional[Dict[str, Any]]: La imagen, o None si la API no la conoce (404)
+            
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla por otro motivo
+        """
+        base_url = cls._get_base_url()
+        response = get_http_client().get(f"{base_url}images/{reference_image_id}")
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+    
     @classmethod
     def get_all_breeds_with_images(cls) -> List[Dict[str, Any]]:
         """
         Obtiene todas las razas de gatos con sus respectivas imágenes.
         
+        Las imágenes se resuelven de forma concurrente (FANOUT_CONCURRENCY) con un
+        plazo total (FANOUT_DEADLINE); las razas cuya imagen falla o no llega a
+        tiempo se devuelven con image_url vacío.
+        
         Returns:
             List[Dict[str, Any]]: Una lista de diccionarios con información de razas de gatos y sus imágenes
         """
-        breeds = cls.get_all_breeds()
-        for breed in breeds:
-            if 'reference_image_id' in breed and breed['reference_image_id']:
-                try:
-                    image_data = cls.get_cat_image(breed['reference_image_id'])
-                    # Añadir la URL de la imagen al objeto de la raza
-                    breed['image_url'] = image_data.get('url', '')
-                except Exception as e:
-                    current_app.logger.error(f"Error al obtener la imagen para la raza {breed.get('id', 'unknown')}: {str(e)}")
-                    breed['image_url'] = ''
-            else:
-                breed['image_url'] = ''
-        return breeds
+        return cls.add_images(cls.get_all_breeds())
+    
+    @classmethod
+    def add_images(cls, breeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Añade a cada raza la URL de su imagen de referencia obtenida de la API.
+        
+        Permite resolver solo las imágenes de una página del catálogo.
+        
+        Args:
+            breeds (List[Dict[str, Any]]): Razas a completar
+            
+        Returns:
+            List[Dict[str, Any]]: Copias de las razas con image_url resuelto
+        """
+        # Solo se piden a la API (de forma concurrente) las imágenes que no están en caché
+        images = cls._image_cache.get_many(breed.get('reference_image_id') for breed in breeds)
+        
+        # Copiar cada raza para no modificar el catálogo en caché
+        return [
+            {**breed, 'image_url': (images.get(breed.get('reference_image_id')) or {}).get('url', '')}
+            for breed in breeds
+        ]
+    
+    @classmethod
+    def _fetch_all_breeds(cls) -> List[Dict[str, Any]]:
+        """
+        Descarga y formatea el catálogo completo de razas de The Cat API.
+        
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+        """
+        base_url = cls._get_base_url()
+        response = get_http_client().get(f"{base_url}breeds")
+        response.raise_for_status()  # Lanza una excepción para errores HTTP
+        
+        # Formatear la respuesta según el formato deseado
+        breeds = response.json()
+        return [cls._format_breed_data(breed) for breed in breeds]
     
     @classmethod
     def get_all_breeds(cls) -> List[Dict[str, Any]]:
         """
         Obtiene todas las razas de gatos de The Cat API.
         
+        El catálogo se sirve desde una caché en memoria (CATALOG_CACHE_TTL) y se
+        refresca en segundo plano cuando expira.
+        
         Returns:
             List[Dict[str, Any]]: Una lista de diccionarios con información de razas de gatos
         """
         try:
-            base_url = cls._get_base_url()
-            response = requests.get(f"{base_url}breeds")
-            response.raise_for_status()  # Lanza una excepción para errores HTTP
-            
-            # Formatear la respuesta según el formato deseado
-            breeds = response.json()
-            return [cls._format_breed_data(breed) for breed in breeds]
-            
+            return list(cls._breeds_cache.get())
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f"Error al obtener razas de gatos: {str(e)}")
             return []
     
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché del catálogo de razas."""
+        return cls._breeds_cache.stats()
+    
+    @classmethod
+    def get_image_cache_stats(cls) -> Dict[str, Any]:
+        """Devuelve el tamaño y la tasa de aciertos de la caché de metadatos de imagen."""
+        return cls._image_cache.stats()
+    
+    @classmethod
+    def restore_catalog(cls) -> bool:
+        """
+        Restaura el catálogo desde su copia en disco y lo recarga en segundo plano.
+        
+        Los índices de búsqueda y filtrado y las imágenes de referencia se
+        registran para que se construyan con cada versión del catálogo (también
+        la restaurada) antes de publicarla, de modo que ninguna petición pague
+        su construcción.
+        
+        Returns:
+            bool: True si se restauró una copia
+        """
+        cls._breeds_cache.register_derived('lookup', build_lookup)
+        cls._breeds_cache.register_derived('filter_index', BreedIndex)
+        cls._breeds_cache.register_derived('reference_images', cls._build_reference_images)
+        return cls._breeds_cache.restore()
+    
+    @classmethod
+    def get_catalog_version(cls) -> Optional[str]:
+        """
+        Devuelve la huella del catálogo de razas en caché sin cargarlo.
+        
+        Returns:
+            Optional[str]: Huella del contenido, o None si el catálogo aún no se ha cargado
+        """
+        return cls._breeds_cache.peek_digest()
+    
     @classmethod
     def get_breed_by_id(cls, breed_id: str) -> Dict[str, Any]:
         """
-        Obtiene una raza de gato específica por su ID.
+        Obtiene una raza de gato específica por su ID (o por su nombre).
+        
+        La búsqueda se resuelve en memoria con un índice del catálogo en caché,
+        de modo que los IDs desconocidos se responden sin ir a la API. Solo si
+        el catálogo no está disponible se consulta la raza a la API.
         
         Args:
             breed_id (str): El ID de la raza de gato
@@ -117,18 +284,98 @@ class CatService:
             Dict[str, Any]: Información de la raza de gato en el formato deseado
         """
         try:
-            base_url = cls._get_base_url()
-            response = requests.get(f"{base_url}breeds/{breed_id}")
-            response.raise_for_status()
-            
-            # Formatear la respuesta según el formato deseado
-            breed_data = response.json()
-            return cls._format_breed_data(breed_data)
+            lookup = cls._breeds_cache.get_derived('lookup', build_lookup)
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Catálogo no disponible, consultando la raza {breed_id} a la API: {str(e)}")
+            return cls._fetch_breed_by_id(breed_id)
+        
+        breed = lookup.get(lookup_key(breed_id))
+        return dict(breed) if breed else {}
+
+    @classmethod
+    def get_breeds_by_ids(cls, breed_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        Obtiene varias razas de gato por su ID (o su nombre) en una sola operación.
+        
+        Con el catálogo en caché todas se resuelven en memoria; si no está
+        disponible, se consultan a la API de forma concurrente (FANOUT_CONCURRENCY)
+        con un plazo total (FANOUT_DEADLINE).
+        
+        Args:
+            breed_ids (List[str]): IDs o nombres de las razas
             
+        Returns:
+            Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]: (raza por ID solicitado,
+                error por ID solicitado: 'not_found' o 'unavailable')
+        """
+        breeds: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        try:
+            lookup = cls._breeds_cache.get_derived('lookup', build_lookup)
+        except requests.exceptions.RequestException as e:
+            current_app.logger.error(f"Catálogo no disponible, consultando {len(breed_ids)} razas a la API: {str(e)}")
+            results = fan_out(cls._get_breed, breed_ids, default=None)
+        else:
+            results = [lookup.get(lookup_key(breed_id)) or {} for breed_id in breed_ids]
+        
+        for breed_id, breed in zip(breed_ids, results):
+            if breed is None:
+                errors[breed_id] = 'unavailable'
+            elif 'id' not in breed or breed['id'] in (None, ''):
+                errors[breed_id] = 'not_found'
+            else:
+                breeds[breed_id] = dict(breed)
+        return breeds, errors
+
+    @classmethod
+    def _fetch_breed_by_id(cls, breed_id: str) -> Dict[str, Any]:
+        """Obtiene una raza directamente de la API, sin pasar por el catálogo en caché."""
+        try:
+            return cls._get_breed(breed_id)
         except requests.exceptions.RequestException as e:
             current_app.logger.error(f"Error al obtener la raza {breed_id}: {str(e)}")
             return {}
 
+    @classmethod
+    def _get_breed(cls, breed_id: str) -> Dict[str, Any]:
+        """
+        Pide una raza a la API a través de la caché compartida (ver cache_backend.py).
+        
+        Mientras el catálogo no está disponible cada raza se pide una sola vez
+        entre todas las instancias; las inexistentes se guardan NEGATIVE_TTL segundos.
+        Con CACHE_BACKEND=memory no se cachea: los IDs llegan de la petición y
+        ese almacén no está acotado.
+        
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+        """
+        shared = get_shared_cache()
+        if not shared.shared:
+            return cls._request_breed(breed_id)
+        return shared.get_or_load(
+            f"breed:cat:{breed_id}",
+            lambda: cls._request_breed(breed_id),
+            lambda breed: cls._breeds_cache.ttl if breed else NEGATIVE_TTL
+        ).value
+
+    @classmethod
+    def _request_breed(cls, breed_id: str) -> Dict[str, Any]:
+        """
+        Pide una raza a la API y la formatea.
+        
+        Returns:
+            Dict[str, Any]: La raza, o un diccionario vacío si la API no la conoce (404)
+            
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla por otro motivo
+        """
+        base_url = cls._get_base_url()
+        response = get_http_client().get(f"{base_url}breeds/{breed_id}")
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return cls._format_breed_data(response.json() or {})
+
 # Example usage:
 if __name__ == "__main__":
     # Get all breeds
@@ -0,0 +1,468 @@
+import os
+import json
+import hashlib
+import threading
+import time
+import logging
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional
+
+from flask import current_app, has_app_context
+
+from app.services import catalog_snapshot
+from app.services.cache_backend import get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogVersion(NamedTuple):
+    """
+    Versión publicada de un catálogo, con sus estructuras derivadas.
+
+    Es inmutable: cada recarga publica una versión nueva que sustituye a la
+    anterior de una sola vez, así que quien lee una versión ve siempre un
+    catálogo y unos índices coherentes entre sí.
+    """
+    number: int
+    value: Any
+    digest: str
+    derived: Mapping[str, Any]
+    loaded_at: float
+    published_at: float
+    refreshed_at: float
+    changes: Optional[Dict[str, int]]
+
+
+def diff_catalogs(old: Any, new: Any) -> Optional[Dict[str, int]]:
+    """
+    Compara dos catálogos (listas de diccionarios con 'id').
+
+    Returns:
+        Optional[Dict[str, int]]: Elementos añadidos, eliminados y modificados, o None si no son comparables
+    """
+    if not isinstance(old, list) or not isinstance(new, list):
+        return None
+    try:
+        before = {item['id']: item for item in old}
+        after = {item['id']: item for item in new}
+    except (TypeError, KeyError):
+        return None
+    return {
+        'added': sum(1 for key in after if key not in before),
+        'removed': sum(1 for key in before if key not in after),
+        'changed': sum(1 for key, item in after.items() if key in before and before[key] != item)
+    }
+
+
+class CatalogCache:
+    """
+    Caché en memoria para catálogos que cambian poco (razas de perros y gatos).
+
+    Mientras el valor está vigente (TTL) se sirve directamente desde memoria.
+    Cuando expira se sigue sirviendo el valor anterior (stale-while-revalidate)
+    y se lanza una única recarga en segundo plano. Solo la primera carga, con
+    la caché vacía, bloquea al solicitante.
+
+    Cada carga se publica como una CatalogVersion inmutable: las estructuras
+    derivadas registradas con register_derived() se construyen antes de
+    publicarla, fuera del camino de las peticiones, y la versión sustituye a
+    la anterior de forma atómica. Si el contenido no cambió (misma huella) se
+    conserva la versión actual y solo se renueva su vigencia. Los listeners
+    registrados con register_listener() se avisan en cada versión nueva,
+    venga de donde venga la carga (restauración, recarga en segundo plano o
+    programada). refresh() permite recargar de forma programada (ver
+    catalog_refresher.py).
+
+    Cada carga correcta se guarda en disco (ver catalog_snapshot.py), y
+    restore() la recupera al arrancar: tras un reinicio el catálogo se sirve
+    desde la copia, aunque la API externa no responda, mientras se recarga
+    en segundo plano.
+
+    Con un almacén compartido (CACHE_BACKEND=file o redis, ver
+    cache_backend.py) las cargas pasan por él: la primera instancia que
+    necesita el catálogo lo pide a la API y el resto reutiliza esa carga,
+    conservando su antigüedad para que todas expiren a la vez.
+    """
+
+    DEFAULT_TTL = 3600
+
+    def __init__(self, name: str, loader: Callable[[], Any], ttl: Optional[float] = None):
+        """
+        Args:
+            name (str): Nombre del catálogo (se usa en logs y estadísticas)
+            loader (Callable): Función que obtiene el catálogo; debe lanzar una excepción si falla
+            ttl (float): Segundos que el valor se considera vigente (por defecto CATALOG_CACHE_TTL)
+        """
+        self.name = name
+        self._loader = loader
+        self._ttl = ttl
+        self._current: Optional[CatalogVersion] = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._builders: Dict[str, Callable[[Any], Any]] = {}
+        self._listeners: Dict[str, Callable[[CatalogVersion], None]] = {}
+        self._derived: Dict[str, Any] = {}
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'unchanged_refreshes': 0,
+            'shared_loads': 0,
+            'snapshot_restores': 0
+        }
+
+    @property
+    def ttl(self) -> float:
+        """TTL efectivo; se lee del entorno si no se indicó al crear la caché."""
+        if self._ttl is not None:
+            return self._ttl
+        try:
+            return float(os.getenv('CATALOG_CACHE_TTL', self.DEFAULT_TTL))
+        except ValueError:
+            return self.DEFAULT_TTL
+
+    @property
+    def version(self) -> int:
+        """Número de versión del catálogo; aumenta con cada carga que cambia el contenido."""
+        current = self._current
+        return current.number if current is not None else 0
+
+    @property
+    def digest(self) -> Optional[str]:
+        """Huella del contenido del catálogo actual (igual en todas las instancias), o None si está vacío."""
+        current = self._current
+        return current.digest if current is not None else None
+
+    @property
+    def current(self) -> Optional[CatalogVersion]:
+        """Versión publicada, o None si la caché está vacía."""
+        return self._current
+
+    def peek(self) -> Any:
+        """
+        Devuelve el catálogo si ya está cargado, sin bloquear nunca.
+
+        Si el valor ha expirado programa la recarga en segundo plano, igual que get().
+
+        Returns:
+            Any: El catálogo actual, o None si la caché está vacía
+        """
+        with self._lock:
+            current = self._current
+            if current is None:
+                return None
+            self._count_hit(current)
+            return current.value
+
+    def peek_digest(self) -> Optional[str]:
+        """
+        Devuelve la huella del catálogo sin cargarlo ni copiarlo.
+
+        Si el valor ha expirado programa la recarga en segundo plano, igual que get().
+        """
+        with self._lock:
+            current = self._current
+            if current is None:
+                return None
+            if time.monotonic() - current.loaded_at >= self.ttl:
+                self._schedule_refresh()
+            return current.digest
+
+    def get(self) -> Any:
+        """
+        Devuelve el catálogo, cargándolo si la caché está vacía.
+
+        Returns:
+            Any: El valor devuelto por el loader
+
+        Raises:
+            Exception: La excepción del loader si la caché está vacía y la carga falla
+        """
+        return self._get_version().value
+
+    def get_derived(self, name: str, builder: Callable[[Any], Any]) -> Any:
+        """
+        Devuelve una estructura derivada del catálogo (índices, etc.).
+
+        Las registradas con register_derived() ya vienen construidas en la
+        versión publicada. El resto se construye en la primera llamada y se
+        reutiliza mientras el catálogo no cambie.
+
+        Args:
+            name (str): Nombre de la estructura derivada
+            builder (Callable): Función que recibe el catálogo y construye la estructura
+
+        Returns:
+            Any: La estructura derivada de la versión actual del catálogo
+        """
+        current = self._get_version()
+        if name in current.derived:
+            return current.derived[name]
+
+        value = current.value
+        entry = self._derived.get(name)
+        if entry is not None and entry[0] is value:
+            return entry[1]
+
+        derived = builder(value)
+        # Se asocia al objeto del catálogo, no al número de versión, para que
+        # una recarga concurrente nunca mezcle un índice con otro catálogo
+        self._derived[name] = (value, derived)
+        return derived
+
+    def register_derived(self, name: str, builder: Callable[[Any], Any]) -> None:
+        """
+        Registra una estructura derivada que se construye junto con cada versión.
+
+        Si ya hay una versión publicada, la estructura se construye ahora y se
+        publica con ella.
+
+        Args:
+            name (str): Nombre de la estructura derivada (el mismo que en get_derived)
+            builder (Callable): Función que recibe el catálogo y construye la estructura
+        """
+        self._builders[name] = builder
+        current = self._current
+        if current is None or name in current.derived:
+            return
+
+        derived = builder(current.value)
+        with self._lock:
+            # Si entretanto se publicó otra versión, ya incluye la estructura
+            if self._current is current:
+                self._current = current._replace(derived=MappingProxyType({**current.derived, name: derived}))
+
+    def register_listener(self, name: str, callback: Callable[[CatalogVersion], None]) -> None:
+        """
+        Registra una función a la que se llama con cada versión nueva del catálogo.
+
+        Se llama desde el hilo que publica la versión (normalmente uno de
+        fondo), así que no debe bloquear: lo costoso debe lanzarlo en otro
+        hilo. Registrar otra función con el mismo nombre sustituye a la anterior.
+
+        Args:
+            name (str): Nombre del listener
+            callback (Callable): Recibe la CatalogVersion publicada
+        """
+        self._listeners[name] = callback
+
+    def set(self, value: Any, age: float = 0.0) -> CatalogVersion:
+        """
+        Publica un valor en la caché como si acabara de cargarse.
+
+        Si su huella coincide con la de la versión actual solo se renueva la
+        vigencia; si no, se construyen las estructuras derivadas registradas y
+        se publica una versión nueva.
+
+        Args:
+            value (Any): El catálogo
+            age (float): Segundos transcurridos desde que se cargó (si lo cargó otra instancia)
+
+        Returns:
+            CatalogVersion: La versión publicada
+        """
+        digest = hashlib.blake2b(
+            json.dumps(value, sort_keys=True, default=str).encode(), digest_size=12
+        ).hexdigest()
+        now = time.time()
+        loaded_at = time.monotonic() - age
+
+        current = self._current
+        if current is not None and current.digest == digest:
+            with self._lock:
+                current = self._current
+                if current is not None and current.digest == digest:
+                    self._current = current._replace(loaded_at=loaded_at, refreshed_at=now)
+                    self._stats['unchanged_refreshes'] += 1
+                    return self._current
+
+        derived = {}
+        for name, builder in list(self._builders.items()):
+            try:
+                derived[name] = builder(value)
+            except Exception as e:
+                # Se construirá bajo demanda con get_derived
+                logger.error(f"Error al construir {name} del catálogo {self.name}: {str(e)}")
+
+        with self._lock:
+            previous = self._current
+            version = self._current = CatalogVersion(
+                number=(previous.number if previous is not None else 0) + 1,
+                value=value,
+                digest=digest,
+                derived=MappingProxyType(derived),
+                loaded_at=loaded_at,
+                published_at=now,
+                refreshed_at=now,
+                changes=diff_catalogs(previous.value, value) if previous is not None else None
+            )
+
+        for name, callback in list(self._listeners.items()):
+            try:
+                callback(version)
+            except Exception as e:
+                logger.error(f"Error en el listener {name} del catálogo {self.name}: {str(e)}")
+        return version
+
+    def refresh(self, max_age: Optional[float] = None) -> CatalogVersion:
+        """
+        Recarga el catálogo en el hilo actual, esperando a cualquier otra recarga en curso.
+
+        Pensado para recargas programadas: los lectores siguen viendo la
+        versión anterior hasta que se publica la nueva.
+
+        Args:
+            max_age (float): Antigüedad máxima (s) de una carga de otra instancia
+                en la caché compartida para reutilizarla en lugar de pedir el catálogo
+
+        Returns:
+            CatalogVersion: La versión publicada tras la recarga
+
+        Raises:
+            Exception: La excepción del loader si la carga falla
+        """
+        with self._load_lock:
+            try:
+                return self._load(max_age, background=True)
+            except Exception:
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+                raise
+
+    def restore(self) -> bool:
+        """
+        Publica la copia en disco del catálogo (si existe) y programa una recarga en segundo plano.
+
+        Pensado para el arranque de la aplicación: la recarga se lanza aunque
+        no haya copia, de modo que la primera petición no espere a la API.
+
+        Returns:
+            bool: True si se restauró una copia
+        """
+        snapshot = catalog_snapshot.load(self.name)
+        if snapshot is not None:
+            value, saved_at = snapshot
+            self.set(value)
+            logger.info(
+                f"Catálogo {self.name} restaurado desde disco "
+                f"({len(value)} elementos, guardado hace {time.time() - saved_at:.0f}s)"
+            )
+
+        with self._lock:
+            if snapshot is not None:
+                self._stats['snapshot_restores'] += 1
+            self._schedule_refresh()
+        return snapshot is not None
+
+    def invalidate(self) -> None:
+        """Marca el valor actual como expirado; la próxima lectura lo recarga en segundo plano."""
+        with self._lock:
+            if self._current is not None:
+                self._current = self._current._replace(loaded_at=float('-inf'))
+
+    def clear(self) -> None:
+        """Vacía la caché por completo."""
+        with self._lock:
+            self._current = None
+            self._derived = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché y los datos de la versión publicada."""
+        with self._lock:
+            current = self._current
+            age = time.monotonic() - current.loaded_at if current is not None else None
+            return {
+                'name': self.name,
+                'ttl': self.ttl,
+                'version': current.number if current is not None else 0,
+                'digest': current.digest if current is not None else None,
+                'age': round(age, 3) if age is not None else None,
+                'published_at': iso_timestamp(current.published_at) if current is not None else None,
+                'refreshed_at': iso_timestamp(current.refreshed_at) if current is not None else None,
+                'changes': current.changes if current is not None else None,
+                'derived': sorted(current.derived) if current is not None else [],
+                'refreshing': self._refreshing,
+                **self._stats
+            }
+
+    def _get_version(self) -> CatalogVersion:
+        """Versión actual, cargándola si la caché está vacía."""
+        with self._lock:
+            current = self._current
+            if current is not None:
+                self._count_hit(current)
+                return current
+            self._stats['misses'] += 1
+
+        # Caché vacía: solo un hilo carga, el resto espera y reutiliza el resultado
+        with self._load_lock:
+            if self._current is not None:
+                return self._current
+            return self._load()
+
+    def _count_hit(self, current: CatalogVersion) -> None:
+        """Cuenta una lectura y programa la recarga si la versión expiró (requiere self._lock)."""
+        if time.monotonic() - current.loaded_at < self.ttl:
+            self._stats['hits'] += 1
+        else:
+            self._stats['stale_hits'] += 1
+            self._schedule_refresh()
+
+    def _load(self, max_age: Optional[float] = None, background: bool = False) -> CatalogVersion:
+        """
+        Ejecuta el loader (o reutiliza la carga de otra instancia) y publica el resultado (requiere self._load_lock).
+
+        Las recargas de fondo esperan hasta CACHE_LOCK_WAIT a la carga de otra
+        instancia; las cargas durante una petición, solo CACHE_REQUEST_LOCK_WAIT.
+        """
+        shared = get_shared_cache()
+        if not shared.shared:
+            value = self._loader()
+            version = self.set(value)
+            loaded = True
+        else:
+            entry = shared.get_or_load(f"catalog:{self.name}", self._loader, self.ttl, max_age=max_age,
+                                       wait=shared.lock_wait if background else None)
+            value, loaded = entry.value, entry.loaded
+            version = self.set(value, 0.0 if loaded else max(0.0, time.time() - entry.stored_at))
+
+        with self._lock:
+            self._stats['refreshes' if loaded else 'shared_loads'] += 1
+        if loaded:
+            catalog_snapshot.save(self.name, value)
+        return version
+
+    def _schedule_refresh(self) -> None:
+        """Lanza una recarga en segundo plano si no hay otra en curso (requiere self._lock)."""
+        if self._refreshing:
+            return
+        self._refreshing = True
+
+        # Los servicios usan current_app.logger, así que el hilo necesita el contexto de la app
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def refresh():
+            try:
+                with self._load_lock:
+                    if app is not None:
+                        with app.app_context():
+                            self._load(background=True)
+                    else:
+                        self._load(background=True)
+            except Exception as e:
+                with self._lock:
+                    self._stats['refresh_errors'] += 1
+                logger.error(f"Error al refrescar el catálogo {self.name}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, name=f"catalog-refresh-{self.name}", daemon=True).start()
+
+
+def iso_timestamp(epoch: float) -> str:
+    """Fecha ISO 8601 en UTC de un instante (epoch)."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(epoch))
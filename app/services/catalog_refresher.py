@@ -0,0 +1,190 @@
+import os
+import time
+import random
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.services.catalog_cache import CatalogCache, iso_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Fracción del TTL tras la que se recargan los catálogos si no se indica CATALOG_REFRESH_INTERVAL
+INTERVAL_FRACTION = 0.8
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class CatalogRefresher:
+    """
+    Hilo de fondo que recarga los catálogos periódicamente, antes de que expiren.
+
+    Sin él, la recarga la dispara la primera petición que encuentra el
+    catálogo expirado. Con él, cada catálogo se recarga cada
+    CATALOG_REFRESH_INTERVAL segundos (por defecto el 80 % de su TTL) con un
+    margen aleatorio de ±CATALOG_REFRESH_JITTER para que las instancias no
+    vayan a la API a la vez. Cada recarga publica una versión nueva solo si
+    el contenido cambió (ver CatalogCache.set), con los índices ya
+    construidos; en ese caso se llama a on_change con los catálogos que
+    cambiaron en la ronda. Lo que deba regenerarse con cualquier versión
+    nueva, sea cual sea la carga que la publicó, se registra en la caché con
+    CatalogCache.register_listener.
+    """
+
+    DEFAULT_JITTER = 0.1
+
+    def __init__(self,
+                 caches: Sequence[CatalogCache],
+                 on_change: Optional[Callable[[List[str]], None]] = None,
+                 run: Optional[Callable[[Callable[[], Any]], Any]] = None,
+                 interval: Optional[float] = None,
+                 jitter: Optional[float] = None):
+        """
+        Args:
+            caches (Sequence[CatalogCache]): Catálogos a recargar
+            on_change (Callable): Recibe los nombres de los catálogos que cambiaron en una ronda
+            run (Callable): Ejecuta cada recarga (p. ej. dentro del contexto de la app)
+            interval (float): Segundos entre rondas (CATALOG_REFRESH_INTERVAL)
+            jitter (float): Fracción aleatoria del intervalo que se suma o resta (CATALOG_REFRESH_JITTER)
+        """
+        self.caches = list(caches)
+        self._on_change = on_change
+        self._run = run or (lambda func: func())
+        self._interval = interval if interval is not None else _env_float('CATALOG_REFRESH_INTERVAL', 0.0)
+        self.jitter = jitter if jitter is not None else _env_float('CATALOG_REFRESH_JITTER', self.DEFAULT_JITTER)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._next_run: Optional[float] = None
+        self._last_run: Optional[float] = None
+        self._last_duration: Optional[float] = None
+        self._stats = {
+            'runs': 0,
+            'changes': 0,
+            'errors': 0
+        }
+
+    @property
+    def interval(self) -> float:
+        """Segundos entre rondas; por defecto una fracción del menor TTL de los catálogos."""
+        if self._interval > 0:
+            return self._interval
+        return INTERVAL_FRACTION * min(cache.ttl for cache in self.caches)
+
+    def start(self) -> 'CatalogRefresher':
+        """Arranca el hilo de fondo (no hace nada si ya está en marcha)."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='catalog-refresher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el hilo de fondo tras la ronda en curso."""
+        self._stop.set()
+
+    def run_once(self) -> List[str]:
+        """
+        Recarga todos los catálogos una vez.
+
+        Los errores de un catálogo se registran y no impiden recargar el resto;
+        los lectores siguen viendo la versión anterior.
+
+        Returns:
+            List[str]: Nombres de los catálogos que cambiaron
+        """
+        started = time.monotonic()
+        changed = []
+        errors = 0
+        for cache in self.caches:
+            previous = cache.version
+            try:
+                version = self._run(lambda: cache.refresh(max_age=self.interval))
+            except Exception as e:
+                errors += 1
+                logger.error(f"Error en la recarga programada del catálogo {cache.name}: {str(e)}")
+                continue
+            if version.number != previous:
+                changed.append(cache.name)
+                logger.info(
+                    f"Catálogo {cache.name} actualizado a la versión {version.number}"
+                    + (f" ({version.changes})" if version.changes else "")
+                )
+
+        with self._lock:
+            self._stats['runs'] += 1
+            self._stats['changes'] += len(changed)
+            self._stats['errors'] += errors
+            self._last_run = time.time()
+            self._last_duration = time.monotonic() - started
+
+        if changed and self._on_change is not None:
+            try:
+                self._on_change(changed)
+            except Exception as e:
+                logger.error(f"Error al regenerar los datos derivados de {', '.join(changed)}: {str(e)}")
+        return changed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'running': self._thread is not None and self._thread.is_alive(),
+                'interval': round(self.interval, 3),
+                'jitter': self.jitter,
+                'last_run': iso_timestamp(self._last_run) if self._last_run else None,
+                'last_duration': round(self._last_duration, 3) if self._last_duration is not None else None,
+                'next_run': iso_timestamp(self._next_run) if self._next_run else None,
+                **self._stats
+            }
+
+    def _delay(self) -> float:
+        return max(1.0, self.interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def _loop(self) -> None:
+        while True:
+            delay = self._delay()
+            with self._lock:
+                self._next_run = time.time() + delay
+            if self._stop.wait(delay):
+                return
+            self.run_once()
+
+
+# Instancia compartida, creada por start_refresher
+_refresher: Optional[CatalogRefresher] = None
+_refresher_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    """Indica si la recarga programada está activada (CATALOG_REFRESH_ENABLED)."""
+    return os.getenv('CATALOG_REFRESH_ENABLED', 'True') == 'True'
+
+
+def start_refresher(caches: Sequence[CatalogCache],
+                    on_change: Optional[Callable[[List[str]], None]] = None,
+                    run: Optional[Callable[[Callable[[], Any]], Any]] = None) -> CatalogRefresher:
+    """
+    Arranca la recarga programada del proceso (una sola aunque se cree la app varias veces).
+
+    Returns:
+        CatalogRefresher: La instancia en marcha
+    """
+    global _refresher
+
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = CatalogRefresher(caches, on_change=on_change, run=run)
+        else:
+            # La última app creada es la que aporta el contexto de las recargas
+            _refresher._on_change, _refresher._run = on_change, run or _refresher._run
+        return _refresher.start()
+
+
+def get_refresher() -> Optional[CatalogRefresher]:
+    """La recarga programada en marcha, o None si no se ha arrancado."""
+    return _refresher
@@ -0,0 +1,99 @@
+import os
+import mmap
+import time
+import logging
+import tempfile
+from typing import Any, Optional, Tuple
+
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+# Versión del formato de las copias; las de otro formato se ignoran
+# (2: las image_url se guardan con la URL de la CDN, sin reescribir para el proxy)
+FORMAT_VERSION = 2
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.catalog_snapshots')
+
+
+def get_snapshot_dir() -> Optional[str]:
+    """
+    Directorio de las copias en disco (CATALOG_SNAPSHOT_DIR).
+
+    Returns:
+        Optional[str]: El directorio, o None si las copias están desactivadas (CATALOG_SNAPSHOT_DIR vacío)
+    """
+    directory = os.getenv('CATALOG_SNAPSHOT_DIR', DEFAULT_DIR)
+    return directory or None
+
+
+def _path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}.msgpack")
+
+
+def save(name: str, value: Any) -> bool:
+    """
+    Guarda un catálogo en disco de forma atómica (archivo temporal + rename).
+
+    Args:
+        name (str): Nombre del catálogo
+        value (Any): Catálogo serializable con msgpack
+
+    Returns:
+        bool: True si se guardó
+    """
+    directory = get_snapshot_dir()
+    if directory is None:
+        return False
+
+    payload = msgpack.packb({
+        'format': FORMAT_VERSION,
+        'name': name,
+        'saved_at': time.time(),
+        'data': value
+    }, use_bin_type=True)
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, _path(directory, name))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"No se pudo guardar la copia del catálogo {name}: {str(e)}")
+        return False
+    return True
+
+
+def load(name: str) -> Optional[Tuple[Any, float]]:
+    """
+    Lee la copia en disco de un catálogo, mapeando el archivo en memoria.
+
+    Returns:
+        Optional[Tuple[Any, float]]: (catálogo, momento en que se guardó), o None si no hay copia válida
+    """
+    directory = get_snapshot_dir()
+    if directory is None:
+        return None
+
+    path = _path(directory, name)
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                snapshot = msgpack.unpackb(mapped, raw=False)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, msgpack.UnpackException) as e:
+        logger.warning(f"Copia del catálogo {name} ilegible, se ignora: {str(e)}")
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('format') != FORMAT_VERSION or snapshot.get('name') != name:
+        logger.warning(f"Copia del catálogo {name} con formato desconocido, se ignora")
+        return None
+    return snapshot.get('data'), snapshot.get('saved_at', 0.0)
@@ -0,0 +1,265 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+import requests
+
+from app.services.metrics import CIRCUIT_STATE, UPSTREAM_REJECTED
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Valor de cada estado en la métrica upstream_circuit_state
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Motivos de rechazo
+CIRCUIT_OPEN = 'circuit_open'
+BULKHEAD_FULL = 'bulkhead_full'
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    """
+    La llamada no se hizo: el circuito del servicio externo está abierto o su cupo de llamadas está lleno.
+
+    Hereda de requests.exceptions.RequestException para que los servicios la
+    traten como cualquier otro fallo de red (respuesta vacía o datos en caché).
+    """
+
+    def __init__(self, upstream: str, reason: str):
+        """
+        Args:
+            upstream (str): Servicio externo
+            reason (str): CIRCUIT_OPEN o BULKHEAD_FULL
+        """
+        super().__init__(f"{upstream} no disponible ({reason})")
+        self.upstream = upstream
+        self.reason = reason
+        UPSTREAM_REJECTED.inc(upstream, reason)
+
+
+class CircuitBreaker:
+    """
+    Interruptor de circuito para un servicio externo.
+
+    - Cerrado: las llamadas pasan y se registra el resultado de las últimas
+      CIRCUIT_WINDOW. Si hay al menos CIRCUIT_MIN_CALLS y la tasa de fallos o
+      de llamadas lentas supera su umbral, el circuito se abre.
+    - Abierto: las llamadas se rechazan al instante durante CIRCUIT_OPEN_SECONDS.
+    - Semiabierto: se deja pasar una única llamada de prueba; si va bien el
+      circuito se cierra y si falla (o es lenta) vuelve a abrirse.
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_rate: Optional[float] = None,
+                 slow_call_seconds: Optional[float] = None,
+                 slow_call_rate: Optional[float] = None,
+                 window: Optional[int] = None,
+                 min_calls: Optional[int] = None,
+                 open_seconds: Optional[float] = None):
+        """
+        Args:
+            name (str): Servicio externo protegido (host)
+            failure_rate (float): Tasa de fallos que abre el circuito (CIRCUIT_FAILURE_RATE)
+            slow_call_seconds (float): Duración a partir de la cual una llamada es lenta (CIRCUIT_SLOW_CALL_MS)
+            slow_call_rate (float): Tasa de llamadas lentas que abre el circuito (CIRCUIT_SLOW_CALL_RATE)
+            window (int): Número de llamadas recientes evaluadas (CIRCUIT_WINDOW)
+            min_calls (int): Llamadas mínimas en la ventana para evaluar las tasas (CIRCUIT_MIN_CALLS)
+            open_seconds (float): Tiempo que el circuito permanece abierto (CIRCUIT_OPEN_SECONDS)
+        """
+        self.name = name
+        self.failure_rate = failure_rate if failure_rate is not None else _env_float('CIRCUIT_FAILURE_RATE', 0.5)
+        self.slow_call_seconds = (slow_call_seconds if slow_call_seconds is not None
+                                  else _env_float('CIRCUIT_SLOW_CALL_MS', 2000) / 1000)
+        self.slow_call_rate = slow_call_rate if slow_call_rate is not None else _env_float('CIRCUIT_SLOW_CALL_RATE', 0.8)
+        self.window = window or _env_int('CIRCUIT_WINDOW', 20)
+        self.min_calls = min(min_calls or _env_int('CIRCUIT_MIN_CALLS', 10), self.window)
+        self.open_seconds = open_seconds if open_seconds is not None else _env_float('CIRCUIT_OPEN_SECONDS', 30)
+
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=self.window)
+        self._set_state(CLOSED)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {
+            'opened': 0,
+            'rejected': 0
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """
+        Pide permiso para una llamada.
+
+        Returns:
+            bool: True si la llamada es la prueba del estado semiabierto (debe pasarse a record())
+
+        Raises:
+            UpstreamUnavailable: Si el circuito está abierto o ya hay una prueba en curso
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == OPEN or (state == HALF_OPEN and self._probe_in_flight):
+                self._stats['rejected'] += 1
+                raise UpstreamUnavailable(self.name, CIRCUIT_OPEN)
+            if state == HALF_OPEN:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record(self, probe: bool, failed: bool, duration: float) -> None:
+        """
+        Registra el resultado de una llamada autorizada con allow().
+
+        Args:
+            probe (bool): Valor devuelto por allow()
+            failed (bool): Error de red, timeout o respuesta 429/5xx
+            duration (float): Duración de la llamada en segundos
+        """
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            if probe:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self._set_state(CLOSED)
+                    self._outcomes.clear()
+                    logger.info(f"Circuito de {self.name} cerrado tras una llamada de prueba correcta")
+                return
+
+            if self._state != CLOSED:
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+            failures = sum(1 for outcome in self._outcomes if outcome[0])
+            slow_calls = sum(1 for outcome in self._outcomes if outcome[1])
+            if (failures / len(self._outcomes) >= self.failure_rate or
+                    slow_calls / len(self._outcomes) >= self.slow_call_rate):
+                self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'window_calls': len(self._outcomes),
+                'window_failures': sum(1 for outcome in self._outcomes if outcome[0]),
+                'window_slow_calls': sum(1 for outcome in self._outcomes if outcome[1]),
+                **self._stats
+            }
+
+    def _current_state(self) -> str:
+        """Estado actual; pasa de abierto a semiabierto cuando vence la espera (requiere self._lock)."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        CIRCUIT_STATE.set(self.name, value=STATE_VALUES[state])
+
+    def _open(self) -> None:
+        """Abre el circuito (requiere self._lock)."""
+        self._set_state(OPEN)
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._stats['opened'] += 1
+        logger.warning(f"Circuito de {self.name} abierto durante {self.open_seconds}s")
+
+
+class Bulkhead:
+    """
+    Límite de llamadas simultáneas a un servicio externo.
+
+    Las llamadas que no consiguen turno en `wait` segundos se rechazan en
+    lugar de dejar hilos de waitress bloqueados detrás de un servicio lento.
+    """
+
+    def __init__(self, name: str, max_concurrent: Optional[int] = None, wait: Optional[float] = None):
+        """
+        Args:
+            name (str): Servicio externo protegido (host)
+            max_concurrent (int): Llamadas simultáneas como máximo (UPSTREAM_MAX_CONCURRENT)
+            wait (float): Espera máxima por un turno en segundos (UPSTREAM_BULKHEAD_WAIT)
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent or _env_int(
+            'UPSTREAM_MAX_CONCURRENT', _env_int('WAITRESS_THREADS', 4) + _env_int('FANOUT_CONCURRENCY', 8))
+        self.wait = wait if wait is not None else _env_float('UPSTREAM_BULKHEAD_WAIT', 0.25)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def acquire(self) -> None:
+        """
+        Raises:
+            UpstreamUnavailable: Si no hay turno libre tras la espera
+        """
+        if not self._slots.acquire(timeout=self.wait):
+            with self._lock:
+                self._rejected += 1
+            raise UpstreamUnavailable(self.name, BULKHEAD_FULL)
+        with self._lock:
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'max_concurrent': self.max_concurrent,
+                'rejected': self._rejected
+            }
+
+
+# Un interruptor por servicio externo, compartido por los clientes síncrono y asíncrono
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """Obtiene el interruptor del servicio externo, creándolo si es necesario."""
+    breaker = _breakers.get(upstream)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(upstream)
+            if breaker is None:
+                breaker = _breakers[upstream] = CircuitBreaker(upstream)
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Estado de todos los interruptores."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.stats() for name, breaker in breakers.items()}
@@ -1,12 +1,29 @@
 import os
+import math
 import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 # from flask import current_app  # No usar logger de Flask fuera de contexto
+from app.services.catalog_cache import CatalogCache
+from app.services.http_client import get_http_client
+from app.services.fanout import fan_out
+from app.services.breed_index import BreedIndex, NUMERIC_COLUMNS, build_lookup, lookup_key, measure_range
+from app.services.image_pool import ImagePool, GLOBAL
+from app.services.image_cache import ImageCache
+from app.services.cache_backend import NEGATIVE_TTL, get_shared_cache
 
 class DogService:
     # Usar variable de entorno para la URL base de la API
     BASE_URL = os.getenv('DOG_API_BASE_URL', 'https://api.thedogapi.com/v1/')
     
+    # Caché en memoria del catálogo completo de razas
+    _breeds_cache = CatalogCache('dog_breeds', lambda: DogService._fetch_all_breeds())
+    
+    # Depósitos de imágenes aleatorias (global y por raza) rellenados en segundo plano
+    _image_pool = ImagePool(lambda breed_id, limit: DogService._search_images(breed_id, limit))
+    
+    # Metadatos de imagen por reference_image_id (LRU acotada por memoria, con TTL y caché negativa)
+    _image_cache = ImageCache('dog_images', lambda image_id: DogService._request_image(image_id))
+    
     @classmethod
     def _get_headers(cls) -> Dict[str, str]:
         """Obtiene los headers necesarios para las peticiones a la API."""
@@ -29,7 +46,7 @@ class DogService:
     def _format_breed_data(cls, breed_data: Dict[str, Any]) -> Dict[str, Any]:
         """Formatea los datos de la raza según el formato deseado."""
         reference_image_id = breed_data.get('reference_image_id', '')
-        image_url = f"https://cdn2.thedogapi.com/images/{reference_image_id}.jpg" if reference_image_id else ''
+        image_url = cls._cdn_image_url(reference_image_id) if reference_image_id else ''
         
         return {
             'id': breed_data.get('id', ''),
@@ -48,60 +65,87 @@ class DogService:
             'image_url': image_url
         }
 
+    @classmethod
+    def _cdn_image_url(cls, reference_image_id: str) -> str:
+        """URL de una imagen de referencia en la CDN (DOG_IMAGE_CDN_URL)."""
+        return f"{os.getenv('DOG_IMAGE_CDN_URL', 'https://cdn2.thedogapi.com/images/')}{reference_image_id}.jpg"
+
+    @classmethod
+    def get_image_source(cls, image_id: str) -> Optional[str]:
+        """
+        URL original de una imagen conocida, para el proxy de imágenes.
+        
+        Se usa la URL de sus metadatos si están en caché y, si no, la de la CDN
+        cuando es la imagen de referencia de alguna raza del catálogo.
+        
+        Returns:
+            Optional[str]: La URL, o None si la imagen no es de este servicio
+        """
+        image = cls._image_cache.peek(image_id)
+        if image and image.get('url'):
+            return image['url']
+        breeds = cls._breeds_cache.peek()
+        if breeds is None:
+            return None
+        references = cls._breeds_cache.get_derived('reference_images', cls._build_reference_images)
+        return cls._cdn_image_url(image_id) if image_id in references else None
+    
+    @staticmethod
+    def _build_reference_images(breeds: List[Dict[str, Any]]) -> Set[str]:
+        """IDs de las imágenes de referencia de una versión del catálogo."""
+        return {breed['reference_image_id'] for breed in breeds if breed.get('reference_image_id')}
+
     @classmethod
     def filter_breeds(cls, 
                      size: str = None,
                      energy_level: int = None,
                      intelligence: int = None,
                      breed_group: str = None,
-                     temperament: str = None) -> List[Dict[str, Any]]:
+                     temperament: str = None,
+                     ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                     sort_by: str = None) -> List[Dict[str, Any]]:
         """
         Filtra las razas de perros según los criterios especificados.
         
+        Los filtros se resuelven sobre un índice (BreedIndex) que se construye una
+        sola vez por versión del catálogo en caché, incluidas las columnas
+        numéricas de peso (kg), altura (cm) y esperanza de vida (años).
+        
         Args:
             size (str): Tamaño del perro ('small', 'medium', 'large')
             energy_level (int): Nivel de energía (1-5)
             intelligence (int): Nivel de inteligencia (1-5)
             breed_group (str): Grupo de la raza (e.g., 'Working', 'Sporting', etc.)
             temperament (str): Temperamento específico a buscar
+            ranges (Dict[str, Tuple]): (mínimo, máximo) para 'weight', 'height' o 'life_span'
+            sort_by (str): 'name', 'weight', 'height' o 'life_span', con '-' para orden descendente
             
         Returns:
             List[Dict[str, Any]]: Lista de razas que cumplen con los criterios
+            
+        Raises:
+            ValueError: Si sort_by no es válido
         """
-        breeds = cls.get_all_breeds()
-        filtered_breeds = breeds.copy()
+        try:
+            index = cls._breeds_cache.get_derived('filter_index', cls._build_filter_index)
+        except requests.exceptions.RequestException as e:
+            print(f"Error al obtener razas de perros: {str(e)}")
+            return []
         
-        if size:
-            filtered_breeds = [
-                breed for breed in filtered_breeds
-                if cls._get_size_category(breed.get('weight', {})) == size.lower()
-            ]
-            
-        if energy_level is not None:
-            filtered_breeds = [
-                breed for breed in filtered_breeds
-                if breed.get('energy_level', 0) == energy_level
-            ]
-            
-        if intelligence is not None:
-            filtered_breeds = [
-                breed for breed in filtered_breeds
-                if breed.get('intelligence', 0) == intelligence
-            ]
-            
-        if breed_group:
-            filtered_breeds = [
-                breed for breed in filtered_breeds
-                if breed.get('breed_group', '').lower() == breed_group.lower()
-            ]
-            
-        if temperament:
-            filtered_breeds = [
-                breed for breed in filtered_breeds
-                if temperament.lower() in breed.get('temperament', '').lower()
-            ]
-            
-        return filtered_breeds
+        return index.filter(
+            size=size,
+            energy_level=energy_level,
+            intelligence=intelligence,
+            breed_group=breed_group,
+            temperament=temperament,
+            ranges=ranges,
+            sort_by=sort_by
+        )
+
+    @classmethod
+    def _build_filter_index(cls, breeds: List[Dict[str, Any]]) -> BreedIndex:
+        """Construye el índice de filtrado para una versión del catálogo."""
+        return BreedIndex(breeds, cls._get_size_category)
 
     @classmethod
     def _get_size_category(cls, weight: Dict[str, str]) -> str:
@@ -114,80 +158,165 @@ class DogService:
         Returns:
             str: 'small', 'medium', o 'large'
         """
-        try:
-            # Intentar obtener el peso en kg
-            if 'metric' in weight:
-                weight_str = weight['metric'].split('-')[0].strip()
-                weight_kg = float(weight_str)
-            else:
-                # Si no hay peso en kg, convertir de libras
-                weight_str = weight['imperial'].split('-')[0].strip()
-                weight_lbs = float(weight_str)
-                weight_kg = weight_lbs * 0.453592
-            
-            if weight_kg < 10:
-                return 'small'
-            elif weight_kg < 25:
-                return 'medium'
-            else:
-                return 'large'
-        except (ValueError, KeyError, IndexError):
+        # Peso mínimo en kg (el imperial se convierte si no hay valor métrico)
+        weight_kg, _ = measure_range(weight, NUMERIC_COLUMNS['weight'])
+        if math.isnan(weight_kg):
             return 'medium'  # Valor por defecto si no se puede determinar
+        
+        if weight_kg < 10:
+            return 'small'
+        elif weight_kg < 25:
+            return 'medium'
+        else:
+            return 'large'
 
     @classmethod
     def get_dog_image(cls, reference_image_id: str) -> Dict[str, Any]:
+        """
+        Obtiene los metadatos de una imagen por su reference_image_id.
+        
+        Se sirven desde ImageCache; solo se consulta la API si la imagen no está en caché.
+        
+        Returns:
+            Dict[str, Any]: La imagen, o un diccionario vacío si no existe o la petición falla
+        """
         if not reference_image_id:
             return {}
         try:
-            base_url = cls._get_base_url()
-            headers = cls._get_headers()
-            response = requests.get(f"{base_url}images/{reference_image_id}", headers=headers)
-            response.raise_for_status()
-            return response.json()
+            return cls._image_cache.get(reference_image_id)
         except requests.exceptions.RequestException as e:
             print(f"Error al obtener la imagen del perro: {str(e)}")
             return {}
 
+    @classmethod
+    def _request_image(cls, reference_image_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Pide los metadatos de una imagen a la API.
+        
+        Returns:
+            Optional[Dict[str, Any]]: La imagen, o None si la API no la conoce (404)
+            
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla por otro motivo
+        """
+        base_url = cls._get_base_url()
+        headers = cls._get_headers()
+        response = get_http_client().get(f"{base_url}images/{reference_image_id}", headers=headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
     @classmethod
     def get_all_breeds_with_images(cls) -> List[Dict[str, Any]]:
-        breeds = cls.get_all_breeds()
-        for breed in breeds:
-            if 'reference_image_id' in breed and breed['reference_image_id']:
-                try:
-                    image_data = cls.get_dog_image(breed['reference_image_id'])
-                    breed['image_url'] = image_data.get('url', '')
-                except Exception as e:
-                    print(f"Error al obtener la imagen para la raza {breed.get('id', 'unknown')}: {str(e)}")
-                    breed['image_url'] = ''
-            else:
-                breed['image_url'] = ''
-        return breeds
+        """
+        Obtiene todas las razas de perros con sus respectivas imágenes.
+        
+        Las imágenes se resuelven de forma concurrente (FANOUT_CONCURRENCY) con un
+        plazo total (FANOUT_DEADLINE); las razas cuya imagen falla o no llega a
+        tiempo se devuelven con image_url vacío.
+        
+        Returns:
+            List[Dict[str, Any]]: Una lista de diccionarios con información de razas de perros y sus imágenes
+        """
+        return cls.add_images(cls.get_all_breeds())
+    
+    @classmethod
+    def add_images(cls, breeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Añade a cada raza la URL de su imagen de referencia obtenida de la API.
+        
+        Permite resolver solo las imágenes de una página del catálogo.
+        
+        Args:
+            breeds (List[Dict[str, Any]]): Razas a completar
+            
+        Returns:
+            List[Dict[str, Any]]: Copias de las razas con image_url resuelto
+        """
+        # Solo se piden a la API (de forma concurrente) las imágenes que no están en caché
+        images = cls._image_cache.get_many(breed.get('reference_image_id') for breed in breeds)
+        
+        # Copiar cada raza para no modificar el catálogo en caché
+        return [
+            {**breed, 'image_url': (images.get(breed.get('reference_image_id')) or {}).get('url', '')}
+            for breed in breeds
+        ]
+
+    @classmethod
+    def _fetch_all_breeds(cls) -> List[Dict[str, Any]]:
+        """
+        Descarga y formatea el catálogo completo de razas de The Dog API.
+        
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+        """
+        base_url = cls._get_base_url()
+        headers = cls._get_headers()
+        response = get_http_client().get(f"{base_url}breeds", headers=headers)
+        response.raise_for_status()
+        
+        breeds = response.json()
+        return [cls._format_breed_data(breed) for breed in breeds]
 
     @classmethod
     def get_all_breeds(cls) -> List[Dict[str, Any]]:
         """
         Obtiene todas las razas de perros de The Dog API.
         
+        El catálogo se sirve desde una caché en memoria (CATALOG_CACHE_TTL) y se
+        refresca en segundo plano cuando expira.
+        
         Returns:
             List[Dict[str, Any]]: Una lista de diccionarios con información de razas de perros
         """
         try:
-            base_url = cls._get_base_url()
-            headers = cls._get_headers()
-            response = requests.get(f"{base_url}breeds", headers=headers)
-            response.raise_for_status()
-            
-            breeds = response.json()
-            return [cls._format_breed_data(breed) for breed in breeds]
-            
+            return list(cls._breeds_cache.get())
         except requests.exceptions.RequestException as e:
             print(f"Error al obtener razas de perros: {str(e)}")
             return []
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Any]:
+        """Devuelve los contadores de la caché del catálogo de razas."""
+        return cls._breeds_cache.stats()
+
+    @classmethod
+    def restore_catalog(cls) -> bool:
+        """
+        Restaura el catálogo desde su copia en disco y lo recarga en segundo plano.
+        
+        Los índices de búsqueda y filtrado y las imágenes de referencia se
+        registran para que se construyan con cada versión del catálogo (también
+        la restaurada) antes de publicarla, de modo que ninguna petición pague
+        su construcción.
+        
+        Returns:
+            bool: True si se restauró una copia
+        """
+        cls._breeds_cache.register_derived('lookup', build_lookup)
+        cls._breeds_cache.register_derived('filter_index', cls._build_filter_index)
+        cls._breeds_cache.register_derived('reference_images', cls._build_reference_images)
+        return cls._breeds_cache.restore()
+
+    @classmethod
+    def get_catalog_version(cls) -> Optional[str]:
+        """
+        Devuelve la huella del catálogo de razas en caché sin cargarlo.
+        
+        Returns:
+            Optional[str]: Huella del contenido, o None si el catálogo aún no se ha cargado
+        """
+        return cls._breeds_cache.peek_digest()
     
     @classmethod
     def get_breed_by_id(cls, breed_id: str) -> Dict[str, Any]:
         """
-        Obtiene una raza de perro específica por su ID.
+        Obtiene una raza de perro específica por su ID (o por su nombre).
+        
+        La búsqueda se resuelve en memoria con un índice del catálogo en caché,
+        de modo que los IDs desconocidos se responden sin ir a la API. Solo si
+        el catálogo no está disponible se consulta la raza a la API.
         
         Args:
             breed_id (str): El ID de la raza de perro
@@ -196,45 +325,144 @@ class DogService:
             Dict[str, Any]: Información de la raza de perro en el formato deseado
         """
         try:
-            base_url = cls._get_base_url()
-            headers = cls._get_headers()
-            response = requests.get(f"{base_url}breeds/{breed_id}", headers=headers)
-            response.raise_for_status()
-            
-            breed_data = response.json()
-            return cls._format_breed_data(breed_data)
+            lookup = cls._breeds_cache.get_derived('lookup', build_lookup)
+        except requests.exceptions.RequestException as e:
+            print(f"Catálogo no disponible, consultando la raza {breed_id} a la API: {str(e)}")
+            return cls._fetch_breed_by_id(breed_id)
+        
+        breed = lookup.get(lookup_key(breed_id))
+        return dict(breed) if breed else {}
+
+    @classmethod
+    def get_breeds_by_ids(cls, breed_ids: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        Obtiene varias razas de perro por su ID (o su nombre) en una sola operación.
+        
+        Con el catálogo en caché todas se resuelven en memoria; si no está
+        disponible, se consultan a la API de forma concurrente (FANOUT_CONCURRENCY)
+        con un plazo total (FANOUT_DEADLINE).
+        
+        Args:
+            breed_ids (List[str]): IDs o nombres de las razas
             
+        Returns:
+            Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]: (raza por ID solicitado,
+                error por ID solicitado: 'not_found' o 'unavailable')
+        """
+        breeds: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        try:
+            lookup = cls._breeds_cache.get_derived('lookup', build_lookup)
+        except requests.exceptions.RequestException as e:
+            print(f"Catálogo no disponible, consultando {len(breed_ids)} razas a la API: {str(e)}")
+            results = fan_out(cls._get_breed, breed_ids, default=None)
+        else:
+            results = [lookup.get(lookup_key(breed_id)) or {} for breed_id in breed_ids]
+        
+        for breed_id, breed in zip(breed_ids, results):
+            if breed is None:
+                errors[breed_id] = 'unavailable'
+            elif 'id' not in breed or breed['id'] in (None, ''):
+                errors[breed_id] = 'not_found'
+            else:
+                breeds[breed_id] = dict(breed)
+        return breeds, errors
+
+    @classmethod
+    def _fetch_breed_by_id(cls, breed_id: str) -> Dict[str, Any]:
+        """Obtiene una raza directamente de la API, sin pasar por el catálogo en caché."""
+        try:
+            return cls._get_breed(breed_id)
         except requests.exceptions.RequestException as e:
             print(f"Error al obtener la raza {breed_id}: {str(e)}")
             return {}
 
+    @classmethod
+    def _get_breed(cls, breed_id: str) -> Dict[str, Any]:
+        """
+        Pide una raza a la API a través de la caché compartida (ver cache_backend.py).
+        
+        Mientras el catálogo no está disponible cada raza se pide una sola vez
+        entre todas las instancias; las inexistentes se guardan NEGATIVE_TTL segundos.
+        Con CACHE_BACKEND=memory no se cachea: los IDs llegan de la petición y
+        ese almacén no está acotado.
+        
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+        """
+        shared = get_shared_cache()
+        if not shared.shared:
+            return cls._request_breed(breed_id)
+        return shared.get_or_load(
+            f"breed:dog:{breed_id}",
+            lambda: cls._request_breed(breed_id),
+            lambda breed: cls._breeds_cache.ttl if breed else NEGATIVE_TTL
+        ).value
+
+    @classmethod
+    def _request_breed(cls, breed_id: str) -> Dict[str, Any]:
+        """
+        Pide una raza a la API y la formatea.
+        
+        Returns:
+            Dict[str, Any]: La raza, o un diccionario vacío si la API no la conoce (404)
+            
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla por otro motivo
+        """
+        base_url = cls._get_base_url()
+        headers = cls._get_headers()
+        response = get_http_client().get(f"{base_url}breeds/{breed_id}", headers=headers)
+        if response.status_code == 404:
+            return {}
+        response.raise_for_status()
+        return cls._format_breed_data(response.json() or {})
+
+    @classmethod
+    def _search_images(cls, breed_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """
+        Busca imágenes aleatorias en The Dog API (de una raza o de cualquiera).
+        
+        Args:
+            breed_id (Optional[str]): ID de la raza, o None para cualquier raza
+            limit (int): Número de imágenes a pedir
+            
+        Raises:
+            requests.exceptions.RequestException: Si la petición falla
+        """
+        params = {
+            'size': 'med',           # Tamaño de imagen: med (medio)
+            'mime_types': 'jpg',     # Formato de imagen: JPG
+            'format': 'json',        # Formato de respuesta: JSON
+            'has_breeds': 'true',    # Incluir información de la raza
+            'order': 'RANDOM',       # Orden aleatorio de las imágenes
+            'page': 0,               # Primera página de resultados
+            'limit': limit
+        }
+        if breed_id is not None:
+            params['breed_id'] = breed_id  # ID de la raza específica
+        
+        base_url = cls._get_base_url()
+        headers = cls._get_headers()
+        # Cada búsqueda aleatoria debe ir a la API: no se agrupa con otras iguales
+        response = get_http_client().get(f"{base_url}images/search", coalesce=False, headers=headers, params=params)
+        response.raise_for_status()
+        return response.json() or []
+
     @classmethod
     def get_random_dog_image(cls) -> Dict[str, Any]:
         """
         Obtiene una imagen aleatoria de un perro.
         
+        La imagen se toma del depósito global de ImagePool, que un hilo de fondo
+        mantiene con imágenes aleatorias de The Dog API.
+        
         Returns:
             Dict[str, Any]: Un diccionario con la información de la imagen o un diccionario vacío en caso de error
         """
         try:
-            base_url = cls._get_base_url()
-            headers = cls._get_headers()
-            response = requests.get(
-                f"{base_url}images/search",
-                headers=headers,
-                params={
-                    'size': 'med',
-                    'mime_types': 'jpg',
-                    'format': 'json',
-                    'has_breeds': 'true',
-                    'order': 'RANDOM',
-                    'page': 0,
-                    'limit': 1
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data[0] if data else {}
+            images = cls._image_pool.take(GLOBAL, 1)
+            return images[0] if images else {}
         except requests.exceptions.RequestException as e:
             print(f"Error al obtener la imagen aleatoria del perro: {str(e)}")
             return {}
@@ -244,9 +472,9 @@ class DogService:
         """
         Obtiene imágenes aleatorias de una raza específica.
         
-        Este método hace una petición a The Dog API para obtener imágenes aleatorias
-        de una raza específica. Las imágenes se obtienen de forma aleatoria cada vez
-        que se llama al método.
+        Las imágenes se eligen al azar del depósito de la raza en ImagePool, que
+        se rellena en segundo plano desde The Dog API; solo se consulta la API
+        durante la petición si el depósito no tiene suficientes imágenes.
         
         Args:
             breed_id (str): ID de la raza (ej: 'labrador', 'husky', 'affenpinscher')
@@ -270,42 +498,18 @@ class DogService:
                 }
         """
         try:
-            # Construir la URL base y headers para la petición
-            base_url = cls._get_base_url()
-            headers = cls._get_headers()
-            
-            # Obtener más imágenes de las necesarias para asegurar aleatoriedad
-            response = requests.get(
-                f"{base_url}images/search",
-                headers=headers,
-                params={
-                    'size': 'med',           # Tamaño de imagen: med (medio)
-                    'mime_types': 'jpg',     # Formato de imagen: JPG
-                    'format': 'json',        # Formato de respuesta: JSON
-                    'has_breeds': 'true',    # Incluir información de la raza
-                    'breed_id': breed_id,    # ID de la raza específica
-                    'order': 'RANDOM',       # Orden aleatorio de las imágenes
-                    'page': 0,               # Primera página de resultados
-                    'limit': limit * 2       # Pedir el doble de imágenes para tener más opciones
-                }
-            )
-            
-            # Verificar si la petición fue exitosa
-            response.raise_for_status()
-            
-            # Obtener todas las imágenes
-            all_images = response.json()
-            
-            # Si no hay suficientes imágenes, devolver las que hay
-            if len(all_images) <= limit:
-                return all_images
-            
-            # Seleccionar aleatoriamente 'limit' imágenes del conjunto
-            import random
-            random.shuffle(all_images)
-            return all_images[:limit]
-            
+            return cls._image_pool.take(str(breed_id), limit)
         except requests.exceptions.RequestException as e:
             # Manejar errores de la petición (red, API, etc.)
             print(f"Error al obtener imágenes aleatorias de la raza {breed_id}: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+
+    @classmethod
+    def get_image_cache_stats(cls) -> Dict[str, Any]:
+        """Devuelve el tamaño y la tasa de aciertos de la caché de metadatos de imagen."""
+        return cls._image_cache.stats()
+
+    @classmethod
+    def get_image_pool_stats(cls) -> Dict[str, Any]:
+        """Devuelve la profundidad y el ritmo de relleno de los depósitos de imágenes."""
+        return cls._image_pool.stats()
@@ -0,0 +1,98 @@
+import os
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_DEADLINE = 10.0
+
+
+def get_concurrency() -> int:
+    """Número máximo de llamadas simultáneas por lote (FANOUT_CONCURRENCY)."""
+    try:
+        return max(1, int(os.getenv('FANOUT_CONCURRENCY', DEFAULT_CONCURRENCY)))
+    except ValueError:
+        return DEFAULT_CONCURRENCY
+
+
+def get_deadline() -> float:
+    """Tiempo máximo en segundos para completar un lote (FANOUT_DEADLINE)."""
+    try:
+        return float(os.getenv('FANOUT_DEADLINE', DEFAULT_DEADLINE))
+    except ValueError:
+        return DEFAULT_DEADLINE
+
+
+def fan_out(func: Callable[[Any], Any],
+            items: Iterable[Any],
+            max_workers: Optional[int] = None,
+            deadline: Optional[float] = None,
+            default: Any = None) -> List[Any]:
+    """
+    Ejecuta func sobre cada elemento de forma concurrente y acotada.
+
+    Los fallos de cada elemento quedan aislados: si func lanza una excepción
+    o no termina antes del plazo, su resultado es `default`. El lote nunca
+    tarda más que el plazo, aunque queden llamadas en curso.
+
+    Args:
+        func (Callable): Función a aplicar a cada elemento
+        items (Iterable): Elementos a procesar
+        max_workers (int): Límite de concurrencia (por defecto FANOUT_CONCURRENCY)
+        deadline (float): Plazo total en segundos (por defecto FANOUT_DEADLINE)
+        default (Any): Valor para los elementos que fallan o no terminan a tiempo
+
+    Returns:
+        List[Any]: Resultados en el mismo orden que los elementos
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    max_workers = min(max_workers or get_concurrency(), len(items))
+    deadline = deadline if deadline is not None else get_deadline()
+
+    # Los servicios registran errores con current_app.logger, así que cada
+    # hilo trabaja dentro del contexto de la aplicación que originó el lote
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def run(item):
+        if app is None:
+            return func(item)
+        with app.app_context():
+            return func(item)
+
+    results = [default] * len(items)
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fanout')
+    try:
+        # Cada elemento hereda las variables de contexto de la petición (p. ej. las métricas)
+        futures: Dict[Any, int] = {
+            executor.submit(contextvars.copy_context().run, run, item): index
+            for index, item in enumerate(items)
+        }
+        done, pending = wait(futures, timeout=deadline)
+
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                logger.warning(f"Error en un elemento del lote: {str(e)}")
+
+        if pending:
+            logger.warning(
+                f"Plazo de {deadline}s agotado: {len(pending)} de {len(items)} elementos sin resolver "
+                f"({time.monotonic() - started:.2f}s)"
+            )
+    finally:
+        # No esperar a las llamadas pendientes; están acotadas por los timeouts HTTP
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
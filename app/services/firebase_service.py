@@ -1,5 +1,3 @@
-import firebase_admin
-from firebase_admin import firestore, credentials
 from flask import current_app
 import json
 import os
@@ -27,6 +25,9 @@ def _get_credentials():
     # Intentar obtener las credenciales de las variables de entorno
     firebase_creds_json = os.getenv('FIREBASE_CREDENTIALS_JSON')
     
+    # firebase_admin (y con él grpc y google-cloud) se importa solo al usar Firestore
+    from firebase_admin import credentials
+    
     if firebase_creds_json:
         try:
             # Intentar cargar como JSON
@@ -63,6 +64,9 @@ def init_firebase():
         return db
     
     try:
+        import firebase_admin
+        from firebase_admin import firestore
+        
         # Obtener credenciales
         cred = _get_credentials()
         
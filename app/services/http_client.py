@@ -0,0 +1,236 @@
+import os
+import time
+import threading
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.services.single_flight import SingleFlight
+from app.services.metrics import http_operation, track_upstream, upstream_span
+from app.services.circuit_breaker import Bulkhead, get_breaker
+
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class UpstreamClient:
+    """
+    Cliente HTTP compartido para las APIs externas (The Cat API, The Dog API).
+
+    Reutiliza una única requests.Session con un pool de conexiones por host
+    (keep-alive), aplica timeouts de conexión y lectura a todas las peticiones
+    y reintenta los GET con backoff exponencial y jitter. Cada host tiene un
+    interruptor de circuito y un límite de llamadas simultáneas (ver
+    circuit_breaker.py): si el host falla o se vuelve lento, las llamadas se
+    rechazan al instante con UpstreamUnavailable.
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self,
+                 pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None,
+                 retries: Optional[int] = None,
+                 backoff: Optional[float] = None):
+        """
+        Args:
+            pool_size (int): Conexiones por host (por defecto UPSTREAM_POOL_SIZE o WAITRESS_THREADS + FANOUT_CONCURRENCY)
+            connect_timeout (float): Timeout de conexión en segundos (UPSTREAM_CONNECT_TIMEOUT)
+            read_timeout (float): Timeout de lectura en segundos (UPSTREAM_READ_TIMEOUT)
+            retries (int): Reintentos para peticiones idempotentes (UPSTREAM_RETRIES)
+            backoff (float): Factor de backoff exponencial en segundos (UPSTREAM_BACKOFF)
+        """
+        # Cada hilo de waitress puede lanzar un lote concurrente (ver fanout.py),
+        # así que el pool cubre ambos para no descartar conexiones keep-alive
+        threads = _env_int('WAITRESS_THREADS', 4) + _env_int('FANOUT_CONCURRENCY', 8)
+        self.pool_size = pool_size or _env_int('UPSTREAM_POOL_SIZE', threads)
+        self.timeout = (
+            connect_timeout or _env_float('UPSTREAM_CONNECT_TIMEOUT', 3.05),
+            read_timeout or _env_float('UPSTREAM_READ_TIMEOUT', 10.0)
+        )
+        retries = retries if retries is not None else _env_int('UPSTREAM_RETRIES', 2)
+        backoff = backoff if backoff is not None else _env_float('UPSTREAM_BACKOFF', 0.2)
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=self.pool_size,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, int]] = {}
+        self._bulkheads: Dict[str, Bulkhead] = {}
+        self._single_flight = SingleFlight()
+
+    def get(self, url: str, coalesce: bool = True, **kwargs) -> requests.Response:
+        """
+        Realiza un GET usando el pool compartido.
+
+        Acepta los mismos argumentos que requests.get; si no se indica timeout
+        se usa el configurado en el cliente. Con coalesce=True, los GET
+        concurrentes a la misma URL con los mismos parámetros comparten una
+        única petición y su respuesta (que los llamadores no deben modificar).
+        Las búsquedas aleatorias deben usar coalesce=False.
+        """
+        # La espera cuenta como tiempo externo aunque otra petición haga la llamada
+        with upstream_span():
+            if not coalesce:
+                return self._get(url, **kwargs)
+
+            params = kwargs.get('params') or {}
+            key = (url, tuple(sorted((str(k), str(v)) for k, v in params.items())))
+            return self._single_flight.do(key, lambda: self._get(url, **kwargs))
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET sin agrupar, con timeouts, interruptor de circuito y contadores por host.
+
+        Raises:
+            UpstreamUnavailable: Si el circuito del host está abierto o su cupo de llamadas está lleno
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        parts = urlsplit(url)
+        host = parts.netloc
+        breaker = get_breaker(host)
+        bulkhead = self._bulkhead(host)
+
+        bulkhead.acquire()
+        try:
+            probe = breaker.allow()
+        except Exception:
+            bulkhead.release()
+            raise
+
+        self._enter(host)
+        failed = True
+        started = time.perf_counter()
+        try:
+            with track_upstream(host, http_operation(parts.path)) as call:
+                response = self.session.get(url, **kwargs)
+                call.status = response.status_code
+                failed = response.status_code in self.RETRY_STATUS
+                return response
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._hosts[host]['errors'] += 1
+            raise
+        finally:
+            breaker.record(probe, failed, time.perf_counter() - started)
+            bulkhead.release()
+            self._leave(host)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Devuelve la utilización de los pools por host.
+
+        Returns:
+            Dict[str, Any]: Tamaño del pool y, por host, peticiones en curso,
+            pico de concurrencia, conexiones abiertas y conexiones ociosas
+        """
+        with self._lock:
+            hosts = {host: dict(counters) for host, counters in self._hosts.items()}
+            bulkheads = dict(self._bulkheads)
+        for host, bulkhead in bulkheads.items():
+            hosts.setdefault(host, {})['bulkhead'] = bulkhead.stats()
+            hosts[host]['circuit'] = get_breaker(host).stats()
+
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.host}:{pool.port}" if pool.port not in (80, 443, None) else pool.host
+            entry = hosts.setdefault(host, {})
+            entry['connections_opened'] = pool.num_connections
+            # La cola del pool contiene None en los huecos sin conexión abierta
+            idle = [conn for conn in list(pool.pool.queue) if conn is not None] if pool.pool is not None else []
+            entry['idle_connections'] = len(idle)
+
+        return {
+            'pool_size': self.pool_size,
+            'timeout': {'connect': self.timeout[0], 'read': self.timeout[1]},
+            'single_flight': self._single_flight.stats(),
+            'hosts': hosts
+        }
+
+    def close(self) -> None:
+        """Cierra todas las conexiones del pool."""
+        self.session.close()
+
+    def _bulkhead(self, host: str) -> Bulkhead:
+        bulkhead = self._bulkheads.get(host)
+        if bulkhead is None:
+            with self._lock:
+                bulkhead = self._bulkheads.setdefault(host, Bulkhead(host))
+        return bulkhead
+
+    def _enter(self, host: str) -> None:
+        with self._lock:
+            counters = self._hosts.setdefault(host, {
+                'requests': 0,
+                'errors': 0,
+                'in_flight': 0,
+                'peak_in_flight': 0
+            })
+            counters['requests'] += 1
+            counters['in_flight'] += 1
+            counters['peak_in_flight'] = max(counters['peak_in_flight'], counters['in_flight'])
+
+    def _leave(self, host: str) -> None:
+        with self._lock:
+            self._hosts[host]['in_flight'] -= 1
+
+
+# Instancia compartida, creada en el primer uso
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> UpstreamClient:
+    """
+    Obtiene el cliente HTTP compartido, creándolo si es necesario.
+
+    Returns:
+        UpstreamClient: Cliente compartido por CatService y DogService
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = UpstreamClient()
+                logger.info(f"Cliente HTTP compartido creado (pool de {_client.pool_size} conexiones por host)")
+    return _client
@@ -0,0 +1,282 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.services.fanout import fan_out
+from app.services.cache_backend import get_shared_cache
+from app.services.metrics import IMAGE_CACHE_BYTES, IMAGE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Memoria aproximada que ocupa cada entrada además de su contenido (clave, entrada, enlaces del LRU)
+ENTRY_OVERHEAD = 160
+
+# Resultado de fan_out para las imágenes que no se pudieron obtener
+_FAILED = object()
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'expires_at')
+
+    def __init__(self, value: Optional[Dict[str, Any]], size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+
+class ImageCache:
+    """
+    Caché LRU con TTL de los metadatos de imagen, por reference_image_id.
+
+    La memoria está acotada por bytes (tamaño del JSON de cada imagen más
+    ENTRY_OVERHEAD): al superar IMAGE_CACHE_MAX_BYTES se expulsan las
+    entradas usadas hace más tiempo. Las imágenes que la API no conoce (404)
+    también se guardan, con un TTL más corto (caché negativa), para no
+    repetir la consulta. Los fallos de red no se guardan.
+
+    Con un almacén compartido (CACHE_BACKEND=file o redis) las imágenes que
+    faltan en memoria se buscan primero en él, y las que se piden a la API
+    se publican para el resto de instancias.
+    """
+
+    DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+    DEFAULT_TTL = 86400
+    DEFAULT_NEGATIVE_TTL = 300
+
+    def __init__(self,
+                 name: str,
+                 fetcher: Callable[[str], Optional[Dict[str, Any]]],
+                 max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None,
+                 negative_ttl: Optional[float] = None):
+        """
+        Args:
+            name (str): Nombre de la caché (estadísticas y métricas)
+            fetcher (Callable): Obtiene una imagen de la API; devuelve None si no existe y lanza una excepción si falla
+            max_bytes (int): Memoria máxima aproximada (IMAGE_CACHE_MAX_BYTES)
+            ttl (float): Segundos de vigencia de una imagen (IMAGE_CACHE_TTL)
+            negative_ttl (float): Segundos de vigencia de una imagen inexistente (IMAGE_CACHE_NEGATIVE_TTL)
+        """
+        self.name = name
+        self._fetcher = fetcher
+        self.max_bytes = int(max_bytes or _env_number('IMAGE_CACHE_MAX_BYTES', self.DEFAULT_MAX_BYTES))
+        self.ttl = ttl if ttl is not None else _env_number('IMAGE_CACHE_TTL', self.DEFAULT_TTL)
+        self.negative_ttl = (negative_ttl if negative_ttl is not None
+                             else _env_number('IMAGE_CACHE_NEGATIVE_TTL', self.DEFAULT_NEGATIVE_TTL))
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'shared_hits': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def lookup(self, image_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Separa las imágenes en caché de las que hay que pedir a la API.
+
+        Returns:
+            Tuple[Dict[str, Dict[str, Any]], List[str]]: (imagen por ID, con {} para las
+                inexistentes; IDs sin entrada vigente, sin duplicados)
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        misses: List[str] = []
+        now = time.monotonic()
+        hits = negative_hits = 0
+
+        with self._lock:
+            for image_id in dict.fromkeys(image_id for image_id in image_ids if image_id):
+                entry = self._entries.get(image_id)
+                if entry is not None and entry.expires_at <= now:
+                    self._remove(image_id)
+                    self._stats['expirations'] += 1
+                    entry = None
+                if entry is None:
+                    misses.append(image_id)
+                    continue
+                self._entries.move_to_end(image_id)
+                if entry.value is None:
+                    negative_hits += 1
+                    found[image_id] = {}
+                else:
+                    hits += 1
+                    found[image_id] = entry.value
+            self._stats['hits'] += hits
+            self._stats['negative_hits'] += negative_hits
+            self._stats['misses'] += len(misses)
+
+        for result, count in (('hit', hits), ('negative_hit', negative_hits), ('miss', len(misses))):
+            if count:
+                IMAGE_CACHE_LOOKUPS.inc(self.name, result, amount=count)
+        return found, misses
+
+    def peek(self, image_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Devuelve una imagen vigente de la caché sin contarla en las estadísticas ni pedirla a la API.
+
+        Returns:
+            Optional[Dict[str, Any]]: La imagen, o None si no está en caché (o no existe)
+        """
+        with self._lock:
+            entry = self._entries.get(image_id)
+            if entry is None or entry.expires_at <= time.monotonic():
+                return None
+            return entry.value
+
+    def put(self, image_id: str, value: Optional[Dict[str, Any]]) -> None:
+        """
+        Guarda una imagen obtenida de la API.
+
+        Args:
+            image_id (str): reference_image_id
+            value (Optional[Dict[str, Any]]): La imagen, o None si la API no la conoce
+        """
+        size = ENTRY_OVERHEAD + len(image_id) + (len(json.dumps(value, default=str)) if value is not None else 0)
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if size > self.max_bytes or ttl <= 0:
+            return
+
+        with self._lock:
+            self._remove(image_id)
+            self._entries[image_id] = _Entry(value, size, time.monotonic() + ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+            IMAGE_CACHE_BYTES.set(self.name, value=self._bytes)
+
+    def load(self, image_id: str) -> Dict[str, Any]:
+        """
+        Pide una imagen a la API y la guarda en caché.
+
+        Returns:
+            Dict[str, Any]: La imagen, o {} si no existe
+
+        Raises:
+            Exception: La excepción del fetcher si la petición falla
+        """
+        shared = get_shared_cache()
+        if shared.shared:
+            value = shared.get_or_load(self._shared_key(image_id), lambda: self._fetcher(image_id), self._ttl_for).value
+        else:
+            value = self._fetcher(image_id)
+        self.put(image_id, value)
+        return value or {}
+
+    def get(self, image_id: str) -> Dict[str, Any]:
+        """
+        Obtiene una imagen, desde la caché o desde la API.
+
+        Returns:
+            Dict[str, Any]: La imagen, o {} si no existe
+
+        Raises:
+            Exception: La excepción del fetcher si no está en caché y la petición falla
+        """
+        found, misses = self.lookup([image_id])
+        if misses:
+            return self.load(image_id)
+        return found.get(image_id, {})
+
+    def get_many(self, image_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Obtiene varias imágenes; solo las que no están en caché se piden a la API.
+
+        Los fallos se piden de forma concurrente (FANOUT_CONCURRENCY) con un
+        plazo total (FANOUT_DEADLINE).
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Imagen por ID ({} si no existe); las que fallan no se incluyen
+        """
+        found, misses = self.lookup(image_ids)
+        if misses:
+            misses = self.load_shared(misses, found)
+        if len(misses) == 1:
+            try:
+                found[misses[0]] = self.load(misses[0])
+            except Exception as e:
+                logger.warning(f"Error al obtener la imagen {misses[0]} ({self.name}): {str(e)}")
+        elif misses:
+            for image_id, image in zip(misses, fan_out(self.load, misses, default=_FAILED)):
+                if image is not _FAILED:
+                    found[image_id] = image
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            IMAGE_CACHE_BYTES.set(self.name, value=0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tamaño de la caché, contadores y tasa de aciertos."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['negative_hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'negative_entries': sum(1 for entry in self._entries.values() if entry.value is None),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'negative_ttl': self.negative_ttl,
+                'hit_ratio': round((self._stats['hits'] + self._stats['negative_hits']) / lookups, 4) if lookups else None,
+                **self._stats
+            }
+
+    def load_shared(self, image_ids: List[str], found: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Completa found con las imágenes que están en la caché compartida (una sola lectura).
+
+        Args:
+            image_ids (List[str]): IDs que no están en memoria (los fallos de lookup)
+            found (Dict[str, Dict[str, Any]]): Imágenes encontradas, que se completa
+
+        Returns:
+            List[str]: IDs que tampoco están en la caché compartida
+        """
+        shared = get_shared_cache()
+        if not shared.shared:
+            return image_ids
+
+        remaining = []
+        for image_id, entry in zip(image_ids, shared.get_many([self._shared_key(image_id) for image_id in image_ids])):
+            if entry is None:
+                remaining.append(image_id)
+                continue
+            self.put(image_id, entry.value)
+            found[image_id] = entry.value or {}
+
+        hits = len(image_ids) - len(remaining)
+        if hits:
+            with self._lock:
+                self._stats['shared_hits'] += hits
+            IMAGE_CACHE_LOOKUPS.inc(self.name, 'shared_hit', amount=hits)
+        return remaining
+
+    def _shared_key(self, image_id: str) -> str:
+        return f"image:{self.name}:{image_id}"
+
+    def _ttl_for(self, value: Optional[Dict[str, Any]]) -> float:
+        return self.ttl if value is not None else self.negative_ttl
+
+    def _remove(self, image_id: str) -> None:
+        """Quita una entrada si existe (requiere self._lock)."""
+        entry = self._entries.pop(image_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
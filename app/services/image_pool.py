@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import threading
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Clave del depósito global (imágenes de cualquier raza)
+GLOBAL = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class ImagePool:
+    """
+    Depósitos de imágenes aleatorias rellenados en segundo plano.
+
+    Hay un depósito global y uno por raza. Cada petición toma imágenes al azar
+    del depósito correspondiente sin ir a la API; cuando un depósito baja de la
+    marca inferior, un hilo de fondo lo rellena hasta la marca superior. Solo
+    si el depósito no tiene suficientes imágenes se consulta la API en línea.
+
+    Las razas para las que la API devolvió menos imágenes de las pedidas
+    (pero alguna) tienen todas sus imágenes en el depósito: se eligen
+    muestras sin sacarlas y no se vuelve a consultar la API por ellas hasta
+    que pasan IMAGE_POOL_SMALL_TTL segundos. Una respuesta vacía no marca
+    la raza, de modo que un fallo puntual de la API no la deja sin imágenes.
+    """
+
+    def __init__(self,
+                 fetcher: Callable[[Optional[str], int], List[Dict[str, Any]]],
+                 low: Optional[int] = None,
+                 high: Optional[int] = None,
+                 max_breeds: Optional[int] = None,
+                 small_ttl: Optional[float] = None):
+        """
+        Args:
+            fetcher (Callable): Recibe (breed_id o None, cantidad) y devuelve imágenes; lanza una excepción si falla
+            low (int): Marca inferior que dispara el relleno (IMAGE_POOL_LOW)
+            high (int): Marca superior hasta la que se rellena (IMAGE_POOL_HIGH)
+            max_breeds (int): Máximo de depósitos por raza en memoria (IMAGE_POOL_MAX_BREEDS)
+            small_ttl (float): Segundos hasta volver a consultar una raza con pocas imágenes (IMAGE_POOL_SMALL_TTL)
+        """
+        self._fetcher = fetcher
+        self.low = low or _env_int('IMAGE_POOL_LOW', 10)
+        self.high = max(high or _env_int('IMAGE_POOL_HIGH', 30), self.low + 1)
+        self.max_breeds = max_breeds or _env_int('IMAGE_POOL_MAX_BREEDS', 256)
+        self.small_ttl = small_ttl if small_ttl is not None else _env_int('IMAGE_POOL_SMALL_TTL', 3600)
+
+        self._reservoirs: "OrderedDict[Optional[str], List[Dict[str, Any]]]" = OrderedDict()
+        self._pending: "OrderedDict[Optional[str], None]" = OrderedDict()
+        # Razas con todas sus imágenes en el depósito, con el instante (monotonic) en que caducan
+        self._small: Dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        self._refill_log: Deque[tuple] = deque()
+        self._stats = {
+            'served': 0,
+            'sync_fetches': 0,
+            'refills': 0,
+            'refill_errors': 0,
+            'images_fetched': 0
+        }
+
+    def take(self, key: Optional[str], count: int) -> List[Dict[str, Any]]:
+        """
+        Toma hasta `count` imágenes distintas al azar del depósito de `key`.
+
+        Args:
+            key (Optional[str]): ID de la raza, o None para el depósito global
+            count (int): Número de imágenes deseadas
+
+        Returns:
+            List[Dict[str, Any]]: Imágenes elegidas (menos si la raza no tiene tantas)
+
+        Raises:
+            Exception: La excepción del fetcher si el depósito está vacío y la consulta falla
+        """
+        images = self.try_take(key, count)
+        if images is not None:
+            return images
+
+        # Depósito insuficiente: consultar la API en línea y guardar el sobrante
+        requested = self.sync_fetch_size(count)
+        fetched = self._fetcher(key, requested)
+        return self.add_and_take(key, fetched, count, requested)
+
+    def try_take(self, key: Optional[str], count: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Como take(), pero sin consultar nunca la API.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Imágenes elegidas, o None si el depósito no tiene suficientes
+        """
+        self._ensure_worker()
+        with self._lock:
+            return self._take_locked(key, count)
+
+    def sync_fetch_size(self, count: int) -> int:
+        """Número de imágenes a pedir cuando un depósito no alcanza para una petición."""
+        return max(count * 2, self.high)
+
+    def add_and_take(self, key: Optional[str], images: List[Dict[str, Any]], count: int,
+                     requested: int) -> List[Dict[str, Any]]:
+        """
+        Guarda imágenes obtenidas durante una petición y toma hasta `count` de ellas.
+
+        No programa un relleno: la siguiente petición lo hará si hace falta.
+
+        Args:
+            requested (int): Imágenes pedidas a la API (para saber si la raza tiene menos)
+        """
+        with self._lock:
+            self._stats['sync_fetches'] += 1
+            self._add_locked(key, images, requested)
+            return self._take_locked(key, count, allow_short=True, refill=False) or []
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de cada depósito y ritmo de relleno (imágenes por minuto)."""
+        with self._lock:
+            self._trim_refill_log()
+            return {
+                'low_watermark': self.low,
+                'high_watermark': self.high,
+                'depth': {('global' if key is GLOBAL else key): len(items) for key, items in self._reservoirs.items()},
+                'pending_refills': len(self._pending),
+                'small_reservoirs': len(self._small),
+                'images_per_minute': sum(count for _, count in self._refill_log),
+                **self._stats
+            }
+
+    def _take_locked(self, key: Optional[str], count: int, allow_short: bool = False,
+                     refill: bool = True) -> Optional[List[Dict[str, Any]]]:
+        items = self._reservoirs.get(key)
+        expires = self._small.get(key)
+        if expires is not None and time.monotonic() >= expires:
+            # Volver a comprobar la raza: si no alcanza, se consulta la API
+            del self._small[key]
+            expires = None
+        small = expires is not None
+        if items is None or (len(items) < count and not (allow_short or small)):
+            return None
+        self._reservoirs.move_to_end(key)
+
+        if small:
+            # La raza no tiene más imágenes: se muestrean sin vaciar el depósito
+            chosen = random.sample(items, min(count, len(items)))
+        else:
+            positions = sorted(random.sample(range(len(items)), min(count, len(items))), reverse=True)
+            chosen = [items.pop(position) for position in positions]
+            random.shuffle(chosen)
+        self._stats['served'] += len(chosen)
+
+        if refill and not small and len(items) < self.low:
+            self._pending[key] = None
+            self._wakeup.notify()
+        return chosen
+
+    def _add_locked(self, key: Optional[str], images: List[Dict[str, Any]], requested: int) -> int:
+        """
+        Añade imágenes nuevas al depósito y decide si la raza es pequeña.
+
+        La raza es pequeña si la API devolvió menos imágenes de las pedidas,
+        pero alguna; una respuesta completa la vuelve a tratar como normal.
+        """
+        items = self._reservoirs.setdefault(key, [])
+        self._reservoirs.move_to_end(key)
+        known = {image.get('id') for image in items}
+        added = 0
+        for image in images:
+            if image.get('id') not in known:
+                known.add(image.get('id'))
+                items.append(image)
+                added += 1
+        if key is not GLOBAL and 0 < len(images) < requested:
+            self._small[key] = time.monotonic() + self.small_ttl
+        elif len(images) >= requested:
+            self._small.pop(key, None)
+
+        # Mantener acotado el número de depósitos por raza
+        while len(self._reservoirs) > self.max_breeds + 1:
+            oldest = next(k for k in self._reservoirs if k is not GLOBAL)
+            del self._reservoirs[oldest]
+            self._pending.pop(oldest, None)
+            self._small.pop(oldest, None)
+        return added
+
+    def _trim_refill_log(self) -> None:
+        cutoff = time.monotonic() - 60
+        while self._refill_log and self._refill_log[0][0] < cutoff:
+            self._refill_log.popleft()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='image-pool-refill', daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Bucle del hilo de relleno."""
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                key, _ = self._pending.popitem(last=False)
+                depth = len(self._reservoirs.get(key, []))
+            if depth >= self.high:
+                continue
+
+            requested = self.high - depth
+            try:
+                images = self._fetcher(key, requested)
+            except Exception as e:
+                with self._lock:
+                    self._stats['refill_errors'] += 1
+                logger.error(f"Error al rellenar el depósito de imágenes {key or 'global'}: {str(e)}")
+                # Evitar martillear la API si está caída
+                time.sleep(1)
+                continue
+
+            with self._lock:
+                added = self._add_locked(key, images, requested)
+                self._stats['refills'] += 1
+                self._stats['images_fetched'] += len(images)
+                self._refill_log.append((time.monotonic(), added))
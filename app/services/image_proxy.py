@@ -0,0 +1,295 @@
+import os
+import re
+import mimetypes
+import tempfile
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from app.services.http_client import get_http_client
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.image_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# Tamaño de los bloques con los que se copia la descarga a disco
+CHUNK_SIZE = 64 * 1024
+
+# IDs de imagen admitidos (también son el nombre del archivo en disco)
+_IMAGE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class ImageTooLarge(requests.exceptions.RequestException):
+    """La imagen de la CDN supera IMAGE_PROXY_MAX_IMAGE_BYTES; la descarga se interrumpe."""
+
+
+def is_enabled() -> bool:
+    """Indica si el proxy de imágenes está activado (IMAGE_PROXY_ENABLED)."""
+    return os.getenv('IMAGE_PROXY_ENABLED', 'False') == 'True'
+
+
+def proxy_url(image_id: str) -> str:
+    """URL de una imagen servida por el proxy (IMAGE_PROXY_BASE_URL + /api/images/<id>)."""
+    return f"{os.getenv('IMAGE_PROXY_BASE_URL', '').rstrip('/')}/api/images/{image_id}"
+
+
+def rewrite_url(image_id: str, url: str) -> str:
+    """
+    Sustituye la URL de la CDN de una imagen por la del proxy si está activado.
+
+    Las imágenes sin URL (no resueltas) se dejan vacías.
+    """
+    if url and image_id and is_enabled():
+        return proxy_url(image_id)
+    return url
+
+
+def rewrite_breed(breed: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copia de una raza con image_url reescrita para el proxy si está activado.
+
+    El catálogo guardado (memoria, disco y caché compartida) conserva las URL
+    de la CDN; se reescriben al construir cada respuesta, de modo que nodos
+    con distinta configuración pueden compartir el mismo catálogo.
+    """
+    if not is_enabled():
+        return breed
+    return {**breed, 'image_url': rewrite_url(breed.get('reference_image_id'), breed.get('image_url', ''))}
+
+
+def rewrite_breeds(breeds: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aplica rewrite_breed a una lista de razas (sin copiarlas si el proxy está desactivado)."""
+    if not is_enabled():
+        return breeds
+    return [rewrite_breed(breed) for breed in breeds]
+
+
+def valid_image_id(image_id: str) -> bool:
+    return bool(_IMAGE_ID.match(image_id or ''))
+
+
+class StoredImage(NamedTuple):
+    """Imagen guardada en disco, lista para servirse con send_file."""
+    path: str
+    mimetype: str
+    size: int
+
+
+class ImageStore:
+    """
+    Caché en disco de los archivos de imagen, con expulsión LRU por tamaño total.
+
+    Cada imagen se guarda como <id><extensión> en IMAGE_PROXY_DIR; el índice
+    en memoria (orden de uso y tamaños) se reconstruye al arrancar a partir de
+    los archivos existentes. Cuando el total supera IMAGE_PROXY_MAX_BYTES se
+    borran las imágenes usadas hace más tiempo. Las descargas se copian a
+    disco por bloques y se interrumpen si superan IMAGE_PROXY_MAX_IMAGE_BYTES.
+    Las descargas de una misma
+    imagen se agrupan (SingleFlight), de modo que la CDN recibe una sola
+    petición aunque muchos clientes pidan la imagen a la vez.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 max_image_bytes: Optional[int] = None):
+        """
+        Args:
+            directory (str): Directorio de la caché (IMAGE_PROXY_DIR)
+            max_bytes (int): Tamaño total máximo en bytes (IMAGE_PROXY_MAX_BYTES)
+            max_image_bytes (int): Tamaño máximo de una imagen en bytes (IMAGE_PROXY_MAX_IMAGE_BYTES)
+        """
+        self.directory = directory or os.getenv('IMAGE_PROXY_DIR') or DEFAULT_DIR
+        if max_bytes is None:
+            try:
+                max_bytes = int(os.getenv('IMAGE_PROXY_MAX_BYTES', DEFAULT_MAX_BYTES))
+            except ValueError:
+                max_bytes = DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+        if max_image_bytes is None:
+            try:
+                max_image_bytes = int(os.getenv('IMAGE_PROXY_MAX_IMAGE_BYTES', DEFAULT_MAX_IMAGE_BYTES))
+            except ValueError:
+                max_image_bytes = DEFAULT_MAX_IMAGE_BYTES
+        self.max_image_bytes = max_image_bytes
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'not_found': 0,
+            'too_large': 0,
+            'evictions': 0
+        }
+        self._scan()
+
+    def get(self, image_id: str, source: Callable[[], Optional[str]]) -> Optional[StoredImage]:
+        """
+        Devuelve la imagen desde disco, descargándola de la CDN si no está.
+
+        Una imagen ya guardada se sirve aunque no se pueda resolver su origen
+        (p. ej. si el catálogo no está disponible).
+
+        Args:
+            image_id (str): ID de la imagen (validado con valid_image_id)
+            source (Callable): Devuelve la URL de la imagen en la CDN, o None si
+                la imagen no es conocida; solo se llama si no está en disco
+
+        Returns:
+            Optional[StoredImage]: La imagen, o None si no es conocida o la CDN no la tiene
+
+        Raises:
+            requests.exceptions.RequestException: Si la descarga falla (ImageTooLarge si la imagen es demasiado grande)
+        """
+        stored = self._lookup(image_id)
+        if stored is not None:
+            with self._lock:
+                self._stats['hits'] += 1
+            return stored
+
+        with self._lock:
+            self._stats['misses'] += 1
+        source_url = source()
+        if not source_url:
+            return None
+        return self._single_flight.do(image_id, lambda: self._lookup(image_id) or self._fetch(image_id, source_url))
+
+    def forget(self, image_id: str) -> None:
+        """Quita una imagen del índice (p. ej. si su archivo ya no existe)."""
+        with self._lock:
+            entry = self._entries.pop(image_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'max_image_bytes': self.max_image_bytes,
+                'single_flight': self._single_flight.stats(),
+                **self._stats
+            }
+
+    def _lookup(self, image_id: str) -> Optional[StoredImage]:
+        with self._lock:
+            entry = self._entries.get(image_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(image_id)
+        filename, size = entry
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return StoredImage(os.path.join(self.directory, filename), mimetype, size)
+
+    def _fetch(self, image_id: str, source_url: str) -> Optional[StoredImage]:
+        """Descarga la imagen por bloques, la guarda de forma atómica y expulsa las más antiguas si hace falta."""
+        with get_http_client().get(source_url, coalesce=False, stream=True) as response:
+            if response.status_code == 404:
+                with self._lock:
+                    self._stats['not_found'] += 1
+                return None
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            extension = mimetypes.guess_extension(content_type) if content_type.startswith('image/') else None
+            if extension is None:
+                extension = os.path.splitext(source_url.split('?')[0])[1] or '.img'
+            filename = f"{image_id}{extension}"
+
+            length = response.headers.get('Content-Length', '')
+            if length.isdigit() and int(length) > self.max_image_bytes:
+                self._too_large(image_id, int(length))
+
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{image_id}.", dir=self.directory)
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image_bytes:
+                            self._too_large(image_id, size)
+                        f.write(chunk)
+                os.replace(tmp_path, os.path.join(self.directory, filename))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        self._add(image_id, filename, size)
+        return self._lookup(image_id)
+
+    def _too_large(self, image_id: str, size: int) -> None:
+        with self._lock:
+            self._stats['too_large'] += 1
+        raise ImageTooLarge(f"La imagen {image_id} supera {self.max_image_bytes} bytes ({size} o más)")
+
+    def _add(self, image_id: str, filename: str, size: int) -> None:
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(image_id, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+                if previous[0] != filename:
+                    evicted.append(previous[0])
+            self._entries[image_id] = (filename, size)
+            self._bytes += size
+            # La imagen recién guardada no se expulsa aunque supere el límite por sí sola
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (old_filename, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._stats['evictions'] += 1
+                evicted.append(old_filename)
+
+        # Un archivo que se está enviando sigue siendo legible tras borrarlo
+        for old_filename in evicted:
+            try:
+                os.unlink(os.path.join(self.directory, old_filename))
+            except FileNotFoundError:
+                pass
+
+    def _scan(self) -> None:
+        """Reconstruye el índice con las imágenes ya guardadas, de la más antigua a la más reciente."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+
+        files = []
+        for filename in names:
+            image_id = os.path.splitext(filename)[0]
+            if filename.startswith('.') or not valid_image_id(image_id):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, filename))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, image_id, filename, stat.st_size))
+
+        for _, image_id, filename, size in sorted(files):
+            self._add(image_id, filename, size)
+        if files:
+            logger.info(f"Caché de imágenes en disco: {len(self._entries)} imágenes, {self._bytes} bytes")
+
+
+# Instancia compartida, creada en el primer uso
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """Obtiene la caché de imágenes en disco compartida, creándola si es necesario."""
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ImageStore()
+    return _store
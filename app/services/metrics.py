@@ -0,0 +1,330 @@
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, g, request
+
+# Límites (en segundos) de los histogramas de latencia
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Clave del entorno WSGI que marca las peticiones internas (precalentamiento),
+# que no se miden; una petición HTTP no puede fijarla
+INTERNAL_REQUEST = 'app.internal_request'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base de las métricas: nombre, ayuda, etiquetas y una serie por combinación de etiquetas."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} espera las etiquetas {self.label_names}")
+        return tuple(str(label) for label in labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, value in series:
+            lines.extend(self._render_series(labels, value))
+        return lines
+
+    def _render_series(self, labels: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [conteos por bucket..., suma]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-1] += value
+
+    def _render_series(self, labels: Tuple[str, ...], series) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(series[-1])}")
+        lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas de la aplicación, exportable en formato de texto de Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP por ruta', ('method', 'route', 'status'))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'Peticiones HTTP en curso por ruta', ('route',))
+UPSTREAM_DURATION = registry.histogram(
+    'upstream_request_duration_seconds', 'Latencia de las llamadas a servicios externos',
+    ('upstream', 'operation', 'status'))
+UPSTREAM_IN_FLIGHT = registry.gauge(
+    'upstream_requests_in_flight', 'Llamadas a servicios externos en curso', ('upstream',))
+UPSTREAM_REJECTED = registry.counter(
+    'upstream_rejected_total', 'Llamadas a servicios externos rechazadas sin realizarse', ('upstream', 'reason'))
+CIRCUIT_STATE = registry.gauge(
+    'upstream_circuit_state', 'Estado del circuito de cada servicio externo (0 cerrado, 1 semiabierto, 2 abierto)',
+    ('upstream',))
+IMAGE_CACHE_LOOKUPS = registry.counter(
+    'image_cache_lookups_total', 'Consultas a la caché de metadatos de imagen (hit, negative_hit, shared_hit, miss)',
+    ('cache', 'result'))
+IMAGE_CACHE_BYTES = registry.gauge(
+    'image_cache_bytes', 'Memoria aproximada ocupada por la caché de metadatos de imagen', ('cache',))
+
+
+class _UpstreamTimer:
+    """
+    Tiempo de una petición HTTP pasado esperando a servicios externos.
+
+    Cuenta el tiempo de reloj con al menos una llamada en curso, de modo que
+    las llamadas en paralelo no suman más que la duración de la petición.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._since = 0.0
+        self.busy = 0.0
+        self.calls = 0
+
+    def begin(self) -> None:
+        with self._lock:
+            if self._active == 0:
+                self._since = time.perf_counter()
+            self._active += 1
+            self.calls += 1
+
+    def end(self) -> None:
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self.busy += time.perf_counter() - self._since
+
+    def total(self) -> float:
+        with self._lock:
+            if self._active:
+                return self.busy + time.perf_counter() - self._since
+            return self.busy
+
+
+_current_timer: contextvars.ContextVar[Optional[_UpstreamTimer]] = contextvars.ContextVar(
+    'upstream_timer', default=None)
+
+
+class _Call:
+    """Resultado de una llamada externa; el llamador fija `status` si la llamada responde."""
+
+    def __init__(self):
+        self.status = 'error'
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str) -> Iterator[_Call]:
+    """
+    Registra la latencia y el estado de una llamada a un servicio externo.
+
+    Uso:
+        with track_upstream('firestore', 'users.query') as call:
+            ...
+            call.status = 'ok'
+
+    Args:
+        upstream (str): Servicio externo (host de la API o 'firestore')
+        operation (str): Operación de cardinalidad acotada (sin IDs)
+    """
+    call = _Call()
+    UPSTREAM_IN_FLIGHT.inc(upstream)
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(upstream)
+        UPSTREAM_DURATION.observe(upstream, operation, str(call.status), value=time.perf_counter() - started)
+
+
+@contextmanager
+def upstream_span() -> Iterator[None]:
+    """
+    Marca un intervalo en el que la petición HTTP actual espera a un servicio externo.
+
+    Alimenta la cabecera Server-Timing; fuera de una petición no hace nada.
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    timer.begin()
+    try:
+        yield
+    finally:
+        timer.end()
+
+
+def http_operation(path: str) -> str:
+    """
+    Operación de una URL de las APIs externas sin IDs: /v1/breeds/12 -> breeds/{id}.
+    """
+    parts = [part for part in path.split('/') if part]
+    for index, part in enumerate(parts):
+        if re.fullmatch(r'v\d+', part):
+            parts = parts[index + 1:]
+            break
+    if not parts:
+        return '/'
+    if len(parts) == 1:
+        return parts[0]
+    return f"{parts[0]}/{parts[1] if parts[1] == 'search' else '{id}'}"
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Instrumenta todas las rutas de la aplicación y publica GET /metrics.
+
+    Cada respuesta incluye una cabecera Server-Timing que separa el tiempo de
+    espera a servicios externos ('upstream') del tiempo local ('app'). Las
+    peticiones internas (INTERNAL_REQUEST en el entorno) no se miden.
+    """
+
+    @app.before_request
+    def _start_timer():
+        if request.environ.get(INTERNAL_REQUEST):
+            return
+        g._metrics_started = time.perf_counter()
+        g._metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g._metrics_token = _current_timer.set(_UpstreamTimer())
+        REQUESTS_IN_FLIGHT.inc(g._metrics_route)
+
+    @app.after_request
+    def _record(response):
+        started = g.get('_metrics_started')
+        if started is None:
+            return response
+        total = time.perf_counter() - started
+        timer = _current_timer.get()
+        upstream = min(timer.total(), total) if timer is not None else 0.0
+        calls = timer.calls if timer is not None else 0
+
+        REQUEST_DURATION.observe(request.method, g._metrics_route, str(response.status_code), value=total)
+        response.headers.add(
+            'Server-Timing',
+            f'upstream;dur={upstream * 1000:.1f};desc="llamadas={calls}", '
+            f'app;dur={(total - upstream) * 1000:.1f}, total;dur={total * 1000:.1f}'
+        )
+        return response
+
+    @app.teardown_request
+    def _finish(error=None):
+        token = g.pop('_metrics_token', None)
+        if token is not None:
+            REQUESTS_IN_FLIGHT.dec(g._metrics_route)
+            _current_timer.reset(token)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,73 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    """Llamada en curso compartida por todos los solicitantes de una misma clave."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas en una sola.
+
+    El primer hilo que pide una clave ejecuta la función; los que llegan
+    mientras está en curso esperan y reciben el mismo resultado (o la misma
+    excepción). Cuando la llamada termina, la siguiente petición vuelve a
+    ejecutarla: no es una caché.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'executed': 0, 'collapsed': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecuta fn para la clave dada, o espera a la ejecución en curso.
+
+        Args:
+            key (Hashable): Identifica las llamadas equivalentes
+            fn (Callable): Función a ejecutar
+
+        Returns:
+            Any: El resultado de fn, compartido entre los hilos que coincidieron
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['collapsed'] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats['executed'] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """Llamadas ejecutadas, llamadas agrupadas y llamadas en curso."""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                **self._stats
+            }
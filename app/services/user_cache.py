@@ -0,0 +1,313 @@
+import os
+import math
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.services import firebase_service
+from app.services.metrics import track_upstream, upstream_span
+
+logger = logging.getLogger(__name__)
+
+# Colección de Firestore con los perfiles de usuario
+COLLECTION = 'users'
+
+# Máximo de valores de un filtro 'in' de Firestore: IDs por listener
+IN_LIMIT = 30
+
+
+class _Group:
+    """Listener de un grupo de documentos en caché (una consulta 'in' por ID de documento)."""
+
+    def __init__(self):
+        # IDs del grupo que siguen en caché
+        self.ids: Set[str] = set()
+        self.watch = None
+        # Aumenta con cada nuevo listener; los snapshots de uno anterior se ignoran
+        self.generation = 0
+
+    @property
+    def active(self) -> bool:
+        """Indica si el stream del listener sigue abierto (o aún se está registrando)."""
+        return self.watch is None or getattr(self.watch, 'is_active', True)
+
+
+class UserCache:
+    """
+    Caché LRU de lectura directa (read-through) para documentos de usuario.
+
+    Los documentos en caché se mantienen al día con listeners on_snapshot
+    que solo cubren esos documentos: consultas 'in' por ID de hasta IN_LIMIT
+    documentos cada una, así que las lecturas desde memoria son coherentes
+    sin depender de un TTL, y la memoria y las lecturas de Firestore dependen
+    del tamaño de la caché, no de la colección. Los IDs nuevos se añaden al
+    último grupo (se vuelve a registrar su listener) o abren uno nuevo; los
+    grupos se reagrupan cuando las expulsiones los dejan medio vacíos.
+
+    Los IDs que no existen no se cachean. Si no se puede registrar un
+    listener, sus documentos no se cachean, y si su stream se corta, sus
+    documentos salen de la caché en la siguiente lectura.
+    """
+
+    DEFAULT_MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Args:
+            max_entries (int): Documentos en memoria como máximo (USER_CACHE_MAX_ENTRIES)
+        """
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv('USER_CACHE_MAX_ENTRIES', self.DEFAULT_MAX_ENTRIES))
+            except ValueError:
+                max_entries = self.DEFAULT_MAX_ENTRIES
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._groups: Dict[str, _Group] = {}
+        self._tail: Optional[_Group] = None
+        self._lock = threading.Lock()
+        # Serializa los cambios de listeners (registrar y cancelar)
+        self._watch_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'updates': 0,
+            'evictions': 0,
+            'broken_listeners': 0
+        }
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un usuario por su ID.
+
+        Returns:
+            Optional[Dict[str, Any]]: El usuario con su 'id', o None si no existe
+
+        Raises:
+            Exception: Si Firestore no está disponible o la lectura falla
+        """
+        return self.get_many([user_id]).get(user_id)
+
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Obtiene varios usuarios; los que no están en caché se leen con un solo get_all.
+
+        Returns:
+            Dict[str, Optional[Dict[str, Any]]]: Usuario por ID (None si no existe)
+
+        Raises:
+            Exception: Si Firestore no está disponible o la lectura falla
+        """
+        user_ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+        result: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing: List[str] = []
+        broken: List[_Group] = []
+
+        with self._lock:
+            for user_id in user_ids:
+                value = self._entries.get(user_id)
+                group = self._groups.get(user_id)
+                if value is not None and group is not None and not group.active:
+                    # El stream se cortó: sus documentos ya no se actualizan
+                    broken.append(group)
+                    self._drop_group_locked(group)
+                    self._stats['broken_listeners'] += 1
+                    value = None
+                if value is None:
+                    missing.append(user_id)
+                    continue
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                result[user_id] = self._public(user_id, value)
+            self._stats['misses'] += len(missing)
+        self._cancel(broken)
+
+        if missing:
+            db = firebase_service.get_db()
+            refs = [db.collection(COLLECTION).document(user_id) for user_id in missing]
+            with upstream_span(), track_upstream('firestore', 'users.get_all') as call:
+                snapshots = list(db.get_all(refs))
+                call.status = 'ok'
+            found = {snapshot.id: snapshot.to_dict() or {} for snapshot in snapshots if snapshot.exists}
+            for user_id, value in found.items():
+                result[user_id] = self._public(user_id, value)
+            if found and self.max_entries > 0:
+                self._store(db, found)
+
+        return {user_id: result.get(user_id) for user_id in user_ids}
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché y número de listeners."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'listeners': len({id(group) for group in self._groups.values()}),
+                **self._stats
+            }
+
+    def clear(self) -> None:
+        """Vacía la caché y cancela todos los listeners."""
+        with self._watch_lock:
+            with self._lock:
+                groups = list({id(group): group for group in self._groups.values()}.values())
+                self._entries.clear()
+                self._groups.clear()
+                self._tail = None
+            self._cancel(groups)
+
+    @staticmethod
+    def _public(user_id: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": user_id, **value}
+
+    def _store(self, db, values: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Guarda documentos leídos y los añade a los listeners.
+
+        Los valores se guardan antes de registrar el listener: su primer
+        snapshot es posterior a la lectura y los sobrescribe si cambiaron.
+        """
+        with self._watch_lock:
+            with self._lock:
+                new = [user_id for user_id in values if user_id not in self._groups]
+                for user_id, value in values.items():
+                    self._entries[user_id] = value
+                    self._entries.move_to_end(user_id)
+
+                # Completar el último grupo y abrir los que hagan falta
+                changed: List[_Group] = []
+                while new:
+                    tail = self._tail
+                    if tail is None or len(tail.ids) >= IN_LIMIT:
+                        tail = self._tail = _Group()
+                    taken, new = new[:IN_LIMIT - len(tail.ids)], new[IN_LIMIT - len(tail.ids):]
+                    tail.ids.update(taken)
+                    for user_id in taken:
+                        self._groups[user_id] = tail
+                    if tail not in changed:
+                        changed.append(tail)
+
+                emptied = self._evict_locked()
+                changed = [group for group in changed if group.ids]
+
+                # Reagrupar si las expulsiones dejaron demasiados grupos medio vacíos
+                groups = {id(group): group for group in self._groups.values()}
+                if len(groups) > 2 * math.ceil(len(self._groups) / IN_LIMIT) + 1:
+                    emptied.extend(groups.values())
+                    changed = self._regroup_locked(groups.values())
+
+            self._cancel([group for group in emptied if group not in changed])
+            for group in changed:
+                self._subscribe(db, group)
+
+    def _evict_locked(self) -> List[_Group]:
+        """Expulsa los menos usados por encima de max_entries; devuelve los grupos que quedaron vacíos."""
+        emptied = []
+        while len(self._entries) > self.max_entries:
+            user_id, _ = self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+            group = self._groups.pop(user_id, None)
+            if group is None:
+                continue
+            # El listener sigue cubriendo el ID expulsado; sus cambios se ignoran
+            group.ids.discard(user_id)
+            if not group.ids:
+                emptied.append(group)
+                if group is self._tail:
+                    self._tail = None
+        return emptied
+
+    def _regroup_locked(self, old: Iterable[_Group]) -> List[_Group]:
+        """Reparte los IDs en caché en grupos completos nuevos; los anteriores dejan de aplicar snapshots."""
+        for group in old:
+            group.ids = set()
+            group.generation += 1
+        self._groups.clear()
+        self._tail = None
+        groups = []
+        for user_id in self._entries:
+            if self._tail is None or len(self._tail.ids) >= IN_LIMIT:
+                self._tail = _Group()
+                groups.append(self._tail)
+            self._tail.ids.add(user_id)
+            self._groups[user_id] = self._tail
+        return groups
+
+    def _drop_group_locked(self, group: _Group) -> None:
+        """Saca de la caché los documentos de un grupo (requiere self._lock)."""
+        for user_id in group.ids:
+            self._entries.pop(user_id, None)
+            if self._groups.get(user_id) is group:
+                del self._groups[user_id]
+        group.ids = set()
+        if group is self._tail:
+            self._tail = None
+
+    def _subscribe(self, db, group: _Group) -> None:
+        """Registra (o vuelve a registrar) el listener de un grupo (requiere self._watch_lock)."""
+        # Import diferido: google-cloud-firestore solo se carga al usar Firestore
+        from google.cloud.firestore_v1 import FieldFilter
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        with self._lock:
+            if not group.ids:
+                return
+            group.generation += 1
+            generation = group.generation
+            collection = db.collection(COLLECTION)
+            refs = [collection.document(user_id) for user_id in sorted(group.ids)]
+
+        old = group.watch
+        try:
+            query = collection.where(filter=FieldFilter(FieldPath.document_id(), 'in', refs))
+            group.watch = query.on_snapshot(
+                lambda docs, changes, read_time: self._on_snapshot(group, generation, docs, changes)
+            )
+        except Exception as e:
+            logger.warning(f"No se pudo escuchar cambios de {len(refs)} usuarios, no se cachean: {str(e)}")
+            group.watch = None
+            with self._lock:
+                self._drop_group_locked(group)
+        self._stop(old)
+
+    def _on_snapshot(self, group: _Group, generation: int, docs, changes) -> None:
+        """
+        Callback de Firestore: aplica el estado actual del grupo a los documentos en caché.
+
+        Cada snapshot trae todos los documentos del grupo que existen; los que
+        faltan se han borrado y salen de la caché.
+        """
+        current = {doc.id: doc.to_dict() or {} for doc in docs if doc.exists}
+        with self._lock:
+            if group.generation != generation:
+                return
+            for user_id in list(group.ids):
+                if user_id not in self._entries or self._groups.get(user_id) is not group:
+                    continue
+                if user_id in current:
+                    self._entries[user_id] = current[user_id]
+                else:
+                    del self._entries[user_id]
+                    del self._groups[user_id]
+                    group.ids.discard(user_id)
+            self._stats['updates'] += sum(1 for change in changes if change.type.name != 'ADDED')
+
+    @classmethod
+    def _cancel(cls, groups: Iterable[_Group]) -> None:
+        """Cancela los listeners de los grupos indicados."""
+        for group in groups:
+            watch, group.watch = group.watch, None
+            cls._stop(watch)
+
+    @staticmethod
+    def _stop(watch) -> None:
+        if watch is None:
+            return
+        try:
+            watch.unsubscribe()
+        except Exception as e:
+            logger.warning(f"Error al cancelar un listener de usuarios: {str(e)}")
+
+
+user_cache = UserCache()
@@ -0,0 +1,8 @@
+"""
+Herramientas de rendimiento sin dependencias externas.
+
+- fake_upstream: servidor local que imita The Cat API y The Dog API, con
+  latencia configurable e inyección de errores.
+- run: banco de carga que levanta create_app bajo waitress contra ese
+  servidor y compara los resultados con bench/baselines.json.
+"""
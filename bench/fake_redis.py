@@ -0,0 +1,165 @@
+"""
+Servidor local con protocolo Redis (RESP) para probar CACHE_BACKEND=redis.
+
+Implementa solo los comandos que usa app.services.cache_backend (GET, MGET,
+SET con NX/XX/EX/PX, DEL, PING, AUTH, SELECT, FLUSHDB y DBSIZE), guarda
+los valores en memoria y cuenta los comandos recibidos. Para usarlo con
+varias instancias de la aplicación:
+
+    python -m bench.fake_redis --port 6390
+    CACHE_BACKEND=redis CACHE_REDIS_URL=redis://127.0.0.1:6390/0 python run.py
+"""
+import time
+import argparse
+import threading
+import socketserver
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class FakeRedis:
+    """
+    Servidor RESP en memoria, ejecutado en un hilo de fondo.
+
+    Args:
+        host (str): Interfaz en la que escuchar
+        port (int): Puerto (0 para elegir uno libre)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self.commands: Counter = Counter()
+        self._values: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        """URL para CACHE_REDIS_URL."""
+        return f"redis://{self._server.server_address[0]}:{self.port}/0"
+
+    def start(self) -> 'FakeRedis':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-redis', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_commands(self) -> Counter:
+        """Devuelve y reinicia el contador de comandos."""
+        with self._lock:
+            commands, self.commands = self.commands, Counter()
+        return commands
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        """Valor vigente de una clave (requiere self._lock)."""
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self._values[key]
+            return None
+        return entry[0]
+
+    def execute(self, args: List[bytes]) -> Any:
+        """Ejecuta un comando; devuelve la respuesta, o una excepción para responder un error."""
+        name = args[0].upper().decode()
+        with self._lock:
+            self.commands[name] += 1
+            if name == 'PING':
+                return 'PONG'
+            if name in ('AUTH', 'SELECT', 'FLUSHDB'):
+                if name == 'FLUSHDB':
+                    self._values.clear()
+                return 'OK'
+            if name == 'DBSIZE':
+                return len(self._values)
+            if name == 'GET':
+                return self._get(args[1])
+            if name == 'MGET':
+                return [self._get(key) for key in args[1:]]
+            if name == 'DEL':
+                return sum(1 for key in args[1:] if self._values.pop(key, None) is not None)
+            if name == 'SET':
+                return self._set(args[1], args[2], [arg.upper() for arg in args[3:]])
+        return ValueError(f"ERR unknown command '{name}'")
+
+    def _set(self, key: bytes, value: bytes, options: List[bytes]) -> Any:
+        """SET key value [NX|XX] [EX s|PX ms] (requiere self._lock)."""
+        expires_at = None
+        if b'PX' in options:
+            expires_at = time.monotonic() + int(options[options.index(b'PX') + 1]) / 1000
+        elif b'EX' in options:
+            expires_at = time.monotonic() + int(options[options.index(b'EX') + 1])
+        exists = self._get(key) is not None
+        if (b'NX' in options and exists) or (b'XX' in options and not exists):
+            return None
+        self._values[key] = (value, expires_at)
+        return 'OK'
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            def handle(self):
+                while True:
+                    args = self._read_command()
+                    if not args:
+                        return
+                    if args[0].upper() == b'QUIT':
+                        self.wfile.write(b'+OK\r\n')
+                        return
+                    self.wfile.write(self._encode(server.execute(args)))
+
+            def _read_command(self) -> Optional[List[bytes]]:
+                line = self.rfile.readline()
+                if not line.startswith(b'*'):
+                    return None
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    args.append(self.rfile.read(length + 2)[:-2])
+                return args
+
+            def _encode(self, reply: Any) -> bytes:
+                if reply is None:
+                    return b'$-1\r\n'
+                if isinstance(reply, Exception):
+                    return f"-{reply}\r\n".encode()
+                if isinstance(reply, str):
+                    return f"+{reply}\r\n".encode()
+                if isinstance(reply, int):
+                    return f":{reply}\r\n".encode()
+                if isinstance(reply, list):
+                    return b'*%d\r\n' % len(reply) + b''.join(self._encode(item) for item in reply)
+                return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Servidor con protocolo Redis en memoria para pruebas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+
+    fake = FakeRedis(args.host, args.port).start()
+    print("CACHE_BACKEND=redis")
+    print(f"CACHE_REDIS_URL={fake.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Servidor local que imita The Cat API y The Dog API.
+
+Sirve los mismos recursos que usa la aplicación (breeds, breeds/{id},
+images/{id} e images/search) bajo /dog/v1/ y /cat/v1/, los archivos de
+imagen bajo /dog/cdn/images/ y /cat/cdn/images/, con catálogos
+deterministas de bench.fixtures, latencia configurable e inyección de
+errores. Para usarlo con la aplicación:
+
+    python -m bench.fake_upstream --port 8765 --latency lognormal:40:0.5
+    DOG_API_BASE_URL=http://127.0.0.1:8765/dog/v1/ \\
+    CAT_API_BASE_URL=http://127.0.0.1:8765/cat/v1/ python run.py
+"""
+import json
+import math
+import random
+import argparse
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from bench import fixtures
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Convierte una especificación de latencia en una función que devuelve segundos.
+
+    Formatos (valores en milisegundos):
+    - fixed:MS
+    - uniform:MIN:MAX
+    - exp:MEDIA
+    - lognormal:MEDIANA:SIGMA (cola larga, la más parecida a una API real)
+
+    Raises:
+        ValueError: Si la especificación no es válida
+    """
+    kind, *values = spec.split(':')
+    try:
+        numbers = [float(value) for value in values]
+    except ValueError:
+        raise ValueError(f"Latencia inválida: {spec}")
+
+    if kind == 'fixed' and len(numbers) == 1:
+        return lambda rng: numbers[0] / 1000
+    if kind == 'uniform' and len(numbers) == 2:
+        return lambda rng: rng.uniform(numbers[0], numbers[1]) / 1000
+    if kind == 'exp' and len(numbers) == 1 and numbers[0] > 0:
+        return lambda rng: rng.expovariate(1 / numbers[0]) / 1000
+    if kind == 'lognormal' and len(numbers) == 2 and numbers[0] > 0:
+        mu = math.log(numbers[0])
+        return lambda rng: rng.lognormvariate(mu, numbers[1]) / 1000
+    raise ValueError(f"Latencia inválida: {spec}")
+
+
+class FakeUpstream:
+    """
+    Servidor HTTP de las APIs falsas, ejecutado en un hilo de fondo.
+
+    Args:
+        host (str): Interfaz en la que escuchar
+        port (int): Puerto (0 para elegir uno libre)
+        latency (str): Distribución de latencia (ver parse_latency)
+        error_rate (float): Fracción de peticiones que responden error_status
+        error_status (int): Código de las respuestas de error inyectadas
+        stall_rate (float): Fracción de peticiones que se retrasan stall_ms adicionales
+        stall_ms (float): Retraso adicional de las peticiones lentas
+        seed (int): Semilla de la latencia y de los errores
+    """
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 latency: str = 'fixed:0',
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 stall_rate: float = 0.0,
+                 stall_ms: float = 15000,
+                 seed: int = 0):
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self.calls: Counter = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._catalogs = {'dog': fixtures.dog_breeds(), 'cat': fixtures.cat_breeds()}
+        self._breeds = {kind: {str(breed['id']): breed for breed in breeds} for kind, breeds in self._catalogs.items()}
+        self._image_breeds = {
+            kind: {breed['reference_image_id']: breed for breed in breeds}
+            for kind, breeds in self._catalogs.items()
+        }
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def base_url(self, kind: str) -> str:
+        """URL base para DOG_API_BASE_URL ('dog') o CAT_API_BASE_URL ('cat')."""
+        return f"http://{self._server.server_address[0]}:{self.port}/{kind}/v1/"
+
+    def cdn_url(self, kind: str) -> str:
+        """URL base de los archivos de imagen, para DOG_IMAGE_CDN_URL o CAT_IMAGE_CDN_URL."""
+        return f"http://{self._server.server_address[0]}:{self.port}/{kind}/cdn/images/"
+
+    def start(self) -> 'FakeUpstream':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-upstream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_calls(self) -> Counter:
+        """Devuelve y reinicia el contador de peticiones por recurso."""
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+    def _sample(self) -> Tuple[float, bool]:
+        """Latencia a aplicar y si la petición debe fallar."""
+        with self._lock:
+            delay = self.latency(self._rng)
+            if self._rng.random() < self.stall_rate:
+                delay += self.stall_ms / 1000
+            return delay, self._rng.random() < self.error_rate
+
+    def resolve(self, path: str, query: Dict[str, list]) -> Tuple[int, Any, str]:
+        """
+        Resuelve una petición a las APIs falsas.
+
+        Returns:
+            tuple: (código HTTP, cuerpo JSON, nombre del recurso para las estadísticas)
+        """
+        parts = [part for part in path.split('/') if part]
+        if len(parts) == 4 and parts[0] in self._catalogs and parts[1:3] == ['cdn', 'images']:
+            return 200, fixtures.image_bytes(parts[3]), f'{parts[0]}:cdn'
+        if len(parts) < 3 or parts[0] not in self._catalogs or parts[1] != 'v1':
+            return 404, {'message': 'Not found'}, 'unknown'
+        kind, rest = parts[0], parts[2:]
+
+        if rest == ['breeds']:
+            return 200, self._catalogs[kind], f'{kind}:breeds'
+        if len(rest) == 2 and rest[0] == 'breeds':
+            return 200, self._breeds[kind].get(rest[1], {}), f'{kind}:breed'
+        if rest == ['images', 'search']:
+            return 200, self._search(kind, query), f'{kind}:images/search'
+        if len(rest) == 2 and rest[0] == 'images':
+            breed = self._image_breeds[kind].get(rest[1])
+            return 200, fixtures.image(rest[1], self.cdn_url(kind), breed), f'{kind}:image'
+        return 404, {'message': 'Not found'}, 'unknown'
+
+    def _search(self, kind: str, query: Dict[str, list]) -> list:
+        limit = min(int((query.get('limit') or ['1'])[0]), 100)
+        breed_id = (query.get('breed_id') or query.get('breed_ids') or [None])[0]
+        if breed_id is not None:
+            breed = self._breeds[kind].get(breed_id)
+            if breed is None:
+                return []
+            candidates = [breed]
+        else:
+            candidates = self._catalogs[kind]
+
+        with self._lock:
+            picks = [(self._rng.choice(candidates), self._rng.randrange(1000)) for _ in range(limit)]
+        return [
+            fixtures.image(f"{breed['reference_image_id'][:6]}{number:03d}", self.cdn_url(kind), breed)
+            for breed, number in picks
+        ]
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Evita que Nagle retrase las respuestas pequeñas
+            wbufsize = -1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body, resource = upstream.resolve(url.path, parse_qs(url.query))
+                delay, fail = upstream._sample()
+                with upstream._lock:
+                    upstream.calls[resource] += 1
+                if delay > 0:
+                    time.sleep(delay)
+                if fail:
+                    status, body = upstream.error_status, {'message': 'Injected error'}
+
+                if isinstance(body, bytes):
+                    payload, content_type = body, 'image/jpeg'
+                else:
+                    payload, content_type = json.dumps(body).encode(), 'application/json; charset=utf-8'
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Opciones del servidor falso (compartidas con bench.run)."""
+    parser.add_argument('--latency', default='lognormal:40:0.5',
+                        help='Latencia de las APIs falsas: fixed:MS, uniform:MIN:MAX, exp:MEDIA o lognormal:MEDIANA:SIGMA')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de respuestas con error (0-1)')
+    parser.add_argument('--error-status', type=int, default=503, help='Código HTTP de los errores inyectados')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Fracción de respuestas muy lentas (0-1)')
+    parser.add_argument('--stall-ms', type=float, default=15000, help='Retraso adicional de las respuestas lentas')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de la latencia y los errores')
+
+
+def from_arguments(args: argparse.Namespace, host: str = '127.0.0.1', port: int = 0) -> FakeUpstream:
+    return FakeUpstream(
+        host=host,
+        port=port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stall_rate=args.stall_rate,
+        stall_ms=args.stall_ms,
+        seed=args.seed
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='APIs falsas de gatos y perros para pruebas de rendimiento')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    upstream = from_arguments(args, args.host, args.port).start()
+    print(f"DOG_API_BASE_URL={upstream.base_url('dog')}")
+    print(f"CAT_API_BASE_URL={upstream.base_url('cat')}")
+    print(f"DOG_IMAGE_CDN_URL={upstream.cdn_url('dog')}")
+    print(f"CAT_IMAGE_CDN_URL={upstream.cdn_url('cat')}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        upstream.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import random
+import string
+from typing import Any, Dict, List
+
+# Cantidades similares a las de las APIs reales
+DOG_BREED_COUNT = 172
+CAT_BREED_COUNT = 67
+
+DOG_NAMES = [
+    'Affenpinscher', 'Afghan Hound', 'Airedale Terrier', 'Akita', 'Alaskan Malamute',
+    'American Bulldog', 'Australian Cattle Dog', 'Australian Shepherd', 'Basenji', 'Basset Hound',
+    'Beagle', 'Bernese Mountain Dog', 'Bichon Frise', 'Border Collie', 'Boston Terrier',
+    'Boxer', 'Bull Terrier', 'Cavalier King Charles Spaniel', 'Chihuahua', 'Chow Chow',
+    'Cocker Spaniel', 'Dachshund', 'Dalmatian', 'Doberman Pinscher', 'English Setter',
+    'French Bulldog', 'German Shepherd Dog', 'Golden Retriever', 'Great Dane', 'Greyhound',
+    'Havanese', 'Irish Wolfhound', 'Jack Russell Terrier', 'Labrador Retriever', 'Maltese',
+    'Newfoundland', 'Papillon', 'Pomeranian', 'Poodle (Toy)', 'Pug',
+    'Rottweiler', 'Saint Bernard', 'Samoyed', 'Shiba Inu', 'Shih Tzu',
+    'Siberian Husky', 'Vizsla', 'Weimaraner', 'Whippet', 'Yorkshire Terrier'
+]
+CAT_NAMES = [
+    'Abyssinian', 'Aegean', 'American Bobtail', 'American Shorthair', 'Balinese',
+    'Bengal', 'Birman', 'Bombay', 'British Shorthair', 'Burmese',
+    'Chartreux', 'Cornish Rex', 'Devon Rex', 'Egyptian Mau', 'Exotic Shorthair',
+    'Havana Brown', 'Himalayan', 'Japanese Bobtail', 'Korat', 'Maine Coon',
+    'Manx', 'Norwegian Forest Cat', 'Ocicat', 'Oriental', 'Persian',
+    'Ragdoll', 'Russian Blue', 'Savannah', 'Scottish Fold', 'Siamese',
+    'Siberian', 'Singapura', 'Somali', 'Sphynx', 'Tonkinese', 'Turkish Angora'
+]
+TEMPERAMENTS = [
+    'Active', 'Adventurous', 'Affectionate', 'Agile', 'Alert', 'Calm', 'Cheerful', 'Clever',
+    'Confident', 'Curious', 'Devoted', 'Energetic', 'Friendly', 'Gentle', 'Independent',
+    'Intelligent', 'Loyal', 'Outgoing', 'Playful', 'Protective', 'Quiet', 'Social',
+    'Stubborn', 'Sweet', 'Trainable'
+]
+BREED_GROUPS = ['Toy', 'Hound', 'Terrier', 'Working', 'Herding', 'Sporting', 'Non-Sporting', 'Mixed', '']
+ORIGINS = ['Egypt', 'England', 'France', 'Germany', 'Japan', 'Russia', 'Scotland', 'Thailand', 'United States', '']
+DESCRIPTION = (
+    'Breed description with the typical length of the public catalogs, '
+    'covering history, appearance and character. '
+)
+
+
+def _image_id(rng: random.Random) -> str:
+    return ''.join(rng.choices(string.ascii_letters + string.digits + '_-', k=9))
+
+
+def _range(rng: random.Random, low: int, high: int) -> str:
+    start = rng.randint(low, high)
+    return f"{start} - {start + rng.randint(1, max(2, start // 2))}"
+
+
+def _temperament(rng: random.Random) -> str:
+    return ', '.join(rng.sample(TEMPERAMENTS, rng.randint(3, 6)))
+
+
+def _name(rng: random.Random, names: List[str], index: int) -> str:
+    if index < len(names):
+        return names[index]
+    return f"{rng.choice(names)} {rng.choice(['Mix', 'Variant', 'Line'])} {index}"
+
+
+def dog_breeds(seed: int = 1) -> List[Dict[str, Any]]:
+    """Catálogo de razas con la forma de GET /v1/breeds de The Dog API."""
+    rng = random.Random(seed)
+    breeds = []
+    breed_id = 0
+    for index in range(DOG_BREED_COUNT):
+        breed_id += rng.choice([1, 1, 1, 2])  # los IDs reales tienen huecos
+        weight = _range(rng, 2, 70)
+        height = _range(rng, 15, 80)
+        breeds.append({
+            'weight': {'imperial': weight, 'metric': weight},
+            'height': {'imperial': height, 'metric': height},
+            'id': breed_id,
+            'name': _name(rng, DOG_NAMES, index),
+            'bred_for': rng.choice(['Guarding', 'Hunting', 'Herding', 'Companionship', 'Sled pulling']),
+            'breed_group': rng.choice(BREED_GROUPS),
+            'life_span': f"{_range(rng, 8, 14)} years",
+            'temperament': _temperament(rng),
+            'origin': rng.choice(ORIGINS),
+            'reference_image_id': _image_id(rng)
+        })
+    return breeds
+
+
+def cat_breeds(seed: int = 2) -> List[Dict[str, Any]]:
+    """Catálogo de razas con la forma de GET /v1/breeds de The Cat API."""
+    rng = random.Random(seed)
+    breeds = []
+    used_ids = set()
+    for index in range(CAT_BREED_COUNT):
+        name = _name(rng, CAT_NAMES, index)
+        breed_id = ''.join(c for c in name.lower() if c.isalpha())[:4]
+        while breed_id in used_ids:
+            breed_id = ''.join(rng.choices(string.ascii_lowercase, k=4))
+        used_ids.add(breed_id)
+        weight = _range(rng, 2, 9)
+        breeds.append({
+            'weight': {'imperial': weight, 'metric': weight},
+            'id': breed_id,
+            'name': name,
+            'temperament': _temperament(rng),
+            'origin': rng.choice(ORIGINS),
+            'description': DESCRIPTION * rng.randint(1, 3),
+            'life_span': _range(rng, 10, 16),
+            'adaptability': rng.randint(1, 5),
+            'affection_level': rng.randint(1, 5),
+            'child_friendly': rng.randint(1, 5),
+            'energy_level': rng.randint(1, 5),
+            'intelligence': rng.randint(1, 5),
+            'hairless': 1 if rng.random() < 0.05 else 0,
+            'reference_image_id': _image_id(rng)
+        })
+    return breeds
+
+
+def image(image_id: str, cdn_url: str, breed: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Imagen con la forma de GET /v1/images/{id}; cdn_url es la base de su URL."""
+    rng = random.Random(image_id)
+    return {
+        'id': image_id,
+        'url': f"{cdn_url}{image_id}.jpg",
+        'width': rng.choice([500, 640, 800, 1080, 1600]),
+        'height': rng.choice([375, 480, 600, 1080, 1200]),
+        'breeds': [breed] if breed else []
+    }
+
+
+def image_bytes(filename: str) -> bytes:
+    """Contenido determinista (8-64 KB) con cabecera y final de JPEG para una imagen de la CDN."""
+    rng = random.Random(filename)
+    body = rng.randbytes(rng.randint(8, 64) * 1024)
+    return b'\xff\xd8\xff\xe0' + body + b'\xff\xd9'
@@ -0,0 +1,262 @@
+"""
+Banco de carga de extremo a extremo.
+
+Levanta bench.fake_upstream, apunta CAT_API_BASE_URL y DOG_API_BASE_URL a
+él, sirve create_app con waitress y recorre cada ruta registrada por
+register_routes con varios niveles de concurrencia. Informa peticiones por
+segundo y latencias p50/p95/p99, y compara con bench/baselines.json:
+
+    python -m bench.run                       # compara con la línea base
+    python -m bench.run --save-baseline       # guarda una nueva línea base
+    python -m bench.run --routes breeds -c 1,16 --duration 5
+
+Termina con código 1 si alguna ruta empeora más que --tolerance.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from bench import fixtures
+from bench.fake_upstream import add_arguments, from_arguments
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+# Blueprints de register_routes (más la ruta raíz); los de usuarios necesitan Firestore
+ROUTE_BLUEPRINTS = ('dog', 'cat', 'search')
+USER_BLUEPRINTS = ('user',)
+
+# Parámetros de consulta representativos para las rutas que los usan
+QUERIES = {
+    'dog.filter_breeds': 'size=medium&temperament=Loyal',
+    'cat.filter_breeds': 'min_life_span=14&sort_by=-weight',
+    'dog.get_breed_images': 'limit=3',
+    'dog.get_breeds_batch': 'ids=1,2,4,5,6,7,8,10,11,13',
+    'cat.get_breeds_batch': 'ids=abys,aege,amer,bali,beng',
+    'search.search_breeds': 'q=friendly retrievr'
+}
+
+# Margen absoluto para no marcar como regresión el ruido de latencias submilisegundo
+LATENCY_SLACK_MS = 1.0
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def sample_args() -> Dict[str, Dict[str, str]]:
+    """Valores de ejemplo para los parámetros de ruta de cada blueprint."""
+    return {
+        'dog': {'breed_id': str(fixtures.dog_breeds()[0]['id'])},
+        'cat': {'breed_id': fixtures.cat_breeds()[0]['id']},
+        'user': {'user_id': 'bench-user'}
+    }
+
+
+def targets(app, include_users: bool = False, only: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    """
+    Rutas GET registradas por register_routes.
+
+    Returns:
+        List[Tuple[str, str]]: (nombre estable para la línea base, ruta concreta a pedir)
+    """
+    blueprints = ROUTE_BLUEPRINTS + (USER_BLUEPRINTS if include_users else ())
+    samples = sample_args()
+    adapter = app.url_map.bind('localhost')
+
+    found = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        blueprint = rule.endpoint.split('.')[0] if '.' in rule.endpoint else None
+        if 'GET' not in rule.methods or (rule.endpoint != 'index' and blueprint not in blueprints):
+            continue
+        values = {name: samples.get(blueprint, {}).get(name, 'x') for name in rule.arguments}
+        path = adapter.build(rule.endpoint, values)
+        query = QUERIES.get(rule.endpoint)
+        name = f"GET {rule.rule}" + (f"?{query}" if query else '')
+        if only and not any(fragment in name for fragment in only):
+            continue
+        found.append((name, f"{path}?{query}" if query else path))
+    return found
+
+
+def drive(url: str, concurrency: int, duration: float) -> Dict[str, Any]:
+    """
+    Pide url sin pausa desde `concurrency` clientes durante `duration` segundos.
+
+    Cada cliente reutiliza su conexión (keep-alive), como haría un proxy inverso.
+    """
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def client(index: int) -> None:
+        session = requests.Session()
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=60)
+                response.content
+                failed = response.status_code >= 500
+            except requests.exceptions.RequestException:
+                failed = True
+            latencies[index].append(time.perf_counter() - started)
+            if failed:
+                errors[index] += 1
+        session.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    values = sorted(latency for per_client in latencies for latency in per_client)
+    return {
+        'requests': len(values),
+        'errors': sum(errors),
+        'rps': round(len(values) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2)
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[str]:
+    """
+    Compara los resultados con la línea base.
+
+    Returns:
+        List[str]: Descripción de cada regresión (vacía si no hay ninguna)
+    """
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if result['rps'] < reference['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['rps']} req/s (línea base {reference['rps']})")
+        for metric in ('p95_ms', 'p99_ms'):
+            limit = reference[metric] * (1 + tolerance) + LATENCY_SLACK_MS
+            if result[metric] > limit:
+                regressions.append(f"{key}: {metric} {result[metric]} (línea base {reference[metric]})")
+        if result['errors'] > reference.get('errors', 0):
+            regressions.append(f"{key}: {result['errors']} errores (línea base {reference.get('errors', 0)})")
+    return regressions
+
+
+def serve(app, threads: int):
+    """Sirve la aplicación con waitress en un puerto libre, en un hilo de fondo."""
+    from waitress.server import create_server
+
+    server = create_server(app, host='127.0.0.1', port=0, threads=threads, ident='PetPlatformBench')
+    threading.Thread(target=server.run, name='waitress', daemon=True).start()
+    return server
+
+
+def settings(args: argparse.Namespace) -> Dict[str, Any]:
+    """Parámetros que deben coincidir para que una comparación tenga sentido."""
+    return {
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'duration': args.duration,
+        'waitress_threads': args.threads,
+        'python': platform.python_version()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Banco de carga de la API de Pet Platform')
+    parser.add_argument('-c', '--concurrency', default='1,8,32', help='Niveles de concurrencia separados por comas')
+    parser.add_argument('--duration', type=float, default=3.0, help='Segundos de carga por ruta y nivel')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WAITRESS_THREADS', 4)), help='Hilos de waitress')
+    parser.add_argument('--routes', default='', help='Solo las rutas que contengan alguno de estos fragmentos (comas)')
+    parser.add_argument('--include-users', action='store_true', help='Incluir las rutas de usuarios (requieren Firestore)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Archivo de líneas base')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Empeoramiento relativo admitido (0-1)')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+
+    upstream = from_arguments(args).start()
+    os.environ['DOG_API_BASE_URL'] = upstream.base_url('dog')
+    os.environ['CAT_API_BASE_URL'] = upstream.base_url('cat')
+    os.environ['DOG_IMAGE_CDN_URL'] = upstream.cdn_url('dog')
+    os.environ['CAT_IMAGE_CDN_URL'] = upstream.cdn_url('cat')
+    os.environ['WAITRESS_THREADS'] = str(args.threads)
+    os.environ.setdefault('FLASK_ENV', 'production')
+
+    from app import create_app
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('waitress.queue').setLevel(logging.ERROR)
+    server = serve(app, args.threads)
+    base_url = f"http://127.0.0.1:{server.effective_port}"
+
+    routes = targets(app, args.include_users, [r for r in args.routes.split(',') if r])
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'ruta':<58} {'conc':>4} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5} {'upstream':>8}")
+    for name, path in routes:
+        # Calentamiento: la primera petición carga catálogos y cachés
+        requests.get(base_url + path, timeout=60)
+        for level in levels:
+            upstream.reset_calls()
+            result = drive(base_url + path, level, args.duration)
+            result['upstream_calls'] = sum(upstream.reset_calls().values())
+            results[f"{name} @{level}"] = result
+            print(f"{name:<58} {level:>4} {result['rps']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+                  f"{result['p99_ms']:>8} {result['errors']:>5} {result['upstream_calls']:>8}")
+
+    # waitress corre en un hilo daemon y termina con el proceso
+    upstream.stop()
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+
+    if args.save_baseline:
+        merged = {**stored.get('results', {}), **results}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings(args), 'results': merged}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    if not stored:
+        print("\nNo hay línea base; use --save-baseline para crearla")
+        return 0
+    if stored.get('settings') != settings(args):
+        print(f"\nAviso: la línea base se tomó con otros parámetros: {stored.get('settings')}")
+
+    regressions = compare(results, stored.get('results', {}), args.tolerance)
+    if regressions:
+        print(f"\nRegresiones (tolerancia {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\nSin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
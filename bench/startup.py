@@ -0,0 +1,161 @@
+"""
+Tiempo de arranque de la aplicación.
+
+Mide, en procesos nuevos (sin módulos en caché de sys.modules), cuánto
+tardan `import app` y `create_app()`, y qué módulos pesados quedan cargados.
+Compara con bench/startup_baseline.json:
+
+    python -m bench.startup                    # compara con la línea base
+    python -m bench.startup --save-baseline    # guarda una nueva línea base
+    python -m bench.startup --no-users         # instancia solo de catálogos
+    python -m bench.startup --importtime       # módulos más lentos (python -X importtime)
+
+Termina con código 1 si el arranque empeora más que --tolerance.
+"""
+import os
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'startup_baseline.json')
+
+# Módulos cuya carga se comprueba tras create_app
+HEAVY_MODULES = ('firebase_admin', 'google.cloud.firestore', 'grpc', 'brotli')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'total_ms': (created - started) * 1000,
+    'modules': len(sys.modules),
+    'loaded': [name for name in %r if name in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+# Margen absoluto para no marcar como regresión el ruido de pocos milisegundos
+SLACK_MS = 20.0
+
+
+def _environment(users: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    env['USERS_ENABLED'] = 'True' if users else 'False'
+    env.setdefault('FLASK_ENV', 'production')
+    # Sin copias en disco ni APIs reales: solo se mide el arranque
+    env['CATALOG_SNAPSHOT_DIR'] = ''
+    env.setdefault('DOG_API_BASE_URL', 'http://127.0.0.1:9/dog/v1/')
+    env.setdefault('CAT_API_BASE_URL', 'http://127.0.0.1:9/cat/v1/')
+    return env
+
+
+def measure(runs: int, users: bool) -> Dict[str, Any]:
+    """
+    Arranca la aplicación `runs` veces en procesos nuevos.
+
+    Returns:
+        Dict[str, Any]: Mediana y mínimo de cada tiempo, y los módulos pesados cargados
+    """
+    samples: List[Dict[str, Any]] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE],
+            cwd=ROOT, env=_environment(users), capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    result: Dict[str, Any] = {'runs': runs}
+    for key in ('import_ms', 'create_app_ms', 'total_ms'):
+        values = [sample[key] for sample in samples]
+        result[f'{key}_median'] = round(statistics.median(values), 1)
+        result[f'{key}_min'] = round(min(values), 1)
+    result['modules'] = samples[-1]['modules']
+    result['heavy_modules_loaded'] = samples[-1]['loaded']
+    return result
+
+
+def importtime(users: bool, top: int = 15) -> List[str]:
+    """Módulos con mayor tiempo de importación acumulado en create_app()."""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+        cwd=ROOT, env=_environment(users), capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        rows.append((int(cumulative), name))
+    return [f"{cumulative / 1000:8.1f} ms  {name}" for cumulative, name in sorted(rows, reverse=True)[:top]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de create_app')
+    parser.add_argument('--runs', type=int, default=10, help='Procesos a arrancar por escenario')
+    parser.add_argument('--no-users', action='store_true', help='Solo el escenario sin rutas de usuarios')
+    parser.add_argument('--importtime', action='store_true', help='Mostrar los módulos más lentos de importar')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Archivo de línea base')
+    parser.add_argument('--save-baseline', action='store_true', help='Guardar los resultados como línea base')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Empeoramiento relativo admitido (0-1)')
+    args = parser.parse_args(argv)
+
+    scenarios = {'catalog_only': False} if args.no_users else {'full': True, 'catalog_only': False}
+    results = {}
+    for name, users in scenarios.items():
+        results[name] = result = measure(args.runs, users)
+        print(f"{name:<13} import {result['import_ms_median']:>7} ms  create_app {result['create_app_ms_median']:>7} ms  "
+              f"total {result['total_ms_median']:>7} ms (mín. {result['total_ms_min']})  "
+              f"módulos {result['modules']}  pesados {', '.join(result['heavy_modules_loaded']) or '-'}")
+        if args.importtime:
+            for line in importtime(users):
+                print(f"    {line}")
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            stored = json.load(f)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'results': {**stored.get('results', {}), **results}},
+                      f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    if not stored:
+        print("\nNo hay línea base; use --save-baseline para crearla")
+        return 0
+
+    regressions = []
+    for name, result in results.items():
+        reference = stored.get('results', {}).get(name)
+        if not reference:
+            continue
+        limit = reference['total_ms_median'] * (1 + args.tolerance) + SLACK_MS
+        if result['total_ms_median'] > limit:
+            regressions.append(f"{name}: {result['total_ms_median']} ms (línea base {reference['total_ms_median']})")
+        new_heavy = set(result['heavy_modules_loaded']) - set(reference['heavy_modules_loaded'])
+        if new_heavy:
+            regressions.append(f"{name}: ahora carga {', '.join(sorted(new_heavy))} al arrancar")
+
+    if regressions:
+        print(f"\nRegresiones (tolerancia {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\nSin regresiones respecto a la línea base")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,10 +5,13 @@ echo "Iniciando la aplicación Flask..."
 # Asegurarse de que el puerto esté configurado, si no, usar el puerto 8000 por defecto
 PORT=${PORT:-8000}
 
+# Hilos de waitress; el pool de conexiones a las APIs externas se dimensiona con este valor
+export WAITRESS_THREADS=${WAITRESS_THREADS:-4}
+
 # Instalar dependencias
 echo "Instalando dependencias..."
 pip install --no-cache-dir -r requirements.txt
 
 # Iniciar la aplicación con Waitress
 echo "Iniciando la aplicación en el puerto $PORT..."
-waitress-serve --host=0.0.0.0 --port=$PORT --ident=PetPlatformBackend app:create_app
+waitress-serve --host=0.0.0.0 --port=$PORT --threads=$WAITRESS_THREADS --ident=PetPlatformBackend app:create_app